@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent headless workers with and without CPU pinning.
+Run with: blender --background --factory-startup --python DOCS/bench_affinity.py -- [workers] [frames]
+
+Saves one copy of a small Cycles scene per worker and renders all copies
+at the same time through loom_pool.py, once with every worker using all
+threads (the workers compete for all cores) and once with the cores split
+by helpers/cpu_planner.py. Reports the wall time and frames per minute.
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+# Add local path to test from repo, not installed version
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, "loom", "scripts"))
+
+import bpy
+import addon_utils
+
+import loom_pool
+from loom.helpers import cpu_planner
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+WORKERS = int(argv[0]) if len(argv) > 0 else 2
+FRAMES = int(argv[1]) if len(argv) > 1 else 8
+
+
+def build_files(folder):
+    """Animated default cube, one blend-file and output folder per worker"""
+    scn = bpy.context.scene
+    cube = bpy.data.objects.get("Cube")
+    for frame, z in ((1, 0.0), (FRAMES, 3.0)):
+        cube.rotation_euler.z = z
+        cube.keyframe_insert("rotation_euler", frame=frame)
+    scn.render.engine = 'CYCLES'
+    scn.cycles.device = 'CPU'
+    scn.cycles.samples = 32
+    scn.cycles.use_denoising = False
+    scn.render.resolution_x, scn.render.resolution_y = 640, 360
+    scn.render.image_settings.file_format = 'PNG'
+    scn.render.use_overwrite = True
+
+    files = []
+    for i in range(WORKERS):
+        scn.render.filepath = os.path.join(folder, "out_{}".format(i), "frame_####")
+        path = os.path.join(folder, "shot_{}.blend".format(i))
+        bpy.ops.wm.save_as_mainfile(filepath=path, copy=True)
+        files.append(path)
+    return files
+
+
+def run(files, affinity):
+    batch = {
+        "blender": bpy.app.binary_path,
+        "workers": WORKERS,
+        "affinity": affinity,
+        "jobs": [{"blend": f, "frames": "1-{}".format(FRAMES), "save": False} for f in files]}
+    start = time.perf_counter()
+    failures = loom_pool.run_batch(batch)
+    return time.perf_counter() - start, failures
+
+
+print("=" * 70)
+print("LOOM - WORKER AFFINITY BENCHMARK")
+print("Workers: {}, Frames per worker: {}".format(WORKERS, FRAMES))
+print("=" * 70)
+
+addon_utils.enable("loom", default_set=True)
+folder = tempfile.mkdtemp(prefix="loom_affinity_")
+files = build_files(folder)
+
+nodes = cpu_planner.numa_nodes()
+print("\n[TOPOLOGY]")
+print("  usable cpus:     {}".format(cpu_planner.format_cpulist(cpu_planner.available_cpus())))
+print("  numa nodes:      {}".format(len(nodes)))
+for line in cpu_planner.describe(cpu_planner.plan_workers(WORKERS, nodes)):
+    print("  {}".format(line))
+
+print("\n[RENDERING, {} images]".format(WORKERS * FRAMES))
+shared_time, shared_failures = run(files, affinity=False)
+pinned_time, pinned_failures = run(files, affinity=True)
+images = WORKERS * FRAMES
+print("  all threads:     {:8.2f}s  {:6.1f} frames/min".format(shared_time, images * 60 / shared_time))
+print("  pinned:          {:8.2f}s  {:6.1f} frames/min  ({:.2f}x)".format(
+    pinned_time, images * 60 / pinned_time, shared_time / pinned_time))
+for failure in shared_failures + pinned_failures:
+    print("  ERROR: {}".format(failure))
+
+shutil.rmtree(folder, ignore_errors=True)
+print("=" * 70)
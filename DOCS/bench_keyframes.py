@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark keyframe collection on a synthetic rig.
+Run with: blender --background --factory-startup --python DOCS/bench_keyframes.py -- [channels] [keys]
+
+Compares the per-keyframe Python loop (previous implementation of
+LOOM_OT_selected_keys_dialog) against the foreach_get based helpers.
+"""
+
+import sys
+import os
+import time
+
+# Add local path to test from repo, not installed version
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+import bpy
+import numpy as np
+
+from loom.helpers.blender_compat import get_action_fcurves
+from loom.helpers.frame_utils import rangify_frames
+from loom.helpers.keyframe_utils import action_frames
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+CHANNELS = int(argv[0]) if len(argv) > 0 else 500
+KEYS = int(argv[1]) if len(argv) > 1 else 2000
+REPEAT = 5
+
+
+def build_rig(channels, keys):
+    """Create an object with one action holding `channels` F-Curves of `keys` keys each"""
+    rig = bpy.data.objects.new("LoomBenchRig", None)
+    bpy.context.scene.collection.objects.link(rig)
+    action = bpy.data.actions.new("LoomBenchAction")
+    rig.animation_data_create()
+    rig.animation_data.action = action
+
+    rng = np.random.default_rng(0)
+    for c in range(channels):
+        prop = "bench_{}".format(c)
+        rig[prop] = 0.0
+        data_path = '["{}"]'.format(prop)
+        if hasattr(action, "fcurve_ensure_for_datablock"):
+            fcurve = action.fcurve_ensure_for_datablock(rig, data_path)
+        else:
+            fcurve = action.fcurves.new(data_path)
+
+        fcurve.keyframe_points.add(keys)
+        co = np.empty(keys * 2, dtype=np.float32)
+        co[0::2] = np.arange(1, keys + 1) + c % 7
+        co[1::2] = rng.random(keys)
+        fcurve.keyframe_points.foreach_set("co", co)
+        fcurve.keyframe_points.foreach_set(
+            "select_control_point", rng.random(keys) < 0.25)
+    return action
+
+
+def loop_keyframes(actions, keyframe_selection=True):
+    """Previous implementation: iterate over every keyframe point"""
+    ctrl_points = set()
+    for action in actions:
+        for channel in get_action_fcurves(action):
+            for key in channel.keyframe_points:
+                if keyframe_selection:
+                    if key.select_control_point:
+                        ctrl_points.add(key.co.x)
+                else:
+                    ctrl_points.add(key.co.x)
+    return sorted(ctrl_points)
+
+
+def measure(func, *args, **kwargs):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+print("=" * 70)
+print("LOOM - KEYFRAME COLLECTION BENCHMARK")
+print("Channels: {}, Keys per channel: {}".format(CHANNELS, KEYS))
+print("=" * 70)
+
+actions = (build_rig(CHANNELS, KEYS),)
+
+for selected_only in (True, False):
+    loop_time, loop_result = measure(loop_keyframes, actions, selected_only)
+    vec_time, vec_result = measure(action_frames, actions, selected_only=selected_only)
+    assert np.array_equal(np.asarray(loop_result, dtype=np.float32), vec_result)
+
+    label = "selected keys" if selected_only else "all keys"
+    print("\n[{}]".format(label))
+    print("  loop:        {:8.4f}s".format(loop_time))
+    print("  foreach_get: {:8.4f}s  ({:.1f}x)".format(vec_time, loop_time / vec_time))
+
+frames = np.unique(action_frames(actions).astype(np.int64))
+print("\nRange string: {}".format(rangify_frames(frames)))
+print("=" * 70)
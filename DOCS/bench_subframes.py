@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark sub-frame rendering on a sample scene.
+Run with: blender --background --factory-startup --python DOCS/bench_subframes.py -- [frames] [subframes]
+
+Renders a motion blur study (default cube with animated location and
+rotation, Cycles at low resolution) once in input order without
+persistent data and once with grouped sub-frames. Also compares the
+previous string based sub-frame naming with split_subframes.
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+# Add local path to test from repo, not installed version
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+import bpy
+import addon_utils
+
+from loom.helpers.frame_utils import filter_frames, split_subframes
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+FRAMES = int(argv[0]) if len(argv) > 0 else 3
+SUBFRAMES = int(argv[1]) if len(argv) > 1 else 10
+
+
+def build_scene(output_dir):
+    """Animate the default cube and set up a small Cycles render"""
+    scn = bpy.context.scene
+    cube = bpy.data.objects.get("Cube")
+    for frame, x in ((1, -2.0), (FRAMES + 1, 2.0)):
+        cube.location.x = x
+        cube.rotation_euler.z = x
+        cube.keyframe_insert("location", frame=frame)
+        cube.keyframe_insert("rotation_euler", frame=frame)
+
+    scn.render.engine = 'CYCLES'
+    scn.cycles.samples = 8
+    scn.cycles.use_denoising = False
+    scn.render.resolution_x, scn.render.resolution_y = 640, 360
+    scn.render.image_settings.file_format = 'PNG'
+    scn.render.filepath = os.path.join(output_dir, "study_####")
+    scn.render.use_overwrite = True
+    scn.render.use_persistent_data = False
+
+
+def interleaved_input():
+    """Sub-frames in study order: every first sub-frame, then every second..."""
+    step = 1.0 / SUBFRAMES
+    return ",".join(
+        "{:.5f}".format(frame + sub * step) \
+        for sub in range(SUBFRAMES) for frame in range(1, FRAMES + 1))
+
+
+def string_subframes(frames):
+    """Previous implementation of the sub-frame split"""
+    subs = []
+    for frame in frames:
+        main_frame, sub_frame = repr(frame).split('.')
+        subs.append((int(main_frame), float('.' + sub_frame)))
+    dec = max(map(lambda x: len(str(x[1]).split('.')[1]), subs))
+    return subs, dec
+
+
+def render(frame_input, group):
+    start = time.perf_counter()
+    bpy.ops.render.image_sequence(
+        frames=frame_input, render_silent=True, group_subframes=group)
+    return time.perf_counter() - start
+
+
+print("=" * 70)
+print("LOOM - SUB-FRAME RENDERING BENCHMARK")
+print("Frames: {}, Sub-frames per frame: {}".format(FRAMES, SUBFRAMES))
+print("=" * 70)
+
+addon_utils.enable("loom", default_set=True)
+output_dir = tempfile.mkdtemp(prefix="loom_subframes_")
+build_scene(output_dir)
+frame_input = interleaved_input()
+
+print("\n[NAMING, 100000 sub-frames]")
+frames = [i / 10 for i in range(100000)]
+start = time.perf_counter()
+string_subframes(frames)
+string_time = time.perf_counter() - start
+start = time.perf_counter()
+split_subframes(frames)
+int_time = time.perf_counter() - start
+print("  repr split:      {:8.4f}s".format(string_time))
+print("  split_subframes: {:8.4f}s  ({:.1f}x)".format(int_time, string_time / int_time))
+
+print("\n[RENDERING, {} images]".format(len(filter_frames(frame_input))))
+separate_time = render(frame_input, group=False)
+grouped_time = render(frame_input, group=True)
+print("  separate:        {:8.2f}s".format(separate_time))
+print("  grouped:         {:8.2f}s  ({:.2f}x)".format(grouped_time, separate_time / grouped_time))
+print("  output:          {} files".format(len(os.listdir(output_dir))))
+
+shutil.rmtree(output_dir, ignore_errors=True)
+print("=" * 70)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Startup profile for Loom addon - measures import and registration cost.
+Run with: blender --background --factory-startup --python DOCS/profile_startup.py
+
+Set LOOM_FORCE_UI=1 to include UI classes, draw functions and keymaps
+(the interactive startup path) while running in background mode.
+"""
+
+import sys
+import os
+import time
+import cProfile
+import pstats
+
+# Add local path to test from repo, not installed version
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+import bpy
+
+HEAVY_MODULES = ("numpy", "subprocess", "webbrowser", "blend_render_info", "rna_keymap_ui")
+
+print("=" * 70)
+print("LOOM ADDON - STARTUP PROFILE")
+print("Background: {}, UI forced: {}".format(
+    bpy.app.background, bool(os.environ.get("LOOM_FORCE_UI"))))
+print("=" * 70)
+
+preloaded = {m for m in HEAVY_MODULES if m in sys.modules}
+profiler = cProfile.Profile()
+
+start = time.perf_counter()
+profiler.enable()
+import loom
+profiler.disable()
+import_time = time.perf_counter() - start
+
+start = time.perf_counter()
+profiler.enable()
+loom.register()
+profiler.disable()
+register_time = time.perf_counter() - start
+
+print("\n[TIMINGS]")
+print("  import:   {:8.2f} ms".format(import_time * 1000))
+print("  register: {:8.2f} ms".format(register_time * 1000))
+print("  keymaps:  {}".format(len(loom.addon_keymaps)))
+
+print("\n[HEAVY MODULES LOADED BY LOOM]")
+for name in HEAVY_MODULES:
+    if name in preloaded:
+        state = "already loaded by Blender"
+    else:
+        state = "loaded" if name in sys.modules else "deferred"
+    print("  {:<20} {}".format(name, state))
+
+print("\n[TOP 20 BY CUMULATIVE TIME]")
+pstats.Stats(profiler).strip_dirs().sort_stats("cumulative").print_stats(20)
+
+loom.unregister()
+print("=" * 70)
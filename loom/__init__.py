@@ -36,13 +36,13 @@ bl_info = {
     "category": "Render"
 }
 
+import os
 import sys
 
 import bpy
 
-# Module imports
+# Module imports, UI modules are imported on demand in register()
 from . import properties
-from . import ui
 from . import operators
 from . import presets
 from . import handlers
@@ -53,6 +53,18 @@ platform = sys.platform
 # Keymap storage
 addon_keymaps = []
 
+# Hotkeys: (operator idname, key, modifiers), the primary modifier
+# is Ctrl on all platforms and additionally Cmd on macOS
+keymap_items = (
+    ("loom.project_dialog", 'F1', {"shift": True}),
+    ("loom.rename_dialog", 'F2', {"shift": True}),
+    ("loom.open_output_folder", 'F3', {"shift": True}),
+    ("loom.encode_dialog", 'F9', {"shift": True}),
+    ("loom.render_flipbook", 'F10', {"shift": True}),
+    ("loom.batch_render_dialog", 'F12', {"shift": True, "alt": True}),
+    ("loom.render_dialog", 'F12', {"shift": True}),
+)
+
 # Default global variables for preferences
 global_var_defaults = {
     "$BLEND": 'bpy.path.basename(bpy.data.filepath)[:-6]',
@@ -79,11 +91,88 @@ project_directories = {
 }
 
 
+def use_interface():
+    """Whether UI classes, draw functions and keymaps should be registered.
+
+    Skipped in background mode (blender -b) since there is nothing to draw,
+    can be forced by setting the LOOM_FORCE_UI environment variable.
+    """
+    return not bpy.app.background or bool(os.environ.get("LOOM_FORCE_UI"))
+
+
+def register_keymaps(playblast=False):
+    """Add all Loom hotkeys to the addon keyconfig."""
+    kc = bpy.context.window_manager.keyconfigs.addon
+    if not kc:
+        return
+
+    items = list(keymap_items)
+    if playblast:
+        items.insert(0, ("loom.playblast", 'F11', {"shift": True}))
+
+    primary_keys = ("ctrl", "oskey") if platform.startswith('darwin') else ("ctrl",)
+    km = kc.keymaps.new(name="Screen", space_type='EMPTY')
+    for primary in primary_keys:
+        for idname, key, modifiers in items:
+            kmi = km.keymap_items.new(idname, key, 'PRESS', **{primary: True}, **modifiers)
+            kmi.active = True
+            addon_keymaps.append((km, kmi))
+
+
+def unregister_keymaps():
+    """Remove all Loom hotkeys from the addon keyconfig."""
+    for km, kmi in addon_keymaps:
+        km.keymap_items.remove(kmi)
+    addon_keymaps.clear()
+
+
+def register_draw_functions(ui):
+    """Append UI draw functions to Blender panels and menus."""
+    bpy.types.TOPBAR_MT_render.append(ui.draw_functions.draw_loom_render_menu)
+    # TIME_MT_marker was removed in Blender 5.0 (Timeline merged into Dope Sheet)
+    if hasattr(bpy.types, 'TIME_MT_marker'):
+        bpy.types.TIME_MT_marker.append(ui.draw_functions.draw_loom_marker_menu)
+    bpy.types.DOPESHEET_MT_marker.append(ui.draw_functions.draw_loom_marker_menu)
+    bpy.types.NLA_MT_marker.append(ui.draw_functions.draw_loom_marker_menu)
+    bpy.types.RENDER_PT_output.prepend(ui.draw_functions.draw_loom_outputpath)
+    bpy.types.RENDER_PT_output.append(ui.draw_functions.draw_loom_version_number)
+    bpy.types.RENDER_PT_output.append(ui.draw_functions.draw_loom_compositor_paths)
+    bpy.types.RENDER_PT_stamp_note.prepend(ui.draw_functions.draw_loom_metadata)
+    bpy.types.DOPESHEET_HT_header.append(ui.draw_functions.draw_loom_dopesheet)
+    bpy.types.PROPERTIES_HT_header.append(ui.draw_functions.draw_loom_render_presets)
+    bpy.types.LOOM_PT_render_presets.append(ui.draw_functions.draw_loom_preset_flags)
+    bpy.types.LOOM_PT_render_presets.prepend(ui.draw_functions.draw_loom_preset_header)
+    bpy.types.TOPBAR_MT_blender.append(ui.draw_functions.draw_loom_project)
+
+
+def unregister_draw_functions(ui):
+    """Remove UI draw functions from Blender panels and menus."""
+    bpy.types.DOPESHEET_HT_header.remove(ui.draw_functions.draw_loom_dopesheet)
+    bpy.types.RENDER_PT_output.remove(ui.draw_functions.draw_loom_compositor_paths)
+    bpy.types.RENDER_PT_stamp_note.remove(ui.draw_functions.draw_loom_metadata)
+    bpy.types.RENDER_PT_output.remove(ui.draw_functions.draw_loom_outputpath)
+    bpy.types.RENDER_PT_output.remove(ui.draw_functions.draw_loom_version_number)
+    bpy.types.NLA_MT_marker.remove(ui.draw_functions.draw_loom_marker_menu)
+    bpy.types.DOPESHEET_MT_marker.remove(ui.draw_functions.draw_loom_marker_menu)
+    # TIME_MT_marker was removed in Blender 5.0 (Timeline merged into Dope Sheet)
+    if hasattr(bpy.types, 'TIME_MT_marker'):
+        bpy.types.TIME_MT_marker.remove(ui.draw_functions.draw_loom_marker_menu)
+    bpy.types.TOPBAR_MT_render.remove(ui.draw_functions.draw_loom_render_menu)
+    bpy.types.PROPERTIES_HT_header.remove(ui.draw_functions.draw_loom_render_presets)
+    bpy.types.LOOM_PT_render_presets.remove(ui.draw_functions.draw_loom_preset_flags)
+    bpy.types.LOOM_PT_render_presets.remove(ui.draw_functions.draw_loom_preset_header)
+    bpy.types.TOPBAR_MT_blender.remove(ui.draw_functions.draw_loom_project)
+
+
 def register():
     """Register all addon classes and handlers."""
+    interface = use_interface()
+
     # Register modules in correct order
     properties.register()
-    ui.register()
+    if interface:
+        from . import ui
+        ui.register()
     operators.register()
     presets.register()
     handlers.register()
@@ -91,73 +180,22 @@ def register():
     # Attach scene property
     bpy.types.Scene.loom = bpy.props.PointerProperty(type=properties.scene_props.LOOM_PG_scene_settings)
 
-    # Hotkey registration
     addon_name = __package__
     # Check if preferences are available (they might not be during initial registration)
-    playblast = False
     prefs = None
     try:
         prefs = bpy.context.preferences.addons[addon_name].preferences
-        playblast = prefs.playblast_flag
     except KeyError:
         # Preferences not yet available, use default
         pass
 
-    kc = bpy.context.window_manager.keyconfigs.addon
-    if kc:
-        km = kc.keymaps.new(name="Screen", space_type='EMPTY')
-        if playblast:
-            kmi = km.keymap_items.new("loom.playblast", 'F11', 'PRESS', ctrl=True, shift=True)
-            kmi.active = True
-            addon_keymaps.append((km, kmi))
-        kmi = km.keymap_items.new("loom.project_dialog", 'F1', 'PRESS', ctrl=True, shift=True)
-        kmi.active = True
-        addon_keymaps.append((km, kmi))
-        kmi = km.keymap_items.new("loom.rename_dialog", 'F2', 'PRESS', ctrl=True, shift=True)
-        kmi.active = True
-        addon_keymaps.append((km, kmi))
-        kmi = km.keymap_items.new("loom.open_output_folder", 'F3', 'PRESS', ctrl=True, shift=True)
-        kmi.active = True
-        addon_keymaps.append((km, kmi))
-        kmi = km.keymap_items.new("loom.encode_dialog", 'F9', 'PRESS', ctrl=True, shift=True)
-        kmi.active = True
-        addon_keymaps.append((km, kmi))
-        kmi = km.keymap_items.new("loom.render_flipbook", 'F10', 'PRESS', ctrl=True, shift=True)
-        kmi.active = True
-        addon_keymaps.append((km, kmi))
-        kmi = km.keymap_items.new("loom.batch_render_dialog", 'F12', 'PRESS', ctrl=True, shift=True, alt=True)
-        kmi.active = True
-        addon_keymaps.append((km, kmi))
-        kmi = km.keymap_items.new("loom.render_dialog", 'F12', 'PRESS', ctrl=True, shift=True)
-        kmi.active = True
-        addon_keymaps.append((km, kmi))
-
-        if platform.startswith('darwin'):
-            if playblast:
-                kmi = km.keymap_items.new("loom.playblast", 'F11', 'PRESS', oskey=True, shift=True)
-                kmi.active = True
-                addon_keymaps.append((km, kmi))
-            kmi = km.keymap_items.new("loom.project_dialog", 'F1', 'PRESS', oskey=True, shift=True)
-            kmi.active = True
-            addon_keymaps.append((km, kmi))
-            kmi = km.keymap_items.new("loom.rename_dialog", 'F2', 'PRESS', oskey=True, shift=True)
-            kmi.active = True
-            addon_keymaps.append((km, kmi))
-            kmi = km.keymap_items.new("loom.open_output_folder", 'F3', 'PRESS', oskey=True, shift=True)
-            kmi.active = True
-            addon_keymaps.append((km, kmi))
-            kmi = km.keymap_items.new("loom.encode_dialog", 'F9', 'PRESS', oskey=True, shift=True)
-            kmi.active = True
-            addon_keymaps.append((km, kmi))
-            kmi = km.keymap_items.new("loom.render_flipbook", 'F10', 'PRESS', oskey=True, shift=True)
-            kmi.active = True
-            addon_keymaps.append((km, kmi))
-            kmi = km.keymap_items.new("loom.batch_render_dialog", 'F12', 'PRESS', oskey=True, shift=True, alt=True)
-            kmi.active = True
-            addon_keymaps.append((km, kmi))
-            kmi = km.keymap_items.new("loom.render_dialog", 'F12', 'PRESS', oskey=True, shift=True)
-            kmi.active = True
-            addon_keymaps.append((km, kmi))
+    # Profiling requested in the preferences, LOOM_PROFILE is applied by operators.register()
+    if prefs and prefs.profile_flag and operators.profiling.env_settings() is None:
+        operators.set_profiling(True, prefs.profile_directory if prefs.profile_stats else "")
+
+    # Hotkey registration, not required in background mode
+    if interface:
+        register_keymaps(playblast=prefs.playblast_flag if prefs else False)
 
     # Initialize global variables (only if prefs are available)
     if prefs:
@@ -176,54 +214,33 @@ def register():
                 di.name = value
                 di.creation_flag = True
 
-    # Append UI draw functions to Blender panels
-    bpy.types.TOPBAR_MT_render.append(ui.draw_functions.draw_loom_render_menu)
-    # TIME_MT_marker was removed in Blender 5.0 (Timeline merged into Dope Sheet)
-    if hasattr(bpy.types, 'TIME_MT_marker'):
-        bpy.types.TIME_MT_marker.append(ui.draw_functions.draw_loom_marker_menu)
-    bpy.types.DOPESHEET_MT_marker.append(ui.draw_functions.draw_loom_marker_menu)
-    bpy.types.NLA_MT_marker.append(ui.draw_functions.draw_loom_marker_menu)
-    bpy.types.RENDER_PT_output.prepend(ui.draw_functions.draw_loom_outputpath)
-    bpy.types.RENDER_PT_output.append(ui.draw_functions.draw_loom_version_number)
-    bpy.types.RENDER_PT_output.append(ui.draw_functions.draw_loom_compositor_paths)
-    bpy.types.RENDER_PT_stamp_note.prepend(ui.draw_functions.draw_loom_metadata)
-    bpy.types.DOPESHEET_HT_header.append(ui.draw_functions.draw_loom_dopesheet)
-    bpy.types.PROPERTIES_HT_header.append(ui.draw_functions.draw_loom_render_presets)
-    bpy.types.LOOM_PT_render_presets.append(ui.draw_functions.draw_loom_preset_flags)
-    bpy.types.LOOM_PT_render_presets.prepend(ui.draw_functions.draw_loom_preset_header)
-    bpy.types.TOPBAR_MT_blender.append(ui.draw_functions.draw_loom_project)
+    if interface:
+        register_draw_functions(ui)
 
 
 def unregister():
     """Unregister all addon classes and handlers."""
+    ui = sys.modules.get(__package__ + ".ui")
+    interface = ui is not None and hasattr(bpy.types, "LOOM_PT_render_presets")
+
     # Remove UI draw functions
-    bpy.types.DOPESHEET_HT_header.remove(ui.draw_functions.draw_loom_dopesheet)
-    bpy.types.RENDER_PT_output.remove(ui.draw_functions.draw_loom_compositor_paths)
-    bpy.types.RENDER_PT_stamp_note.remove(ui.draw_functions.draw_loom_metadata)
-    bpy.types.RENDER_PT_output.remove(ui.draw_functions.draw_loom_outputpath)
-    bpy.types.RENDER_PT_output.remove(ui.draw_functions.draw_loom_version_number)
-    bpy.types.NLA_MT_marker.remove(ui.draw_functions.draw_loom_marker_menu)
-    bpy.types.DOPESHEET_MT_marker.remove(ui.draw_functions.draw_loom_marker_menu)
-    # TIME_MT_marker was removed in Blender 5.0 (Timeline merged into Dope Sheet)
-    if hasattr(bpy.types, 'TIME_MT_marker'):
-        bpy.types.TIME_MT_marker.remove(ui.draw_functions.draw_loom_marker_menu)
-    bpy.types.TOPBAR_MT_render.remove(ui.draw_functions.draw_loom_render_menu)
-    bpy.types.PROPERTIES_HT_header.remove(ui.draw_functions.draw_loom_render_presets)
-    bpy.types.LOOM_PT_render_presets.remove(ui.draw_functions.draw_loom_preset_flags)
-    bpy.types.LOOM_PT_render_presets.remove(ui.draw_functions.draw_loom_preset_header)
-    bpy.types.TOPBAR_MT_blender.remove(ui.draw_functions.draw_loom_project)
+    if interface:
+        unregister_draw_functions(ui)
 
     # Unregister modules in reverse order
     handlers.unregister()
     presets.unregister()
     operators.unregister()
-    ui.unregister()
+    if interface:
+        ui.unregister()
     properties.unregister()
 
     # Remove keymaps
-    for km, kmi in addon_keymaps:
-        km.keymap_items.remove(kmi)
-    addon_keymaps.clear()
+    unregister_keymaps()
+
+    # Stop filesystem checks
+    from .helpers import async_fs
+    async_fs.shutdown()
 
     # Remove scene property
     del bpy.types.Scene.loom
@@ -27,6 +27,13 @@ from .blender_compat import (
 
 from .frame_utils import (
     filter_frames,
+    rangify_frames,
+    split_subframes,
+)
+
+from .keyframe_utils import (
+    fcurve_frames,
+    action_frames,
 )
 
 from .version_utils import (
@@ -34,10 +41,124 @@ from .version_utils import (
     render_version,
 )
 
+from .sequence_utils import (
+    split_sequence_path,
+    frame_filename,
+    scan_sequence,
+    read_manifest,
+    update_manifest,
+    checksum_algorithm,
+    duplicate_frames,
+    record_checksums,
+)
+
+from .proxy_utils import (
+    proxy_directory,
+    find_proxies,
+    proxy_commands,
+)
+
+from .encode_utils import (
+    deliverable_path,
+    encode_args,
+)
+
+from .capabilities import (
+    ffmpeg_capabilities,
+    terminal_capabilities,
+    missing_encoders,
+)
+
+from .snapshot_store import (
+    store_file,
+    restore_snapshot,
+    list_snapshots,
+    clean_repository,
+)
+
+from .frame_validation import (
+    validate_frame,
+    verify_frames,
+)
+
+from .async_fs import (
+    write_permission,
+    make_dirs,
+)
+
+from .scratch_upload import (
+    scratch_root,
+    scratch_path,
+    upload_file,
+    ScratchUploader,
+)
+
+from .dependency_cache import (
+    cache_root,
+    DependencyCache,
+)
+
+from .render_history import (
+    history_path,
+    log_render,
+    log_renders,
+    query_renders,
+    latest_render,
+    clear_renders,
+    export_history,
+    import_history,
+    log_frame_times,
+    frame_times,
+    log_memory_peak,
+    memory_peak,
+)
+
+from .scheduler import (
+    sample_frames,
+    estimate_costs,
+    build_chunks,
+    ChunkQueue,
+)
+
+from .batch_queue import (
+    item_key,
+    duplicate_indices,
+    read_queue,
+    write_queue,
+)
+
+from .job_spec import (
+    frame_intervals,
+    expand_intervals,
+    interval_input,
+    chunk_variant,
+    write_spec,
+    read_spec,
+)
+
+from .cpu_planner import (
+    parse_cpulist,
+    format_cpulist,
+    available_cpus,
+    numa_nodes,
+    plan_workers,
+    pin_process,
+)
+
+from .preset_utils import (
+    IDReference,
+    parse_preset,
+    preset_table,
+    values_equal,
+)
+
 from .globals_utils import (
     isevaluable,
     replace_globals,
     user_globals,
+    global_keys,
+    evaluate_globals,
+    PathTemplate,
 )
 
 
@@ -48,11 +169,100 @@ __all__ = [
     "get_active_action",
     # Frame utilities
     "filter_frames",
+    "rangify_frames",
+    "split_subframes",
+    # Keyframe utilities
+    "fcurve_frames",
+    "action_frames",
     # Version utilities
     "version_number",
     "render_version",
+    # Sequence utilities
+    "split_sequence_path",
+    "frame_filename",
+    "scan_sequence",
+    "read_manifest",
+    "update_manifest",
+    "checksum_algorithm",
+    "duplicate_frames",
+    "record_checksums",
+    # Proxy utilities
+    "proxy_directory",
+    "find_proxies",
+    "proxy_commands",
+    # Encode utilities
+    "deliverable_path",
+    "encode_args",
+    # Capability cache
+    "ffmpeg_capabilities",
+    "terminal_capabilities",
+    "missing_encoders",
+    # Snapshot repository
+    "store_file",
+    "restore_snapshot",
+    "list_snapshots",
+    "clean_repository",
+    # Frame validation
+    "validate_frame",
+    "verify_frames",
+    # Asynchronous filesystem checks
+    "write_permission",
+    "make_dirs",
+    # Scratch rendering
+    "scratch_root",
+    "scratch_path",
+    "upload_file",
+    "ScratchUploader",
+    # Dependency cache
+    "cache_root",
+    "DependencyCache",
+    # Render history
+    "history_path",
+    "log_render",
+    "log_renders",
+    "query_renders",
+    "latest_render",
+    "clear_renders",
+    "export_history",
+    "import_history",
+    "log_frame_times",
+    "frame_times",
+    "log_memory_peak",
+    "memory_peak",
+    # Parallel render scheduling
+    "sample_frames",
+    "estimate_costs",
+    "build_chunks",
+    "ChunkQueue",
+    # Batch queue
+    "item_key",
+    "duplicate_indices",
+    "read_queue",
+    "write_queue",
+    # Job spec files
+    "frame_intervals",
+    "expand_intervals",
+    "interval_input",
+    "chunk_variant",
+    "write_spec",
+    "read_spec",
+    # CPU planning
+    "parse_cpulist",
+    "format_cpulist",
+    "available_cpus",
+    "numa_nodes",
+    "plan_workers",
+    "pin_process",
+    # Render presets
+    "IDReference",
+    "parse_preset",
+    "preset_table",
+    "values_equal",
     # Global variable utilities
     "isevaluable",
     "replace_globals",
     "user_globals",
+    "global_keys",
+    "evaluate_globals",
+    "PathTemplate",
 ]
@@ -0,0 +1,190 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Memory based admission of concurrent render jobs.
+
+A job only starts if the predicted memory of all running jobs plus its own
+estimate (the peak of its last render) fits the budget. Jobs without an
+estimate are probed: they run alone and their peak is measured. The
+resident memory of the workers is sampled from /proc while they render,
+a job which grows beyond its estimate holds back further jobs.
+"""
+
+import os
+import threading
+
+
+SAFETY_MARGIN = 1.15        # Estimates are scaled, peaks vary between frames
+PAUSE_RATIO = 0.9           # No admission while measured memory exceeds this share of the budget
+DEFAULT_BUDGET_RATIO = 0.85 # Share of the physical memory if no budget is set
+
+
+def _read_kb_table(path):
+    """Values of /proc files like status and meminfo in bytes"""
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                parts = value.split()
+                if len(parts) == 2 and parts[1] == "kB":
+                    values[key] = int(parts[0]) * 1024
+    except (OSError, ValueError):
+        return None
+    return values
+
+
+def process_memory(pid):
+    """Current and peak resident memory of a process (Linux).
+
+    Returns:
+        Tuple (VmRSS, VmHWM) in bytes, None if not available
+    """
+    status = _read_kb_table("/proc/{}/status".format(pid))
+    if not status or "VmRSS" not in status:
+        return None
+    return status["VmRSS"], status.get("VmHWM", status["VmRSS"])
+
+
+def reset_peak(pid):
+    """Reset VmHWM of a process to its current memory, so the next peak belongs to the next job.
+
+    Returns:
+        True if reset, False if not supported (VmHWM stays the lifetime peak)
+    """
+    try:
+        with open("/proc/{}/clear_refs".format(pid), "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def physical_memory():
+    """Total physical memory in bytes, None if unknown"""
+    meminfo = _read_kb_table("/proc/meminfo")
+    if meminfo and "MemTotal" in meminfo:
+        return meminfo["MemTotal"]
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_budget():
+    """Share of the physical memory, None if unknown"""
+    total = physical_memory()
+    return int(total * DEFAULT_BUDGET_RATIO) if total else None
+
+
+def estimate_memory(peak):
+    """Expected memory of a job from the peak of a previous render"""
+    return int(peak * SAFETY_MARGIN) if peak else None
+
+
+class AdmissionController:
+    """Hold back jobs until their predicted memory fits the budget.
+
+    Memory is accounted per slot (usually a worker process). A slot counts
+    with the higher of the estimate of its job and its measured memory, an
+    idle worker which keeps a file loaded counts with its measured memory.
+    A job is always admitted if no other job runs, so a job larger than the
+    budget runs alone instead of blocking the queue.
+
+    Args:
+        budget: Memory of all jobs in bytes
+        pause_ratio: Share of the budget above which no job is admitted
+    """
+
+    def __init__(self, budget, pause_ratio=PAUSE_RATIO):
+        self.budget = budget
+        self.pause_ratio = pause_ratio
+        self._cond = threading.Condition()
+        self._estimates = {}    # Running jobs {slot: bytes or None}
+        self._rss = {}          # Measured {slot: bytes}
+        self._peaks = {}        # Peak of the running job {slot: bytes}
+
+    def _predicted(self, exclude=None):
+        slots = set(self._estimates).union(self._rss)
+        slots.discard(exclude)
+        return sum(max(self._estimates.get(s) or 0, self._rss.get(s, 0)) for s in slots)
+
+    def _fits(self, slot, estimate):
+        running = [s for s in self._estimates if s != slot]
+        if not running:
+            return True
+        if estimate is None or any(self._estimates[s] is None for s in running):
+            return False # Probes run alone
+        if self.paused():
+            return False
+        return self._predicted(exclude=slot) + max(estimate, self._rss.get(slot, 0)) <= self.budget
+
+    def paused(self):
+        """True while the measured memory is close to the budget"""
+        return sum(self._rss.values()) > self.budget * self.pause_ratio
+
+    def predicted(self):
+        """Predicted memory of all slots in bytes"""
+        with self._cond:
+            return self._predicted()
+
+    def admit(self, slot, estimate, timeout=None):
+        """Block until the job of a slot may start.
+
+        Args:
+            slot: Key of the process running the job
+            estimate: Expected memory in bytes, None to probe the job alone
+            timeout: Seconds to wait, forever if None
+
+        Returns:
+            True if admitted, False on timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._fits(slot, estimate), timeout):
+                return False
+            self._estimates[slot] = estimate
+            self._peaks[slot] = self._rss.get(slot, 0)
+            return True
+
+    def observe(self, slot, rss, peak=0):
+        """Update the measured memory of a slot (0 if the process ended).
+
+        Args:
+            slot: Key of the process
+            rss: Current resident memory in bytes
+            peak: Peak since the job started (VmHWM after reset_peak), catches
+                spikes between two samples
+        """
+        with self._cond:
+            self._rss[slot] = rss
+            if slot in self._peaks:
+                self._peaks[slot] = max(self._peaks[slot], rss, peak)
+            self._cond.notify_all()
+
+    def release(self, slot):
+        """Mark the job of a slot as done.
+
+        Returns:
+            Peak memory measured while the job ran (bytes, 0 if not measured)
+        """
+        with self._cond:
+            self._estimates.pop(slot, None)
+            peak = self._peaks.pop(slot, 0)
+            self._cond.notify_all()
+            return peak
@@ -0,0 +1,175 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Asynchronous filesystem checks.
+
+Filesystem calls on network shares can block for seconds, so draw methods
+and dialogs ask for results instead of calling os directly: the first call
+queues the check on a thread pool and returns None, a timer polls the
+futures and redraws the interface once results arrive. Results are cached
+for a few seconds. Only the timer and the redraw depend on bpy.
+"""
+
+import os
+import tempfile
+import time
+
+
+WORKERS = 4
+TTL = 5.0                   # Seconds a result stays valid
+POLL_INTERVAL = 0.2
+
+_executor = None
+_results = {}               # key: (timestamp, value)
+_pending = {}               # key: future
+
+
+def write_permission(folder):
+    """Whether a file can be created in the folder"""
+    try:
+        with tempfile.TemporaryFile(dir=folder):
+            return True
+    except OSError:
+        return False
+
+
+def make_dirs(folder):
+    """Create a folder and its parents.
+
+    Returns:
+        None if the folder exists afterwards, otherwise the reason as string
+    """
+    try:
+        os.makedirs(folder, exist_ok=True)
+    except OSError as e:
+        return e.strerror or str(e)
+    return None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="loom_fs")
+    return _executor
+
+
+def submit(func, *args):
+    """Run a function on the filesystem thread pool.
+
+    Returns:
+        concurrent.futures.Future
+    """
+    return _get_executor().submit(func, *args)
+
+
+def status(key, func, *args, ttl=TTL):
+    """Cached result of a filesystem check, queued if unknown or outdated.
+
+    Args:
+        key: Hashable identifier of the check, e.g. ("isdir", path)
+        func: Function to run on the thread pool
+        *args: Arguments of the function
+        ttl: Seconds a result stays valid
+
+    Returns:
+        The result, the outdated result while it is checked again, or None
+        if the check has not finished yet
+    """
+    cached = _results.get(key)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    if key not in _pending:
+        _pending[key] = submit(func, *args)
+        _start_polling()
+    return cached[1] if cached else None
+
+
+def is_dir(path):
+    """Cached os.path.isdir, None while pending"""
+    return status(("isdir", path), os.path.isdir, path)
+
+
+def is_file(path):
+    """Cached os.path.isfile, None while pending"""
+    return status(("isfile", path), os.path.isfile, path)
+
+
+def is_writable(folder):
+    """Cached write_permission, None while pending"""
+    return status(("writable", folder), write_permission, folder)
+
+
+def invalidate(path=None):
+    """Drop cached results of a path (all results if None)"""
+    if path is None:
+        _results.clear()
+        return
+    for key in [k for k in _results if k[-1] == path]:
+        del _results[key]
+
+
+def collect():
+    """Move finished futures into the cache.
+
+    Returns:
+        Number of new results
+    """
+    done = [k for k, f in _pending.items() if f.done()]
+    for key in done:
+        future = _pending.pop(key)
+        try:
+            _results[key] = (time.monotonic(), future.result())
+        except Exception:
+            _results[key] = (time.monotonic(), None)
+    return len(done)
+
+
+def _poll():
+    if collect():
+        import bpy
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                area.tag_redraw()
+    return POLL_INTERVAL if _pending else None
+
+
+def _start_polling():
+    try:
+        import bpy
+    except ImportError:
+        return
+    if not bpy.app.timers.is_registered(_poll):
+        bpy.app.timers.register(_poll, first_interval=POLL_INTERVAL)
+
+
+def shutdown():
+    """Stop polling and the thread pool (without waiting for running checks)"""
+    global _executor
+    try:
+        import bpy
+        if bpy.app.timers.is_registered(_poll):
+            bpy.app.timers.unregister(_poll)
+    except ImportError:
+        pass
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+    _pending.clear()
+    _results.clear()
@@ -0,0 +1,153 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Batch queue utilities.
+
+Reads and writes the batch render queue as json or csv, so queues of
+thousands of blend-files can be built by scripts or spreadsheets, and
+provides the lookups the batch operators need to handle such queues
+without searching the collection for every item.
+"""
+
+import csv
+import json
+import os
+
+
+QUEUE_FIELDS = (
+    "name", "path", "scene", "camera", "frames", "frame_start", "frame_end",
+    "input_filter", "encode_flag", "deliverables")
+
+_types = {
+    "frame_start": int,
+    "frame_end": int,
+    "input_filter": bool,
+    "encode_flag": bool,
+}
+
+
+def item_key(path, scene="", camera=""):
+    """Identity of a queue item, the same file may be queued for other scenes or cameras"""
+    return os.path.normcase(os.path.normpath(path)), scene, camera
+
+
+def duplicate_indices(keys):
+    """Indices of all repeated keys, the first occurrence is kept.
+
+    Returns:
+        List of indices in descending order (ready to be removed one by one)
+    """
+    seen, doubles = set(), []
+    for index, key in enumerate(keys):
+        if key in seen:
+            doubles.append(index)
+        else:
+            seen.add(key)
+    return doubles[::-1]
+
+
+def _convert(field, value):
+    if field == "deliverables":
+        if isinstance(value, str):
+            return {d.strip() for d in value.split(",") if d.strip()}
+        return set(value or ())
+    if field in _types:
+        if _types[field] is bool and isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return _types[field](value)
+    return str(value)
+
+
+def normalize_entry(entry):
+    """Entry with known fields only and their values converted.
+
+    Raises:
+        ValueError: The entry has no path or an invalid value
+    """
+    record = {}
+    for field in QUEUE_FIELDS:
+        value = entry.get(field)
+        if value is None or value == "":
+            continue
+        try:
+            record[field] = _convert(field, value)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid {} '{}' of {}".format(field, value, entry.get("path")))
+    if not record.get("path"):
+        raise ValueError("Entry without path: {}".format(entry))
+    record.setdefault("name", os.path.basename(record["path"]))
+    return record
+
+
+def write_queue(filepath, entries):
+    """Write queue entries to a json or csv file (by extension).
+
+    Args:
+        filepath: Path of the .json or .csv file
+        entries: List of dictionaries, see QUEUE_FIELDS
+
+    Returns:
+        Number of written entries
+    """
+    rows = []
+    for entry in entries:
+        row = {f: entry[f] for f in QUEUE_FIELDS if f in entry}
+        row["deliverables"] = sorted(row.get("deliverables", ()))
+        rows.append(row)
+
+    if filepath.lower().endswith(".csv"):
+        with open(filepath, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=QUEUE_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(dict(row, deliverables=",".join(row["deliverables"])))
+    else:
+        with open(filepath, "w") as f:
+            json.dump({"batch": rows}, f, indent=1)
+    return len(rows)
+
+
+def read_queue(filepath):
+    """Read queue entries from a json or csv file (by extension).
+
+    Returns:
+        Tuple (list of normalized entries, list of error messages)
+
+    Raises:
+        OSError: The file can not be read
+        ValueError: Invalid json
+    """
+    if filepath.lower().endswith(".csv"):
+        with open(filepath, newline="") as f:
+            raw = list(csv.DictReader(f))
+    else:
+        with open(filepath) as f:
+            data = json.load(f)
+        raw = data.get("batch", []) if isinstance(data, dict) else data
+
+    entries, errors = [], []
+    for entry in raw:
+        if not isinstance(entry, dict):
+            errors.append("Invalid entry: {}".format(entry))
+            continue
+        try:
+            entries.append(normalize_entry(entry))
+        except ValueError as e:
+            errors.append(str(e))
+    return entries, errors
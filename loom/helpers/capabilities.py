@@ -0,0 +1,224 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Capability cache for external applications.
+
+Probes ffmpeg (version, video encoders, hardware acceleration methods) and
+the system terminal once and stores the results as json in the addon
+preferences. An entry is only probed again if the resolved binary path or
+its modification time changes. Does not depend on bpy.
+"""
+
+import json
+import os
+import re
+import shutil
+
+
+# Terminals by platform prefix, in order of preference
+TERMINALS = {
+    "linux": ("x-terminal-emulator", "xfce4-terminal", "xterm"),
+    "freebsd": ("xterm",),
+}
+
+
+def resolve_binary(path):
+    """Resolve a binary name or path to an absolute path, None if not found"""
+    if not path:
+        return None
+    if os.path.isfile(path):
+        return os.path.realpath(path)
+    found = shutil.which(path)
+    return os.path.realpath(found) if found else None
+
+
+def binary_key(path):
+    """Cache key of a binary (resolved path and modification time), None if not found"""
+    resolved = resolve_binary(path)
+    if not resolved:
+        return None
+    try:
+        return "{}|{}".format(resolved, os.stat(resolved).st_mtime_ns)
+    except OSError:
+        return None
+
+
+def _run(cmd):
+    import subprocess
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=15)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.decode(errors="replace")
+
+
+def probe_ffmpeg(path):
+    """Query version, video encoders and hardware acceleration methods of ffmpeg.
+
+    Args:
+        path: Path to the ffmpeg binary
+
+    Returns:
+        Dictionary or None if the binary can not be executed
+    """
+    version_out = _run([path, "-hide_banner", "-version"])
+    if version_out is None:
+        return None
+    version = re.search(r"ffmpeg version (\S+)", version_out)
+
+    """ Video encoders are flagged with V in the first column, the list starts after the legend """
+    encoders_out = (_run([path, "-hide_banner", "-encoders"]) or "").splitlines()
+    legend_end = next((i for i, l in enumerate(encoders_out) if l.strip().startswith("---")), -1)
+    encoders = []
+    for line in encoders_out[legend_end + 1:]:
+        fields = line.split()
+        if len(fields) > 1 and fields[0].startswith("V"):
+            encoders.append(fields[1])
+
+    hwaccels_out = (_run([path, "-hide_banner", "-hwaccels"]) or "").splitlines()
+    hwaccels = [l.strip() for l in hwaccels_out[1:] if l.strip()]
+
+    return {
+        "version": version.group(1) if version else "",
+        "encoders": encoders,
+        "hwaccels": hwaccels,
+    }
+
+
+def probe_terminal(platform):
+    """Find the terminal of the given platform without running it.
+
+    Args:
+        platform: Value of sys.platform
+
+    Returns:
+        Tuple (terminal name, binary path) or (None, None)
+    """
+    if platform.startswith("win32"):
+        return "win-default", None
+    if platform.startswith("darwin"):
+        return "osx-default", None
+    candidates = next((t for p, t in TERMINALS.items() if platform.startswith(p)), ("xterm",))
+    for name in candidates:
+        path = resolve_binary(name)
+        if path:
+            return name, path
+    return None, None
+
+
+def load_cache(data):
+    """Parse the json cache string of the preferences"""
+    try:
+        cache = json.loads(data) if data else {}
+    except ValueError:
+        cache = {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def cached_entry(cache, section, path):
+    """Get a cached entry if it is still valid for the binary, without probing.
+
+    Args:
+        cache: Dictionary returned by load_cache
+        section: "ffmpeg" or "terminal"
+        path: Path or name of the binary
+
+    Returns:
+        Dictionary or None
+    """
+    entry = cache.get(section)
+    if entry and path and entry.get("key") == binary_key(path):
+        return entry
+    return None
+
+
+def ffmpeg_capabilities(prefs, probe=True):
+    """Get the capabilities of the ffmpeg binary set in the preferences.
+
+    The preferences need the properties ffmpeg_path and capability_cache.
+    If no path is set, ffmpeg is searched on the system path and stored.
+
+    Args:
+        prefs: Addon preferences
+        probe: Run ffmpeg if the cache is not valid
+
+    Returns:
+        Dictionary or None if ffmpeg is not available
+    """
+    cache = load_cache(prefs.capability_cache)
+    path = prefs.ffmpeg_path or "ffmpeg"
+    entry = cached_entry(cache, "ffmpeg", path)
+    if entry or not probe:
+        return entry
+
+    key = binary_key(path)
+    info = probe_ffmpeg(path) if key else None
+    if info is None:
+        return None
+    info["key"] = key
+    cache["ffmpeg"] = info
+    prefs.capability_cache = json.dumps(cache)
+    if not prefs.ffmpeg_path:
+        prefs.ffmpeg_path = "ffmpeg"
+    return info
+
+
+def terminal_capabilities(prefs, platform, probe=True):
+    """Get the terminal stored in the cache or search it.
+
+    Args:
+        prefs: Addon preferences with a capability_cache property
+        platform: Value of sys.platform
+        probe: Search the terminal if the cache is not valid
+
+    Returns:
+        Dictionary with the terminal name and path or None
+    """
+    cache = load_cache(prefs.capability_cache)
+    entry = cache.get("terminal")
+    if entry and entry.get("platform") == platform:
+        if entry.get("path") is None or entry.get("key") == binary_key(entry["path"]):
+            return entry
+    if not probe:
+        return None
+
+    name, path = probe_terminal(platform)
+    if name is None:
+        return None
+    entry = {"platform": platform, "name": name, "path": path, "key": binary_key(path) if path else None}
+    cache["terminal"] = entry
+    prefs.capability_cache = json.dumps(cache)
+    return entry
+
+
+def missing_encoders(capabilities, codecs, encoder_of):
+    """Codecs whose encoder is not available.
+
+    Args:
+        capabilities: Dictionary returned by ffmpeg_capabilities or None
+        codecs: Iterable of codec identifiers
+        encoder_of: Function returning the encoder name of a codec
+
+    Returns:
+        Set of codec identifiers, empty if nothing is known about ffmpeg
+    """
+    if not capabilities:
+        return set()
+    available = set(capabilities.get("encoders", ()))
+    return {c for c in codecs if encoder_of(c) not in available}
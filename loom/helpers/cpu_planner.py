@@ -0,0 +1,180 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+CPU sets and thread budgets for concurrent render and encode processes.
+
+Several headless Blenders started with all threads each oversubscribe the
+machine and move between sockets. The planner splits the usable CPUs into
+one set per worker: whole NUMA nodes where possible, otherwise whole cores
+(SMT siblings stay together) of a single node. Topology is read from /sys
+on Linux, other platforms get plain thread counts without pinning.
+"""
+
+import glob
+import os
+import re
+
+
+SYS_NODES = "/sys/devices/system/node"
+SYS_CPUS = "/sys/devices/system/cpu"
+
+
+def parse_cpulist(text):
+    """Convert a kernel cpu list ("0-3,8,10-11") to a sorted list of integers"""
+    cpus = set()
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.update(range(int(start), int(end or start) + 1))
+    return sorted(cpus)
+
+
+def format_cpulist(cpus):
+    """Convert integers to a kernel cpu list, the inverse of parse_cpulist"""
+    ranges, cpus = [], sorted(cpus)
+    for cpu in cpus:
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else "{}-{}".format(a, b) for a, b in ranges)
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def available_cpus():
+    """CPUs this process may run on (respects taskset, cgroups and containers)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def numa_nodes(root=SYS_NODES):
+    """Usable CPUs of every NUMA node.
+
+    Returns:
+        List of cpu lists, a single node with all usable CPUs if the
+        topology is not available
+    """
+    allowed = set(available_cpus())
+    nodes = []
+    for path in sorted(glob.glob(os.path.join(root, "node[0-9]*")),
+            key=lambda p: int(re.sub(r"\D", "", os.path.basename(p)))):
+        text = _read(os.path.join(path, "cpulist"))
+        cpus = [c for c in parse_cpulist(text)] if text else []
+        cpus = [c for c in cpus if c in allowed]
+        if cpus:
+            nodes.append(cpus)
+    return nodes or [sorted(allowed)]
+
+
+def physical_cores(cpus, root=SYS_CPUS):
+    """Group CPUs by physical core, SMT siblings form one group.
+
+    Returns:
+        List of cpu lists in order of their first CPU
+    """
+    cpus, cores, seen = sorted(cpus), [], set()
+    for cpu in cpus:
+        if cpu in seen:
+            continue
+        text = _read(os.path.join(root, "cpu{}".format(cpu), "topology", "thread_siblings_list"))
+        siblings = [c for c in parse_cpulist(text) if c in cpus] if text else [cpu]
+        siblings = siblings or [cpu]
+        seen.update(siblings)
+        cores.append(siblings)
+    return cores
+
+
+def _split(items, parts):
+    """Split a list into parts of nearly equal length (larger parts first)"""
+    size, extra = divmod(len(items), parts)
+    result, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        result.append(items[start:end])
+        start = end
+    return result
+
+
+def plan_workers(workers, nodes=None):
+    """Split the machine into one CPU set per worker.
+
+    With at least as many workers as NUMA nodes, the workers are spread
+    evenly over the nodes and the cores of each node are divided among its
+    workers. With fewer workers, every worker gets whole nodes.
+
+    Args:
+        workers: Number of concurrent processes
+        nodes: CPU lists per NUMA node (read from /sys if None)
+
+    Returns:
+        List of sorted cpu lists, one per worker (empty lists are possible
+        if there are more workers than cores)
+    """
+    nodes = numa_nodes() if nodes is None else [sorted(n) for n in nodes if n]
+    workers = max(1, workers)
+    if workers < len(nodes):
+        return [sorted(c for node in group for c in node) for group in _split(nodes, workers)]
+
+    """ Largest nodes get the additional workers """
+    counts = [len(group) for group in _split(list(range(workers)), len(nodes))]
+    order = sorted(range(len(nodes)), key=lambda n: len(nodes[n]), reverse=True)
+    plans = []
+    for count, n in zip(counts, order):
+        cores = physical_cores(nodes[n])
+        if len(cores) < count: # More workers than cores, split the hardware threads
+            cores = [[c] for c in nodes[n]]
+        plans += [sorted(c for core in group for c in core) for group in _split(cores, count)]
+    return plans
+
+
+def pin_process(cpus, pid=0):
+    """Restrict all threads of a process to the given CPUs.
+
+    Threads created later inherit the affinity of their creator. Threads
+    which already exist keep their own mask, so every task is updated.
+
+    Returns:
+        True if the affinity was set, False if not supported
+    """
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return False
+    tasks = os.listdir("/proc/{}/task".format(pid or "self")) if os.path.isdir("/proc") else []
+    try:
+        for tid in tasks or [pid]:
+            try:
+                os.sched_setaffinity(int(tid), cpus)
+            except ProcessLookupError:
+                pass # Thread ended meanwhile
+    except OSError:
+        return False
+    return True
+
+
+def describe(plans):
+    """One line per worker, e.g. 'worker 1: 8 threads (0-3,32-35)'"""
+    return ["worker {}: {} threads ({})".format(i + 1, len(p), format_cpulist(p)) for i, p in enumerate(plans)]
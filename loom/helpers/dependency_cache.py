@@ -0,0 +1,252 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Local content-addressed cache of blend-file dependencies.
+
+Textures and other external files are copied from network storage once
+and stored under the hash of their content, identical files referenced by
+different paths are only stored once. An index maps (path, size, mtime) to
+the hash, so a file which did not change is found again without reading
+it. The least recently used files are evicted once the cache exceeds its
+size. Several processes may share the cache: the index is merged and
+files are evicted under a lock file, files used since a given time (the
+start of the batch) are never evicted.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+
+DEFAULT_MAX_SIZE = 20 * 1024**3     # Bytes
+INDEX_NAME = "index.json"
+LOCK_NAME = "index.lock"
+OBJECTS_FOLDER = "objects"
+CHUNK_SIZE = 1024 * 1024
+LOCK_TIMEOUT = 60.0                 # Seconds to wait for the lock
+STALE_LOCK = 600.0                  # Locks older than this were left by a crashed process
+
+
+def cache_root(folder=""):
+    """Cache folder (folder or the system temp folder)"""
+    return os.path.join(folder or tempfile.gettempdir(), "loom_cache")
+
+
+def _source_key(path, stat):
+    return "{}|{}|{}".format(os.path.normcase(os.path.abspath(path)), stat.st_size, stat.st_mtime_ns)
+
+
+class DependencyCache:
+    """Content-addressed file cache with LRU eviction.
+
+    Args:
+        root: Cache folder
+        max_size: Maximum size of all cached files in bytes
+    """
+
+    def __init__(self, root, max_size=DEFAULT_MAX_SIZE):
+        self.root = root
+        self.max_size = max_size
+        self.objects = os.path.join(root, OBJECTS_FOLDER)
+        self._index_path = os.path.join(root, INDEX_NAME)
+        self._lock_path = os.path.join(root, LOCK_NAME)
+        self._index = self._read_index()
+        self._removed = set()
+        self.hits = self.misses = 0
+
+    def _read_index(self):
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextlib.contextmanager
+    def locked(self, timeout=LOCK_TIMEOUT):
+        """Hold the lock file of the cache.
+
+        Raises:
+            OSError: The lock can not be created or was not released in time
+        """
+        os.makedirs(self.root, exist_ok=True)
+        deadline = time.time() + timeout
+        while True:
+            try:
+                fd = os.open(self._lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self._lock_path) > STALE_LOCK:
+                        os.remove(self._lock_path)
+                        continue
+                except OSError:
+                    continue # Released meanwhile
+                if time.time() > deadline:
+                    raise OSError("Dependency cache is locked: {}".format(self._lock_path))
+                time.sleep(0.05)
+        try:
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            yield
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(self._lock_path)
+
+    def save(self):
+        """Merge the index with the entries written by other processes and write it (atomic)"""
+        with self.locked():
+            index = self._read_index()
+            index.update(self._index)
+            index = {k: d for k, d in index.items() if d not in self._removed}
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp, self._index_path)
+        self._index = index
+
+    def object_path(self, digest, extension=""):
+        return os.path.join(self.objects, digest[:2], digest + extension)
+
+    def fetch(self, path):
+        """Local copy of a file, copied into the cache if unknown or changed.
+
+        Returns:
+            Path of the cached file
+
+        Raises:
+            OSError: The file can not be read or the cache not written
+        """
+        stat = os.stat(path)
+        key = _source_key(path, stat)
+        extension = os.path.splitext(path)[1].lower()
+        digest = self._index.get(key)
+        if digest:
+            cached = self.object_path(digest, extension)
+            if os.path.isfile(cached):
+                os.utime(cached) # Mark as recently used
+                self.hits += 1
+                return cached
+
+        """ Hash while copying, the file is only read once """
+        self.misses += 1
+        os.makedirs(self.objects, exist_ok=True)
+        hasher = hashlib.blake2b(digest_size=20)
+        fd, tmp = tempfile.mkstemp(dir=self.objects, suffix=".part")
+        try:
+            with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+                    dst.write(chunk)
+            digest = hasher.hexdigest()
+            cached = self.object_path(digest, extension)
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            if os.path.isfile(cached):
+                os.remove(tmp) # Same content from another path
+                os.utime(cached)
+            else:
+                os.replace(tmp, cached)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._index[key] = digest
+        return cached
+
+    def fetch_all(self, paths, workers=4):
+        """Fetch files in parallel.
+
+        Returns:
+            Tuple ({path: cached path}, {path: error message})
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        paths = sorted(set(paths))
+        cached, errors = {}, {}
+
+        def fetch(path):
+            try:
+                return self.fetch(path), None
+            except OSError as e:
+                return None, e.strerror or str(e)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for path, (local, error) in zip(paths, pool.map(fetch, paths)):
+                if error:
+                    errors[path] = error
+                else:
+                    cached[path] = local
+        return cached, errors
+
+    def size(self):
+        """Size of all cached files in bytes"""
+        return sum(size for _, size, _ in self._objects())
+
+    def _objects(self):
+        for folder, dirs, files in os.walk(self.objects):
+            for name in files:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def evict(self, keep=(), since=None):
+        """Delete the least recently used files until the cache fits its size.
+
+        Args:
+            keep: Cached paths which are in use and must not be deleted
+            since: Timestamp, files used afterwards may be in use by other
+                processes and are not deleted
+
+        Returns:
+            Number of bytes freed
+
+        Raises:
+            OSError: The lock of the cache can not be acquired
+        """
+        keep, freed, removed = set(keep), 0, set()
+        with self.locked():
+            objects = sorted(self._objects(), key=lambda o: o[2])
+            total = sum(size for _, size, _ in objects)
+            for path, size, used in objects:
+                if total - freed <= self.max_size:
+                    break
+                if path in keep or (since is not None and used >= since):
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                freed += size
+                removed.add(os.path.splitext(os.path.basename(path))[0])
+        if removed:
+            self._removed.update(removed)
+            self._index = {k: d for k, d in self._index.items() if d not in removed}
+        return freed
+
+    def clear(self):
+        """Delete all cached files"""
+        shutil.rmtree(self.root, ignore_errors=True)
+        self._index = {}
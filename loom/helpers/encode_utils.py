@@ -0,0 +1,190 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Encoding utilities.
+
+Provides the ffmpeg encode presets and functions to assemble ffmpeg
+arguments, including a single pass encode into several deliverables.
+Does not depend on bpy.
+"""
+
+import os
+
+
+# Codec identifier, display name
+CODECS = (
+    ('PRORES422', "Apple ProRes 422"),
+    ('PRORES422HQ', "Apple ProRes 422 HQ"),
+    ('PRORES422LT', "Apple ProRes 422 LT"),
+    ('PRORES422PR', "Apple ProRes 422 Proxy"),
+    ('PRORES4444', "Apple ProRes 4444"),
+    ('PRORES4444XQ', "Apple ProRes 4444 XQ"),
+    ('DNXHD422-08-036', "Avid DNxHD 422 8-bit 36Mbit"),
+    ('DNXHD422-08-145', "Avid DNxHD 422 8-bit 145Mbit"),
+    ('DNXHD422-08-220', "Avid DNxHD 422 8-bit 220Mbit"),
+    ('DNXHD422-10-185', "Avid DNxHD 422 10-bit 185Mbit"),
+    ('DNXHR-444', "Avid DNxHR 444 10bit"),
+    ('DNXHR-HQX', "Avid DNxHR HQX 10bit"),
+    ('DNXHR-HQ', "Avid DNxHR HQ 8bit"),
+    ('DNXHR-SQ', "Avid DNxHR SQ 8bit"),
+    ('H264', "H.264 Review"),
+)
+
+# Enum items of the deliverables selection (identifier, name, description, flag)
+DELIVERABLE_ITEMS = tuple(
+    (codec, name, "", 1 << i) for i, (codec, name) in enumerate(CODECS))
+
+# https://avpres.net/FFmpeg/sq_ProRes.html, https://trac.ffmpeg.org/wiki/Encode/VFX
+ENCODE_PRESETS = {
+    "PRORES422PR" : ["-c:v", "prores_ks", "-profile:v", 0],
+    "PRORES422LT" : ["-c:v", "prores_ks", "-profile:v", 1],
+    "PRORES422" : ["-c:v", "prores_ks", "-profile:v", 2],
+    "PRORES422HQ" : ["-c:v", "prores_ks", "-profile:v", 3],
+    "PRORES4444" : ["-c:v", "prores_ks", "-profile:v", 4, "-quant_mat", "hq", "-pix_fmt", "yuva444p10le"],
+    "PRORES4444XQ" : ["-c:v", "prores_ks", "-profile:v", 5, "-quant_mat", "hq", "-pix_fmt", "yuva444p10le"],
+    "DNXHD422-08-036" : ["-c:v", "dnxhd", "-vf", "scale=1920x1080,fps=25/1,format=yuv422p", "-b:v", "36M"],
+    "DNXHD422-08-145" : ["-c:v", "dnxhd", "-vf", "scale=1920x1080,fps=25/1,format=yuv422p", "-b:v", "145M"],
+    "DNXHD422-08-220" : ["-c:v", "dnxhd", "-vf", "scale=1920x1080,fps=25/1,format=yuv422p", "-b:v", "220M"],
+    "DNXHD422-10-185" : ["-c:v", "dnxhd", "-vf", "scale=1920x1080,fps=25/1,format=yuv422p10", "-b:v", "185M"],
+    "DNXHR-444" : ["-c:v", "dnxhd", "-profile:v", "dnxhr_444", "-vf", "format=yuv444p10"],
+    "DNXHR-HQX" : ["-c:v", "dnxhd", "-profile:v", "dnxhr_hqx", "-vf", "format=yuv422p10"],
+    "DNXHR-HQ" : ["-c:v", "dnxhd", "-profile:v", "dnxhr_hq", "-vf", "format=yuv422p"],
+    "DNXHR-SQ" : ["-c:v", "dnxhd", "-profile:v", "dnxhr_sq", "-vf", "format=yuv422p"],
+    "H264" : ["-c:v", "libx264", "-preset", "medium", "-crf", 18, "-vf", "format=yuv420p"],
+    }
+
+
+def preset_encoder(codec):
+    """Name of the ffmpeg encoder used by a preset (e.g. prores_ks)"""
+    args = ENCODE_PRESETS[codec]
+    return str(args[args.index("-c:v") + 1])
+
+
+def split_preset(codec):
+    """Split the preset arguments into the video filter and all other arguments.
+
+    Args:
+        codec: Key of ENCODE_PRESETS
+
+    Returns:
+        Tuple (filter string or None, list of remaining arguments)
+    """
+    args = list(ENCODE_PRESETS[codec])
+    if "-vf" not in args:
+        return None, args
+    idx = args.index("-vf")
+    vf = args[idx + 1]
+    del args[idx:idx + 2]
+    return vf, args
+
+
+def deliverable_path(movie_path, codec):
+    """Movie path of an additional deliverable (/out/shot.mov -> /out/shot_PRORES4444.mov)"""
+    path_noext, ext = os.path.splitext(movie_path)
+    return "{}_{}{}".format(path_noext, codec, ext or ".mov")
+
+
+def encode_args(input_args, outputs, fps=None, threads=None):
+    """Assemble ffmpeg arguments encoding one input into several outputs.
+
+    The input is decoded once. With more than one output, the decoded
+    frames are split by a filter graph and each branch gets the video
+    filter of its preset before being encoded.
+
+    Args:
+        input_args: Input arguments, e.g. ["-start_number", 1, "-i", "shot_%04d.exr"]
+        outputs: List of (codec, movie path) tuples
+        fps: Output frame rate, preset default if None
+        threads: Encoder threads per output, ffmpeg decides if None
+
+    Returns:
+        List of ffmpeg arguments (without the binary)
+    """
+    rate = ["-r", fps] if fps else []
+    rate += ["-threads", threads] if threads else []
+    if len(outputs) == 1:
+        codec, path = outputs[0]
+        return list(input_args) + list(ENCODE_PRESETS[codec]) + rate + [path]
+
+    branches, mapped = [], []
+    for i, (codec, path) in enumerate(outputs):
+        vf, args = split_preset(codec)
+        branches.append("[s{i}]{vf}[v{i}]".format(i=i, vf=vf or "null"))
+        mapped += ["-map", "[v{}]".format(i)] + args + rate + [path]
+
+    graph = "[0:v]split={n}{labels};{branches}".format(
+        n=len(outputs),
+        labels="".join("[s{}]".format(i) for i in range(len(outputs))),
+        branches=";".join(branches))
+    graph_threads = ["-filter_complex_threads", threads] if threads else []
+    return list(input_args) + graph_threads + ["-filter_complex", graph] + mapped
+
+
+def sequence_movie_path(first_frame, extension=".mov"):
+    """Movie path next to an image sequence, named like the encode dialog does.
+
+    The movie is named after the first frame (after the folder if the frame
+    name is only a number), a time stamp is added if the file exists.
+    """
+    from time import strftime
+    basedir, filename = os.path.split(first_frame)
+    name = os.path.splitext(filename)[0]
+    if name.isdigit():
+        name = os.path.basename(basedir)
+    if os.path.isfile(os.path.join(basedir, name + extension)):
+        name = "{}_{}".format(name, strftime("%Y-%m-%d-%H-%M-%S"))
+    return os.path.join(basedir, name + extension)
+
+
+def sequence_encode_args(frames, sequence_path, codec, colorspace, fps=None, deliverables=(), movie_path=None,
+        threads=None):
+    """Assemble the ffmpeg arguments to encode a complete image sequence.
+
+    Args:
+        frames: Dictionary {frame number: file path} of the sequence
+        sequence_path: Hash path of the sequence (/render/shot_####.exr)
+        codec: Preset of the main movie
+        colorspace: Transfer characteristics of the input (-apply_trc)
+        fps: Output frame rate, preset default if None
+        deliverables: Additional presets encoded from the same decode pass
+        movie_path: Path of the main movie (derived from the first frame if None)
+        threads: Encoder threads per output, ffmpeg decides if None
+
+    Returns:
+        Tuple (ffmpeg arguments without the binary, list of (codec, movie path))
+
+    Raises:
+        ValueError: No frames or missing frames within the sequence
+    """
+    numbers = sorted(frames)
+    if not numbers:
+        raise ValueError("No frames of {}".format(sequence_path))
+    missing = sorted(set(range(numbers[0], numbers[-1] + 1)).difference(numbers))
+    if missing:
+        raise ValueError("Missing frames in {}: {}".format(sequence_path, ",".join(map(str, missing))))
+
+    basedir, filename = os.path.split(sequence_path)
+    hashes = filename.count("#")
+    pattern = os.path.join(basedir, filename.replace("#" * hashes, "%0{}d".format(hashes)))
+    input_args = ["-start_number", numbers[0], "-apply_trc", colorspace, "-i", pattern]
+
+    movie_path = movie_path or sequence_movie_path(frames[numbers[0]])
+    outputs = [(codec, movie_path)] + [(c, deliverable_path(movie_path, c)) \
+        for c, *_ in DELIVERABLE_ITEMS if c in deliverables and c != codec]
+    return encode_args(input_args, outputs, fps=fps, threads=threads), outputs
@@ -23,7 +23,6 @@ Provides functions for parsing and filtering frame ranges from user input.
 """
 
 import re
-from numpy import arange, around, isclose
 
 
 def filter_frames(frame_input, increment=1, filter_individual=False):
@@ -37,6 +36,9 @@ def filter_frames(frame_input, increment=1, filter_individual=False):
     Returns:
         List of frame numbers (integers or floats), or None if invalid input
     """
+    # NumPy is only loaded on first use to keep addon registration lightweight
+    from numpy import arange, around, isclose
+
     def float_filter(st):
         try:
             return float(st)
@@ -146,3 +148,59 @@ def filter_frames(frame_input, increment=1, filter_individual=False):
     """ Return integers whenever possible """
     int_frames = [int_filter(frame) for frame in float_frames]
     return float_frames if None in int_frames else int_frames
+
+
+# Decimals of sub-frames taken into account, same as the rounding of filter_frames
+SUBFRAME_PRECISION = 5
+
+
+def split_subframes(frames, precision=SUBFRAME_PRECISION):
+    """Split float frames into main frames and integer sub-frames.
+
+    Args:
+        frames: Iterable of float frame numbers, e.g. [1.0, 1.25, 1.5]
+        precision: Number of decimals taken into account
+
+    Returns:
+        Tuple (list of (main frame, sub-frame) tuples, decimals). The sub-frame
+        is an integer in units of 10**-decimals and decimals is the smallest
+        number of digits representing all sub-frames, e.g. ([(1, 0), (1, 25), (1, 50)], 2)
+    """
+    scale = 10 ** precision
+    scaled = [round(f * scale) for f in frames]
+
+    """ Strip trailing zeros to find the number of decimals """
+    decimals = 1
+    for value in scaled:
+        sub, digits = value % scale, precision
+        if not sub:
+            continue
+        while sub % 10 == 0:
+            sub //= 10
+            digits -= 1
+        decimals = max(decimals, digits)
+
+    unit = 10 ** (precision - decimals)
+    return [(value // scale, value % scale // unit) for value in scaled], decimals
+
+
+def rangify_frames(frames):
+    """Convert sorted unique integer frames to a range string.
+
+    Args:
+        frames: Sorted sequence or NumPy array of unique integers, e.g. [1, 2, 3, 5]
+
+    Returns:
+        Range string (e.g., "1-3,5")
+    """
+    from numpy import asarray, diff, flatnonzero
+
+    frames = asarray(frames)
+    if not frames.size:
+        return ""
+
+    breaks = flatnonzero(diff(frames) != 1) + 1
+    starts = frames[[0, *breaks]].tolist()
+    ends = frames[[*(breaks - 1), frames.size - 1]].tolist()
+    return ",".join(
+        str(s) if s == e else "{}-{}".format(s, e) for s, e in zip(starts, ends))
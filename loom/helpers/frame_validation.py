@@ -0,0 +1,107 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Rendered frame validation.
+
+Detects missing, empty (placeholder) and truncated frames by reading the
+file header and, where the format has one, the trailer. Only a few bytes
+of every file are read. Does not depend on bpy.
+"""
+
+import os
+import struct
+
+
+# Extension: possible file signatures
+SIGNATURES = {
+    "exr": (b"\x76\x2f\x31\x01",),
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "jpg": (b"\xff\xd8\xff",),
+    "jpeg": (b"\xff\xd8\xff",),
+    "tif": (b"II*\x00", b"MM\x00*"),
+    "tiff": (b"II*\x00", b"MM\x00*"),
+    "bmp": (b"BM",),
+    "hdr": (b"#?RADIANCE", b"#?RGBE"),
+    "dpx": (b"SDPX", b"XPDS"),
+    "cin": (b"\x80\x2a\x5f\xd7", b"\xd7\x5f\x2a\x80"),
+    "jp2": (b"\x00\x00\x00\x0cjP  \r\n\x87\n", b"\xff\x4f\xff\x51"),
+    "webp": (b"RIFF",),
+}
+
+# Extension: bytes every complete file ends with
+TRAILERS = {
+    "png": b"IEND\xaeB`\x82",
+    "jpg": b"\xff\xd9",
+    "jpeg": b"\xff\xd9",
+}
+
+
+def validate_frame(filepath):
+    """Check whether a rendered frame is complete.
+
+    Args:
+        filepath: Path of the image file
+
+    Returns:
+        None if the frame is valid, otherwise the reason as string
+    """
+    try:
+        size = os.path.getsize(filepath)
+    except OSError:
+        return "missing"
+    if size == 0:
+        return "empty"
+
+    ext = os.path.splitext(filepath)[1].lstrip(".").lower()
+    signatures = SIGNATURES.get(ext)
+    trailer = TRAILERS.get(ext)
+    try:
+        with open(filepath, "rb") as f:
+            head = f.read(16)
+            if trailer and size >= len(trailer):
+                f.seek(-len(trailer), os.SEEK_END)
+                tail = f.read(len(trailer))
+    except OSError as e:
+        return "unreadable ({})".format(e.strerror)
+
+    if signatures and not any(head.startswith(s) for s in signatures):
+        return "invalid header"
+    if trailer and tail != trailer:
+        return "truncated"
+    if ext == "webp" and (head[8:12] != b"WEBP" or struct.unpack("<I", head[4:8])[0] + 8 != size):
+        return "truncated"
+    if ext == "bmp" and len(head) >= 6 and struct.unpack("<I", head[2:6])[0] > size:
+        return "truncated"
+    return None
+
+
+def verify_frames(frames, workers=8):
+    """Validate the frames of a sequence in parallel.
+
+    Args:
+        frames: Dictionary {frame: file path}
+        workers: Number of threads reading the files
+
+    Returns:
+        Dictionary {frame: reason} of all invalid frames
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(validate_frame, frames.values())
+        return {f: r for f, r in zip(frames, results) if r}
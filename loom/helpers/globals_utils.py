@@ -69,6 +69,71 @@ def replace_globals(s, addon_name, debug=False):
     return s
 
 
+def global_keys(addon_name):
+    """Get all global variables with a valid key and an expression.
+
+    Args:
+        addon_name: Name of the addon (for accessing preferences)
+
+    Returns:
+        Dictionary {key: expression}
+    """
+    vars = bpy.context.preferences.addons[addon_name].preferences.global_variable_coll
+    return {key: val.expr for key, val in vars.items() \
+        if key.startswith("$") and not key.isspace() and val.expr and not val.expr.isspace()}
+
+
+def evaluate_globals(expressions):
+    """Evaluate global variables once, same results as replace_globals.
+
+    Args:
+        expressions: Dictionary {key: expression} returned by global_keys
+
+    Returns:
+        Dictionary {key: replacement string}
+    """
+    values = {}
+    for key, expr in expressions.items():
+        try:
+            values[key] = str(eval(expr))
+        except:
+            values[key] = "NO-{}".format(key.replace("$", ""))
+    return values
+
+
+class PathTemplate:
+    """Path compiled into literal parts and global variable slots.
+
+    Compiling once avoids searching the path for every variable on each
+    frame, formatting only joins the parts with the evaluated values.
+    """
+    __slots__ = ("parts", "keys", "static")
+
+    def __init__(self, s, keys):
+        parts = [(False, s)]
+        for key in sorted(keys, key=len, reverse=True):
+            split_parts = []
+            for is_key, text in parts:
+                if is_key or key not in text:
+                    split_parts.append((is_key, text))
+                    continue
+                for i, literal in enumerate(text.split(key)):
+                    if i:
+                        split_parts.append((True, key))
+                    if literal:
+                        split_parts.append((False, literal))
+            parts = split_parts
+        self.parts = tuple(parts)
+        self.keys = frozenset(text for is_key, text in parts if is_key)
+        self.static = None if self.keys else s
+
+    def format(self, values):
+        """Assemble the path from the values returned by evaluate_globals"""
+        if self.static is not None:
+            return self.static
+        return "".join(values[text] if is_key else text for is_key, text in self.parts)
+
+
 def user_globals(context, addon_name):
     """Determine whether globals are used in the scene.
 
@@ -0,0 +1,141 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Job spec files for headless renders.
+
+Instead of passing the frame input and all options as --python-expr on the
+command line, a job is written to a small json file which
+scripts/loom_job.py executes, so thousands of scattered frames do not hit
+the command line limit. Frames are stored as inclusive intervals
+[[1, 100], [105, 105]], the compact form of the parsed input. Chunks and
+retries are cut from the intervals without parsing the original input,
+each variant is passed to render.image_sequence as a frame input with
+explicit step ("1-100x1,105") and parsed once more there.
+
+    {"version": 1, "verify": true, "max_retries": 2, "render_preset": "",
+     "localize": false, "save": false,
+     "variants": [{"scene": "", "camera": "", "intervals": [[1, 100]],
+                   "output": "", "result_file": "/tmp/loom-result.json"}]}
+
+A variant holds "frames" (the raw input, parsed with the frame step of the
+scene) instead of "intervals" if the input contains sub-frames or ranges
+without explicit step.
+"""
+
+import json
+import os
+import tempfile
+
+
+SPEC_VERSION = 1
+
+
+def frame_intervals(frames):
+    """Inclusive intervals of integer frames, e.g. [1, 2, 3, 5] -> [[1, 3], [5, 5]]"""
+    intervals = []
+    for frame in sorted(set(int(f) for f in frames)):
+        if intervals and frame == intervals[-1][1] + 1:
+            intervals[-1][1] = frame
+        else:
+            intervals.append([frame, frame])
+    return intervals
+
+
+def expand_intervals(intervals):
+    """All frames of the intervals"""
+    return [f for start, end in intervals for f in range(start, end + 1)]
+
+
+def interval_input(intervals):
+    """Frame input of the intervals with explicit step ("1-100x1,105"), independent of the scene"""
+    return ",".join(
+        str(start) if start == end else "{}-{}x1".format(start, end) for start, end in intervals)
+
+
+def variant_input(variant):
+    """Frame input of a variant for render.image_sequence"""
+    if "intervals" in variant:
+        return interval_input(variant["intervals"])
+    return variant.get("frames", "")
+
+
+def subset_variant(variant, frames):
+    """Copy of a variant rendering only the given frames, e.g. a chunk or a retry"""
+    subset = {k: v for k, v in variant.items() if k not in ("frames", "intervals")}
+    subset["intervals"] = frame_intervals(frames)
+    return subset
+
+
+def chunk_variant(variant, chunks):
+    """Split the frames of a variant into consecutive chunks of nearly equal size.
+
+    Returns:
+        List of variants, only the variant itself if it holds raw frame input
+    """
+    if "intervals" not in variant:
+        return [variant]
+    frames = expand_intervals(variant["intervals"])
+    size, extra = divmod(len(frames), max(1, chunks))
+    parts, start = [], 0
+    for i in range(max(1, chunks)):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            parts.append(subset_variant(variant, frames[start:end]))
+        start = end
+    return parts
+
+
+def write_spec(path, variants, **options):
+    """Write a job spec, replaces an existing file atomically.
+
+    Args:
+        path: Path of the json file
+        variants: List of variant dictionaries
+        **options: verify, max_retries, render_preset, localize, save
+
+    Returns:
+        The path
+    """
+    spec = dict(options, version=SPEC_VERSION, variants=list(variants))
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(spec, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path
+
+
+def read_spec(path):
+    """Read a job spec.
+
+    Returns:
+        Dictionary, a plain list of variants is accepted as well
+
+    Raises:
+        OSError: The file can not be read
+        ValueError: Invalid json or unsupported version
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        return {"version": SPEC_VERSION, "variants": spec}
+    if spec.get("version", SPEC_VERSION) > SPEC_VERSION:
+        raise ValueError("Job spec version {} is not supported".format(spec["version"]))
+    spec.setdefault("variants", [])
+    return spec
@@ -0,0 +1,80 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Keyframe collection utilities.
+
+Provides vectorized helpers to gather keyframe positions from F-Curves.
+Keyframe points are read in bulk via foreach_get instead of iterating
+over every single point in Python. NumPy is imported on first use.
+"""
+
+from .blender_compat import get_action_fcurves
+
+
+def fcurve_frames(fcurve, selected_only=False):
+    """Get the frame positions of all keyframe points of an F-Curve.
+
+    Args:
+        fcurve: The F-Curve to read the keyframe points from
+        selected_only: Only consider selected control points
+
+    Returns:
+        NumPy array of frame positions (unsorted, may contain duplicates)
+    """
+    import numpy as np
+
+    points = fcurve.keyframe_points
+    count = len(points)
+    if not count:
+        return np.empty(0, dtype=np.float32)
+
+    co = np.empty(count * 2, dtype=np.float32)
+    points.foreach_get("co", co)
+    frames = co[0::2]
+
+    if selected_only:
+        selection = np.empty(count, dtype=bool)
+        points.foreach_get("select_control_point", selection)
+        frames = frames[selection]
+    return frames
+
+
+def action_frames(actions, selected_only=False, selected_channels=False):
+    """Collect the unique frame positions of all keyframes in the given actions.
+
+    Args:
+        actions: Iterable of actions
+        selected_only: Only consider selected control points
+        selected_channels: Only consider selected F-Curves (channels)
+
+    Returns:
+        Sorted NumPy array of unique frame positions
+    """
+    import numpy as np
+
+    chunks = []
+    for action in actions:
+        for fcurve in get_action_fcurves(action):
+            if selected_channels and not fcurve.select:
+                continue
+            chunks.append(fcurve_frames(fcurve, selected_only))
+
+    if not chunks:
+        return np.empty(0, dtype=np.float32)
+    return np.unique(np.concatenate(chunks))
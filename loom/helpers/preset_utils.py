@@ -0,0 +1,132 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Render preset utilities.
+
+Render presets are python scripts written by AddPresetBase, one assignment
+per line ("render.engine = 'CYCLES'"). Instead of executing the script for
+every render, it is parsed once into a table of attribute paths and values
+(cached by modification time). The caller only applies values which differ
+from the scene and restores them afterwards.
+"""
+
+import ast
+import os
+from collections import namedtuple
+
+
+PRESET_ROOTS = ("bpy", "context", "scene", "render")
+
+IDReference = namedtuple("IDReference", ("collection", "name"))
+IDReference.__doc__ = "Data-block assigned by a preset, e.g. bpy.data.objects['Camera']"
+
+_cache = {}
+
+
+def _attribute_path(node):
+    """Names of an attribute chain (scene.cycles.samples -> ['scene', 'cycles', 'samples'])"""
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    names.append(node.id)
+    return names[::-1]
+
+
+def _value(node):
+    """Literal value or data-block reference, raises ValueError for anything else"""
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        pass
+    if isinstance(node, ast.Subscript):
+        owner = _attribute_path(node.value)
+        if owner and len(owner) == 3 and owner[:2] == ["bpy", "data"]:
+            key = node.slice
+            if isinstance(key, getattr(ast, "Index", ())): # Python < 3.9
+                key = key.value
+            name = ast.literal_eval(key)
+            if isinstance(name, str):
+                return IDReference(owner[2], name)
+    raise ValueError("Unsupported value: {}".format(ast.dump(node)))
+
+
+def parse_preset(source):
+    """Parse the code of a render preset.
+
+    Returns:
+        List of (root, attribute names, value) in the order of the preset,
+        None if the preset contains anything but imports, the root
+        definitions and plain assignments
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    table = []
+    for statement in tree.body:
+        if isinstance(statement, (ast.Import, ast.ImportFrom)):
+            continue
+        if not isinstance(statement, ast.Assign) or len(statement.targets) != 1:
+            return None
+        target = statement.targets[0]
+        if isinstance(target, ast.Name) and target.id in PRESET_ROOTS:
+            continue # context = bpy.context etc.
+        path = _attribute_path(target)
+        if not path or len(path) < 2 or path[0] not in PRESET_ROOTS:
+            return None
+        try:
+            value = _value(statement.value)
+        except ValueError:
+            return None
+        table.append((path[0], tuple(path[1:]), value))
+    return table
+
+
+def preset_table(filepath):
+    """Parsed preset file, parsed again only if the file changed.
+
+    Returns:
+        See parse_preset, None if the file can not be read or parsed
+
+    Raises:
+        OSError: The file does not exist
+    """
+    stat = os.stat(filepath)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(filepath)
+    if cached and cached[0] == key:
+        return cached[1]
+    with open(filepath, encoding="utf-8") as f:
+        table = parse_preset(f.read())
+    _cache[filepath] = (key, table)
+    return table
+
+
+def values_equal(current, value):
+    """Compare a property value with a preset value (arrays as tuples)"""
+    if isinstance(value, (tuple, list)):
+        try:
+            return tuple(current) == tuple(value)
+        except TypeError:
+            return False
+    return current == value
@@ -0,0 +1,236 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Opt-in timing of operators and hot helper functions.
+
+Nothing is measured unless instrument() replaced a function with a timed
+wrapper, so the addon runs unchanged while profiling is off. Each label
+keeps a histogram of its call durations (logarithmic buckets from 10 µs
+to about 80 s), top() returns the labels with the highest total time.
+If a stats folder is set, the outermost timed call is also run through
+cProfile and written as .pstats file if it took longer than min_dump.
+
+LOOM_PROFILE enables profiling for headless renders: "1" measures only,
+any other value is used as stats folder. A summary is printed at exit.
+"""
+
+import cProfile
+import os
+import re
+import threading
+import time
+from functools import wraps
+
+
+ENV_VAR = "LOOM_PROFILE"
+BUCKET_BASE = 1e-5          # Upper bound of the first bucket in seconds
+BUCKET_COUNT = 24           # Each bucket doubles, the last one is open
+CALLBACKS = ("execute", "invoke", "modal")
+
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}                 # label: Histogram
+_patched = []               # (owner, attr, original)
+_settings = {"stats_dir": "", "min_dump": 0.05}
+_dump_count = 0
+
+
+class Histogram:
+    """Durations of the calls of a label"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * BUCKET_COUNT
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        index = 0
+        bound = BUCKET_BASE
+        while seconds > bound and index < BUCKET_COUNT - 1:
+            bound *= 2
+            index += 1
+        self.buckets[index] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, share):
+        """Upper bound of the bucket holding the given share of all calls (0-1)"""
+        if not self.count:
+            return 0.0
+        threshold = share * self.count
+        seen = 0
+        for index, amount in enumerate(self.buckets):
+            seen += amount
+            if seen >= threshold:
+                return min(BUCKET_BASE * 2 ** index, self.max)
+        return self.max
+
+
+def record(label, seconds):
+    """Add a duration to the histogram of a label"""
+    with _lock:
+        histogram = _stats.get(label)
+        if histogram is None:
+            histogram = _stats[label] = Histogram()
+        histogram.add(seconds)
+
+
+def reset():
+    """Remove all measurements"""
+    with _lock:
+        _stats.clear()
+
+
+def top(count=10):
+    """Labels with the highest total time.
+
+    Returns:
+        List of (label, Histogram) in descending order
+    """
+    with _lock:
+        items = list(_stats.items())
+    items.sort(key=lambda item: item[1].total, reverse=True)
+    return items[:count]
+
+
+def report(count=20):
+    """Lines of a plain text summary"""
+    lines = ["{:<48}{:>8}{:>11}{:>11}{:>11}{:>11}".format(
+        "Label", "Calls", "Total ms", "Mean ms", "p95 ms", "Max ms")]
+    for label, h in top(count):
+        lines.append("{:<48}{:>8}{:>11.1f}{:>11.2f}{:>11.2f}{:>11.2f}".format(
+            label[:47], h.count, h.total * 1000, h.mean * 1000, h.percentile(0.95) * 1000, h.max * 1000))
+    return lines
+
+
+def _dump(label, profile, seconds):
+    global _dump_count
+    folder = _settings["stats_dir"]
+    with _lock:
+        _dump_count += 1
+        number = _dump_count
+    name = "{}-{}-{:04d}.pstats".format(
+        re.sub(r"[^\w.-]", "_", label), time.strftime("%Y%m%d-%H%M%S"), number)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        profile.dump_stats(os.path.join(folder, name))
+    except OSError as e:
+        print("Loom: Can not write profile of {} ({:.3f}s): {}".format(label, seconds, e))
+
+
+def _call(label, func, *args, **kwargs):
+    """Run a function, measure it and profile it if it is the outermost call"""
+    profile = None
+    depth = getattr(_local, "depth", 0)
+    if _settings["stats_dir"] and not depth:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError: # Another profiler is active
+            profile = None
+    _local.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        _local.depth = depth
+        record(label, seconds)
+        if profile is not None:
+            profile.disable()
+            if seconds >= _settings["min_dump"]:
+                _dump(label, profile, seconds)
+
+
+def timed(func, label):
+    """Timed wrapper of a function.
+
+    Operator callbacks keep their number of arguments, Blender checks it
+    when the class is registered.
+    """
+    argcount = func.__code__.co_argcount if hasattr(func, "__code__") else -1
+    if func.__name__ in CALLBACKS and argcount == 2:
+        @wraps(func)
+        def wrapper(self, context):
+            return _call(label, func, self, context)
+    elif func.__name__ in CALLBACKS and argcount == 3:
+        @wraps(func)
+        def wrapper(self, context, event):
+            return _call(label, func, self, context, event)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return _call(label, func, *args, **kwargs)
+    wrapper.__loom_timed__ = func
+    return wrapper
+
+
+def instrument(owner, attr, label):
+    """Replace a function of a class or module by its timed wrapper.
+
+    Returns:
+        True if replaced, False if the attribute is missing or already timed
+    """
+    func = vars(owner).get(attr) # Only own functions, no inherited methods
+    if not callable(func) or hasattr(func, "__loom_timed__"):
+        return False
+    setattr(owner, attr, timed(func, label))
+    with _lock:
+        _patched.append((owner, attr, func))
+    return True
+
+
+def restore():
+    """Put all original functions back"""
+    with _lock:
+        patched = _patched[::-1]
+        _patched.clear()
+    for owner, attr, func in patched:
+        setattr(owner, attr, func)
+
+
+def active():
+    """True while functions are instrumented"""
+    return bool(_patched)
+
+
+def configure(stats_dir="", min_dump=0.05):
+    """Folder for cProfile dumps ('' to only measure) and minimum duration of a dumped call"""
+    _settings["stats_dir"] = stats_dir
+    _settings["min_dump"] = min_dump
+
+
+def env_settings():
+    """Profiling requested by LOOM_PROFILE.
+
+    Returns:
+        None if not set, else the stats folder ('' to only measure)
+    """
+    value = os.environ.get(ENV_VAR, "").strip()
+    if value.lower() in ("", "0", "false", "off", "no"):
+        return None
+    return "" if value.lower() in ("1", "true", "on", "yes") else value
@@ -0,0 +1,143 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Proxy sequence utilities.
+
+Proxies are downscaled JPEG or WebP copies of an image sequence, stored in
+a sidecar folder next to the sequence (<folder>/loom_proxies/<scale>/).
+The frames are converted by ffmpeg, one process per chunk of frames.
+"""
+
+import os
+
+from .sequence_utils import scan_sequence, split_sequence_path
+
+
+PROXY_FOLDER = "loom_proxies"
+
+# Scale factor: folder name, ordered by preference for playback
+PROXY_SCALES = {2: "half", 4: "quarter"}
+
+PROXY_FORMATS = {
+    "JPEG": ("jpg", ["-q:v", "3"]),
+    "WEBP": ("webp", ["-c:v", "libwebp", "-quality", "80"]),
+}
+
+# Formats storing linear data, converted to sRGB for display
+LINEAR_EXTENSIONS = ("exr", "hdr")
+
+
+def proxy_directory(basedir, scale):
+    """Folder of the proxies of a sequence for the given scale factor"""
+    return os.path.join(basedir, PROXY_FOLDER, PROXY_SCALES[scale])
+
+
+def find_proxies(frames):
+    """Find a complete proxy sequence for the given frames.
+
+    Args:
+        frames: Dictionary {frame number: file path} of the full resolution sequence
+
+    Returns:
+        Tuple (proxy frames dictionary, proxy format) or (None, None) if
+        there is no proxy sequence containing all of the given frames
+    """
+    if not frames:
+        return None, None
+
+    basedir, name, digits, ext = split_sequence_path(next(iter(frames.values())))
+    for scale in PROXY_SCALES:
+        for file_format, (proxy_ext, _) in PROXY_FORMATS.items():
+            proxies = scan_sequence(proxy_directory(basedir, scale), name, digits, proxy_ext)
+            if proxies and all(f in proxies for f in frames):
+                return proxies, file_format
+    return None, None
+
+
+def frame_chunks(frames, chunk_count):
+    """Split frame numbers into contiguous chunks of similar size.
+
+    Args:
+        frames: Sorted list of frame numbers
+        chunk_count: Number of chunks to aim for
+
+    Returns:
+        List of (start frame, number of frames) tuples
+    """
+    runs, start = [], None
+    for frame in frames:
+        if start is None:
+            start, prev = frame, frame
+        elif frame != prev + 1:
+            runs.append((start, prev - start + 1))
+            start = frame
+        prev = frame
+    if start is not None:
+        runs.append((start, prev - start + 1))
+
+    size = max(1, -(-len(frames) // max(1, chunk_count)))
+    chunks = []
+    for start, length in runs:
+        for offset in range(0, length, size):
+            chunks.append((start + offset, min(size, length - offset)))
+    return chunks
+
+
+def proxy_commands(ffmpeg, frames, scale=2, file_format="JPEG", chunk_count=1, overwrite=False):
+    """Build one ffmpeg command per chunk of frames.
+
+    Args:
+        ffmpeg: Path to the ffmpeg binary
+        frames: Dictionary {frame number: file path} of the sequence
+        scale: Scale factor, one of PROXY_SCALES
+        file_format: Proxy format, one of PROXY_FORMATS
+        chunk_count: Number of chunks to split the sequence into
+        overwrite: Convert frames that already have a proxy
+
+    Returns:
+        Tuple (proxy folder, list of commands)
+    """
+    basedir, name, digits, ext = split_sequence_path(next(iter(frames.values())))
+    proxy_dir = proxy_directory(basedir, scale)
+    proxy_ext, format_args = PROXY_FORMATS[file_format]
+
+    todo = sorted(frames)
+    if not overwrite:
+        existing = scan_sequence(proxy_dir, name, digits, proxy_ext)
+        todo = [f for f in todo if f not in existing]
+
+    seq_in = os.path.join(basedir, "{}%0{}d.{}".format(name, digits, ext))
+    seq_out = os.path.join(proxy_dir, "{}%0{}d.{}".format(name, digits, proxy_ext))
+    trc = ["-apply_trc", "iec61966_2_1"] if ext.lower() in LINEAR_EXTENSIONS else []
+
+    commands = []
+    for start, length in frame_chunks(todo, chunk_count):
+        commands.append(
+            [ffmpeg, "-y", "-v", "error", "-start_number", str(start)] + trc +
+            ["-i", seq_in, "-frames:v", str(length),
+             "-vf", "scale=trunc(iw/{0}/2)*2:trunc(ih/{0}/2)*2".format(scale)] +
+            format_args + ["-start_number", str(start), seq_out])
+    return proxy_dir, commands
+
+
+def run_proxy_command(cmd):
+    """Run a single ffmpeg proxy command, returns the error output on failure"""
+    import subprocess
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return result.stderr.decode(errors="replace") if result.returncode else None
@@ -0,0 +1,377 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Render history utilities.
+
+Stores the render log in a local SQLite database instead of the blend-file.
+Entries are keyed by blend-file, scene, output path and version, so
+rendering the same output again updates the existing entry.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+
+HISTORY_FILENAME = "loom_history.db"
+
+HISTORY_FIELDS = (
+    "blend_file", "scene", "output_path", "version", "name", "folder",
+    "start_frame", "end_frame", "padded_zeros", "image_format", "start_time")
+
+_schema = """
+    CREATE TABLE IF NOT EXISTS renders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        blend_file TEXT NOT NULL,
+        scene TEXT NOT NULL,
+        output_path TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0,
+        name TEXT NOT NULL DEFAULT '',
+        folder TEXT NOT NULL DEFAULT '',
+        start_frame TEXT,
+        end_frame TEXT,
+        padded_zeros INTEGER,
+        image_format TEXT,
+        start_time REAL NOT NULL,
+        UNIQUE (blend_file, scene, output_path, version)
+    );
+    CREATE INDEX IF NOT EXISTS renders_latest
+        ON renders (blend_file, scene, start_time);
+    CREATE INDEX IF NOT EXISTS renders_time
+        ON renders (start_time);
+    CREATE TABLE IF NOT EXISTS frame_times (
+        blend_file TEXT NOT NULL,
+        scene TEXT NOT NULL,
+        output_path TEXT NOT NULL,
+        frame INTEGER NOT NULL,
+        seconds REAL NOT NULL,
+        rendered REAL NOT NULL,
+        UNIQUE (blend_file, scene, output_path, frame)
+    );
+    CREATE TABLE IF NOT EXISTS memory_peaks (
+        blend_file TEXT NOT NULL,
+        scene TEXT NOT NULL,
+        peak_rss INTEGER NOT NULL,
+        recorded REAL NOT NULL,
+        UNIQUE (blend_file, scene)
+    );
+    """
+
+
+def history_path(directory=""):
+    """Get the path to the history database.
+
+    Args:
+        directory: Folder to store the database in, the user config
+            folder of Blender is used if not specified
+
+    Returns:
+        Absolute path to the database file
+    """
+    if not directory:
+        import bpy
+        directory = bpy.utils.user_resource('CONFIG', path="loom", create=True)
+    else:
+        os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, HISTORY_FILENAME)
+
+
+def connect(db_path):
+    """Open the history database and make sure the schema exists.
+
+    Args:
+        db_path: Path to the database file
+
+    Returns:
+        sqlite3.Connection with rows accessible by column name
+    """
+    con = sqlite3.connect(db_path, timeout=10)
+    con.row_factory = sqlite3.Row
+    con.executescript(_schema)
+    return con
+
+
+@contextmanager
+def _database(db_path):
+    """Connection committing on success and closing when done."""
+    con = connect(db_path)
+    try:
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+def log_render(db_path, **record):
+    """Add or update a render entry.
+
+    Args:
+        db_path: Path to the database file
+        **record: Column values, see HISTORY_FIELDS
+
+    Returns:
+        Row id of the entry
+    """
+    record.setdefault("start_time", time.time())
+    record.setdefault("version", 0)
+    columns = [k for k in HISTORY_FIELDS if k in record]
+    with _database(db_path) as con:
+        cursor = con.execute(_upsert_sql(columns), [record[c] for c in columns])
+        return cursor.lastrowid
+
+
+def log_renders(db_path, records):
+    """Add or update many render entries in a single transaction.
+
+    Args:
+        db_path: Path to the database file
+        records: Iterable of dictionaries, see log_render
+
+    Returns:
+        Number of written entries
+    """
+    now = time.time()
+    groups = {}
+    for record in records:
+        record = dict(record)
+        record.setdefault("start_time", now)
+        record.setdefault("version", 0)
+        columns = tuple(k for k in HISTORY_FIELDS if k in record)
+        groups.setdefault(columns, []).append([record[c] for c in columns])
+
+    with _database(db_path) as con:
+        for columns, rows in groups.items():
+            con.executemany(_upsert_sql(columns), rows)
+    return sum(len(rows) for rows in groups.values())
+
+
+def _upsert_sql(columns):
+    key_columns = ("blend_file", "scene", "output_path", "version")
+    return ("INSERT INTO renders ({cols}) VALUES ({vals}) "
+            "ON CONFLICT (blend_file, scene, output_path, version) DO UPDATE SET {upd}").format(
+        cols=", ".join(columns),
+        vals=", ".join("?" * len(columns)),
+        upd=", ".join("{0}=excluded.{0}".format(c) for c in columns if c not in key_columns))
+
+
+def log_frame_times(db_path, blend_file, scene, output_path, times):
+    """Store the render time of frames, previous times of a frame are replaced.
+
+    Args:
+        db_path: Path to the database file
+        blend_file: Path of the blend-file
+        scene: Name of the scene
+        output_path: Output path as set in the scene (before globals)
+        times: Dictionary {frame: seconds}
+
+    Returns:
+        Number of stored frames
+    """
+    now = time.time()
+    rows = [(blend_file, scene, output_path, int(f), float(s), now) for f, s in times.items()]
+    with _database(db_path) as con:
+        con.executemany(
+            "INSERT INTO frame_times (blend_file, scene, output_path, frame, seconds, rendered) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (blend_file, scene, output_path, frame) "
+            "DO UPDATE SET seconds=excluded.seconds, rendered=excluded.rendered", rows)
+    return len(rows)
+
+
+def frame_times(db_path, blend_file, scene=None, output_path=None):
+    """Latest render time of each frame of a blend-file.
+
+    Args:
+        db_path: Path to the database file
+        blend_file: Path of the blend-file
+        scene: Only times of the given scene (all if None)
+        output_path: Only times of the given output path (all if None)
+
+    Returns:
+        Dictionary {frame: seconds}
+    """
+    conditions, values = ["blend_file = ?"], [blend_file]
+    for column, value in (("scene", scene), ("output_path", output_path)):
+        if value is not None:
+            conditions.append("{} = ?".format(column))
+            values.append(value)
+    sql = "SELECT frame, seconds FROM frame_times WHERE {} ORDER BY rendered".format(
+        " AND ".join(conditions))
+
+    if not os.path.isfile(db_path):
+        return {}
+    with _database(db_path) as con:
+        return {row["frame"]: row["seconds"] for row in con.execute(sql, values)}
+
+
+def log_memory_peak(db_path, blend_file, scene, peak_rss):
+    """Store the peak memory of rendering a blend-file, replaces the previous peak.
+
+    Args:
+        db_path: Path to the database file
+        blend_file: Path of the blend-file
+        scene: Name of the scene
+        peak_rss: Peak resident memory of the render process in bytes
+    """
+    with _database(db_path) as con:
+        con.execute(
+            "INSERT INTO memory_peaks (blend_file, scene, peak_rss, recorded) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (blend_file, scene) DO UPDATE SET "
+            "peak_rss=excluded.peak_rss, recorded=excluded.recorded",
+            (blend_file, scene, int(peak_rss), time.time()))
+
+
+def memory_peak(db_path, blend_file, scene=None):
+    """Latest peak memory of a blend-file (and scene).
+
+    Args:
+        db_path: Path to the database file
+        blend_file: Path of the blend-file
+        scene: Name of the scene (highest peak of all scenes if None)
+
+    Returns:
+        Bytes or None if the file was not rendered yet
+    """
+    sql, values = "SELECT MAX(peak_rss) FROM memory_peaks WHERE blend_file = ?", [blend_file]
+    if scene is not None:
+        sql += " AND scene = ?"
+        values.append(scene)
+
+    if not os.path.isfile(db_path):
+        return None
+    with _database(db_path) as con:
+        return con.execute(sql, values).fetchone()[0]
+
+
+def query_renders(db_path, blend_file=None, scene=None, output_path=None, limit=None):
+    """Query render entries, latest first.
+
+    Args:
+        db_path: Path to the database file
+        blend_file: Only entries of the given blend-file (all if None)
+        scene: Only entries of the given scene (all if None)
+        output_path: Only entries of the given output path (all if None)
+        limit: Maximum number of entries
+
+    Returns:
+        List of dictionaries
+    """
+    conditions, values = [], []
+    for column, value in (("blend_file", blend_file), ("scene", scene), ("output_path", output_path)):
+        if value is not None:
+            conditions.append("{} = ?".format(column))
+            values.append(value)
+
+    sql = "SELECT * FROM renders"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY start_time DESC, id DESC"
+    if limit:
+        sql += " LIMIT ?"
+        values.append(int(limit))
+
+    if not os.path.isfile(db_path):
+        return []
+    with _database(db_path) as con:
+        return [dict(row) for row in con.execute(sql, values)]
+
+
+def latest_render(db_path, blend_file, scene=None):
+    """Get the latest render entry of a blend-file (and scene).
+
+    Args:
+        db_path: Path to the database file
+        blend_file: Path of the blend-file
+        scene: Name of the scene (any scene if None)
+
+    Returns:
+        Dictionary or None if there is no entry
+    """
+    entries = query_renders(db_path, blend_file=blend_file, scene=scene, limit=1)
+    return entries[0] if entries else None
+
+
+def clear_renders(db_path, blend_file=None, scene=None):
+    """Remove render entries.
+
+    Args:
+        db_path: Path to the database file
+        blend_file: Only remove entries of the given blend-file (all if None)
+        scene: Only remove entries of the given scene (all if None)
+
+    Returns:
+        Number of removed entries
+    """
+    conditions, values = [], []
+    for column, value in (("blend_file", blend_file), ("scene", scene)):
+        if value is not None:
+            conditions.append("{} = ?".format(column))
+            values.append(value)
+    sql = "DELETE FROM renders"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+
+    if not os.path.isfile(db_path):
+        return 0
+    with _database(db_path) as con:
+        con.execute(sql.replace("renders", "frame_times", 1), values)
+        con.execute(sql.replace("renders", "memory_peaks", 1), values)
+        return con.execute(sql, values).rowcount
+
+
+def export_history(db_path, filepath, **filters):
+    """Write render entries to a json file.
+
+    Args:
+        db_path: Path to the database file
+        filepath: Path of the json file
+        **filters: Keyword arguments passed to query_renders
+
+    Returns:
+        Number of exported entries
+    """
+    entries = query_renders(db_path, **filters)
+    for entry in entries:
+        entry.pop("id", None)
+    with open(filepath, "w") as f:
+        json.dump({"renders": entries}, f, indent=2)
+    return len(entries)
+
+
+def import_history(db_path, filepath):
+    """Read render entries from a json file written by export_history.
+
+    Args:
+        db_path: Path to the database file
+        filepath: Path of the json file
+
+    Returns:
+        Number of imported entries
+    """
+    with open(filepath) as f:
+        data = json.load(f)
+
+    entries = data.get("renders", []) if isinstance(data, dict) else data
+    records = []
+    for entry in entries:
+        record = {k: v for k, v in entry.items() if k in HISTORY_FIELDS}
+        if all(k in record for k in ("blend_file", "scene", "output_path")):
+            records.append(record)
+    return log_renders(db_path, records)
@@ -0,0 +1,168 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Cost based frame scheduling for parallel renders.
+
+Splitting a frame range evenly leaves workers idle while the one with the
+heaviest shot finishes. Frames are weighted by their render time instead
+(from the render history or a sample of every nth frame), grouped into
+chunks of similar cost and handed out longest first. Workers which run out
+of chunks take chunks from the queue of the most loaded worker.
+"""
+
+import threading
+from bisect import bisect_left
+
+
+DEFAULT_COST = 1.0
+CHUNKS_PER_WORKER = 4       # More chunks balance better, each chunk costs a job
+
+
+def sample_frames(frames, step):
+    """Every nth frame, the last frame is always included"""
+    frames = sorted(frames)
+    if not frames:
+        return []
+    samples = frames[::max(1, step)]
+    if samples[-1] != frames[-1]:
+        samples.append(frames[-1])
+    return samples
+
+
+def estimate_costs(frames, known, default=DEFAULT_COST):
+    """Render time of every frame, interpolated from the frames with known times.
+
+    Args:
+        frames: Frame numbers to estimate
+        known: Dictionary {frame: seconds} from the history or sample renders
+        default: Cost of all frames if no time is known
+
+    Returns:
+        Dictionary {frame: seconds}
+    """
+    if not known:
+        return {f: default for f in frames}
+    points = sorted(known.items())
+    keys = [f for f, _ in points]
+    costs = {}
+    for frame in frames:
+        if frame in known:
+            costs[frame] = known[frame]
+            continue
+        i = bisect_left(keys, frame)
+        if i == 0:
+            costs[frame] = points[0][1]
+        elif i == len(points):
+            costs[frame] = points[-1][1]
+        else:
+            (f0, c0), (f1, c1) = points[i - 1], points[i]
+            costs[frame] = c0 + (c1 - c0) * (frame - f0) / (f1 - f0)
+    return costs
+
+
+def build_chunks(frames, costs, workers, chunks_per_worker=CHUNKS_PER_WORKER):
+    """Split frames into consecutive chunks of similar cost.
+
+    Consecutive frames keep the caches of a worker warm (BVH, textures),
+    so chunks are cut from the sorted frames once the target cost is
+    reached instead of distributing single frames.
+
+    Returns:
+        List of (cost, [frames]) sorted by cost, most expensive first
+    """
+    frames = sorted(frames)
+    if not frames:
+        return []
+    count = max(1, min(len(frames), workers * chunks_per_worker))
+    target = sum(costs[f] for f in frames) / count
+    chunks, current, cost = [], [], 0.0
+    for frame in frames:
+        current.append(frame)
+        cost += costs[frame]
+        if cost >= target and len(chunks) < count - 1:
+            chunks.append((cost, current))
+            current, cost = [], 0.0
+    if current:
+        chunks.append((cost, current))
+    return sorted(chunks, key=lambda c: c[0], reverse=True)
+
+
+class ChunkQueue:
+    """Per-worker chunk queues with work stealing.
+
+    Chunks are assigned longest first to the worker with the lowest load
+    (LPT). A worker takes its chunks front to back; when its own queue is
+    empty it steals the smallest chunk of the worker with the most work left.
+
+    Args:
+        chunks: List of (cost, frames) as returned by build_chunks
+        workers: Number of workers
+    """
+
+    def __init__(self, chunks, workers):
+        self._lock = threading.Lock()
+        self._queues = [[] for _ in range(max(1, workers))]
+        self._loads = [0.0] * len(self._queues)
+        for chunk in sorted(chunks, key=lambda c: c[0], reverse=True):
+            self.add(chunk)
+
+    def add(self, chunk):
+        """Assign a chunk to the worker with the lowest queued cost"""
+        with self._lock:
+            worker = self._loads.index(min(self._loads))
+            self._queues[worker].append(chunk)
+            self._loads[worker] += chunk[0]
+
+    def take(self, worker):
+        """Next chunk of a worker, stolen from another worker if its own queue is empty.
+
+        Returns:
+            Tuple (cost, frames) or None if all chunks are taken
+        """
+        with self._lock:
+            queue = self._queues[worker]
+            if not queue:
+                busy = [w for w, q in enumerate(self._queues) if q]
+                if not busy:
+                    return None
+                victim = max(busy, key=lambda w: self._loads[w])
+                chunk = self._queues[victim].pop() # Smallest chunk of the victim
+                self._loads[victim] -= chunk[0]
+                return chunk
+            chunk = queue.pop(0)
+            self._loads[worker] -= chunk[0]
+            return chunk
+
+    def remaining(self):
+        """Queued cost of all workers"""
+        with self._lock:
+            return sum(self._loads)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(q) for q in self._queues)
+
+
+def makespan(chunks, workers):
+    """Estimated duration of a schedule if every worker takes the next chunk when idle"""
+    finish = [0.0] * max(1, workers)
+    for cost, _ in chunks:
+        i = finish.index(min(finish))
+        finish[i] += cost
+    return max(finish)
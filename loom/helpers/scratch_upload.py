@@ -0,0 +1,156 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Write-behind upload of rendered frames.
+
+Frames are rendered to a local scratch folder and copied to their final
+location on a small thread pool, so slow network storage does not stall
+the render loop and the number of concurrent writes per node is bounded.
+A frame only appears under its final name once it is completely written
+and flushed to disk.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+
+DEFAULT_WORKERS = 2
+DEFAULT_RETRIES = 3
+RETRY_DELAY = 2.0           # Seconds, doubled after each attempt
+PART_SUFFIX = ".part"
+
+
+def scratch_root(folder=""):
+    """Scratch folder of this process (folder or the system temp folder)"""
+    return os.path.join(folder or tempfile.gettempdir(), "loom_scratch_{}".format(os.getpid()))
+
+
+def scratch_path(root, final_path):
+    """Local path of a frame, frames of different output folders do not collide"""
+    folder, filename = os.path.split(os.path.abspath(final_path))
+    key = hashlib.sha1(folder.encode("utf-8", "surrogateescape")).hexdigest()[:12]
+    return os.path.join(root, key, filename)
+
+
+def _fsync_dir(folder):
+    """Persist the directory entry of a renamed file (not supported on Windows)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def upload_file(source, target, fsync=True):
+    """Copy a file next to its target, flush it and rename it into place"""
+    folder = os.path.dirname(target)
+    os.makedirs(folder, exist_ok=True)
+    part = target + PART_SUFFIX
+    try:
+        with open(source, "rb") as src, open(part, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+            if fsync:
+                dst.flush()
+                os.fsync(dst.fileno())
+        os.replace(part, target)
+    except OSError:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        _fsync_dir(folder)
+
+
+class ScratchUploader:
+    """Copy finished frames from the scratch folder to their final paths.
+
+    Args:
+        workers: Maximum number of concurrent uploads
+        retries: Attempts after a failed upload
+        fsync: Flush the file and its folder before it counts as uploaded
+        keep_local: Do not delete the local copy after the upload
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, fsync=True, keep_local=False):
+        from concurrent.futures import ThreadPoolExecutor
+        self.retries = retries
+        self.fsync = fsync
+        self.keep_local = keep_local
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="loom_upload")
+        self._futures = {}
+
+    def _upload(self, source, target):
+        delay = RETRY_DELAY
+        for attempt in range(self.retries + 1):
+            try:
+                upload_file(source, target, self.fsync)
+                break
+            except OSError:
+                if attempt == self.retries:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+        if not self.keep_local:
+            os.remove(source)
+        return target
+
+    def submit(self, key, source, target):
+        """Queue the upload of a frame, a previous upload of the key is replaced"""
+        self._futures[key] = self._executor.submit(self._upload, source, target)
+
+    def pending(self):
+        """Number of uploads not finished yet"""
+        return sum(not f.done() for f in self._futures.values())
+
+    def wait(self):
+        """Block until all queued uploads are finished"""
+        from concurrent.futures import wait
+        wait(list(self._futures.values()))
+
+    def uploaded(self):
+        """Keys of all frames which arrived at their final path"""
+        return [k for k, f in self._futures.items() if f.done() and not f.exception()]
+
+    def failed(self):
+        """Dictionary {key: reason} of all uploads which failed after all retries"""
+        return {k: "Upload failed: {}".format(getattr(f.exception(), "strerror", None) or f.exception()) \
+            for k, f in self._futures.items() if f.done() and f.exception()}
+
+    def forget(self, keys):
+        """Drop finished uploads, e.g. before frames are rendered again"""
+        for key in keys:
+            self._futures.pop(key, None)
+
+    def shutdown(self, root=None):
+        """Finish the queued uploads and remove the empty scratch folders"""
+        self._executor.shutdown(wait=True)
+        if root and os.path.isdir(root):
+            for folder, dirs, files in os.walk(root, topdown=False):
+                if not files and not os.listdir(folder):
+                    try:
+                        os.rmdir(folder)
+                    except OSError:
+                        pass
@@ -0,0 +1,393 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Image sequence utilities.
+
+Provides functions to split sequence paths into their components and to
+find all frames of a sequence on disk. Does not depend on bpy.
+
+Rendered sequences get a manifest next to their frames (shot_####.exr.loom.json)
+listing frames, padding, extension, render settings and per-frame size and
+checksum. The manifest stores the modification time of its folder, if that
+still matches, the frames are read from the manifest instead of scanning.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import re
+
+
+MANIFEST_SUFFIX = ".loom.json"
+MANIFEST_VERSION = 1
+DEFAULT_CHECKSUM = "blake2b"
+
+_modules = {}               # Optional module: available
+
+
+def split_sequence_path(filepath):
+    """Split a frame or hash path into folder, name, digits and extension.
+
+    Args:
+        filepath: Path like /render/shot_####.exr or /render/shot_0001.exr
+
+    Returns:
+        Tuple (folder, name, digits, extension), digits is None if the
+        path contains neither hashes nor a frame number, the extension
+        is returned without leading dot
+    """
+    basedir, filename = os.path.split(filepath)
+    name, ext = os.path.splitext(filename)
+    hashes = re.search(r"#+$", name)
+    if hashes:
+        return basedir, name[:hashes.start()], len(hashes.group(0)), ext.lstrip(".")
+    number = re.search(r"\d+$", name)
+    if number:
+        return basedir, name[:number.start()], len(number.group(0)), ext.lstrip(".")
+    return basedir, name, None, ext.lstrip(".")
+
+
+def frame_filename(name, frame, digits, extension):
+    """Assemble the filename of a single frame (shot_, 1, 4, exr -> shot_0001.exr)"""
+    return "{n}{f:0{d}d}.{e}".format(n=name, f=frame, d=digits, e=extension.lstrip("."))
+
+
+def scan_sequence(basedir, name, digits=None, extension=None, use_manifest=True):
+    """Find all frames of an image sequence in a folder.
+
+    Args:
+        basedir: Folder of the sequence
+        name: Filename without frame number and extension
+        digits: Number of digits of the frame number (any if None)
+        extension: File extension with or without leading dot (any if None)
+        use_manifest: Read the frames from a valid manifest if digits and
+            extension are given
+
+    Returns:
+        Dictionary {frame number: file path} sorted by frame number
+
+    The scan never writes, a stale manifest is refreshed by the next
+    update_manifest() of a render or verification.
+    """
+    if use_manifest and digits and extension:
+        manifest = read_manifest(basedir, name, digits, extension)
+        if manifest:
+            return manifest_frames(basedir, manifest)
+
+    if not os.path.isdir(basedir):
+        return {}
+
+    file_pattern = r"{fn}(\d{ds})\.{ex}$".format(
+        fn=re.escape(name),
+        ds="{{{}}}".format(digits) if digits else "+",
+        ex=re.escape(extension.lstrip(".")) if extension else r"\w+")
+    rx = re.compile(file_pattern, re.IGNORECASE)
+
+    frames = {}
+    with os.scandir(basedir) as entries:
+        for f in entries:
+            match = rx.match(f.name)
+            if match and f.is_file():
+                frames[int(match.group(1))] = f.path
+    return dict(sorted(frames.items()))
+
+
+def manifest_path(basedir, name, digits, extension):
+    """Path of the manifest of a sequence (/render/shot_####.exr.loom.json)"""
+    return os.path.join(basedir, "{}{}.{}{}".format(
+        name, "#" * digits, extension.lstrip("."), MANIFEST_SUFFIX))
+
+
+def checksum_algorithm(preferred=None):
+    """Checksum algorithm to use.
+
+    Args:
+        preferred: Algorithm of an existing manifest, used if available
+
+    Returns:
+        preferred if available, otherwise "xxh3_128" if the xxhash module is
+        installed, otherwise "blake2b"
+    """
+    available = (DEFAULT_CHECKSUM,)
+    if _xxhash_available():
+        available = ("xxh3_128", DEFAULT_CHECKSUM)
+    return preferred if preferred in available else available[0]
+
+
+def _xxhash_available():
+    if "xxhash" not in _modules:
+        _modules["xxhash"] = importlib.util.find_spec("xxhash") is not None
+    return _modules["xxhash"]
+
+
+def _hasher(algorithm):
+    if algorithm == "xxh3_128":
+        try:
+            import xxhash
+        except ImportError:
+            raise ValueError("Checksum algorithm xxh3_128 requires the xxhash module")
+        return xxhash.xxh3_128()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    raise ValueError("Unknown checksum algorithm: {}".format(algorithm))
+
+
+def file_checksum(filepath, algorithm=DEFAULT_CHECKSUM):
+    """Checksum (32 hex digits) of a file, read through a memory map.
+
+    Both hash functions release the GIL while hashing, so several files
+    are processed in parallel by threads.
+    """
+    import mmap
+    checksum = _hasher(algorithm)
+    with open(filepath, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                checksum.update(data)
+    return checksum.hexdigest()
+
+
+def frame_entry(filepath, algorithm=DEFAULT_CHECKSUM):
+    """Size and checksum of a frame, None if it can not be read"""
+    try:
+        return {"size": os.path.getsize(filepath), "checksum": file_checksum(filepath, algorithm)}
+    except (OSError, ValueError):
+        return None
+
+
+def frame_entries(frames, workers=8, algorithm=DEFAULT_CHECKSUM):
+    """Size and checksum of rendered frames, read in parallel.
+
+    Args:
+        frames: Dictionary {frame number: file path}
+        workers: Number of threads reading the files
+        algorithm: "blake2b" or "xxh3_128"
+
+    Returns:
+        Dictionary {frame number: {"size": bytes, "checksum": hex digest}},
+        frames that can not be read are left out
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def entry(filepath):
+        return frame_entry(filepath, algorithm)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(entry, frames.values())
+        return {f: e for f, e in zip(frames, results) if e}
+
+
+def read_manifest(basedir, name, digits, extension, validate=True):
+    """Read the manifest of a sequence.
+
+    Args:
+        basedir: Folder of the sequence
+        name: Filename without frame number and extension
+        digits: Number of digits of the frame number
+        extension: File extension with or without leading dot
+        validate: Only return the manifest if the folder did not change since
+            it was written
+
+    Returns:
+        Manifest dictionary, frame numbers of "frames" are converted to int,
+        None if there is no (valid) manifest
+    """
+    manifest = load_manifest(manifest_path(basedir, name, digits, extension))
+    if manifest and validate and manifest.get("folder_mtime") != _folder_mtime(basedir):
+        return None
+    return manifest
+
+
+def load_manifest(filepath):
+    """Read a manifest file, None if it does not exist or is not readable"""
+    try:
+        with open(filepath) as f:
+            manifest = json.load(f)
+        manifest["frames"] = {int(k): v for k, v in manifest["frames"].items()}
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+    return manifest
+
+
+def manifest_frames(basedir, manifest):
+    """Dictionary {frame number: file path} of all frames listed in a manifest"""
+    name, digits, extension = manifest["name"], manifest["digits"], manifest["extension"]
+    return {f: os.path.join(basedir, frame_filename(name, f, digits, extension)) \
+        for f in sorted(manifest["frames"])}
+
+
+def update_manifest(basedir, name, digits, extension, entries, **info):
+    """Write the manifest of a sequence after frames were added or changed.
+
+    Entries of frames on disk which are not passed are taken over from the
+    previous manifest if their size did not change, otherwise only their size
+    is stored.
+
+    Args:
+        basedir: Folder of the sequence
+        name: Filename without frame number and extension
+        digits: Number of digits of the frame number
+        extension: File extension with or without leading dot
+        entries: Dictionary {frame number: {"size", "checksum"}} of new frames
+        **info: Additional values (resolution, colorspace...)
+
+    Returns:
+        Manifest dictionary
+    """
+    previous = read_manifest(basedir, name, digits, extension, validate=False) or {}
+    known = previous.get("frames", {})
+    algorithm = info.get("checksum_algorithm", previous.get("checksum_algorithm", DEFAULT_CHECKSUM))
+    if previous.get("checksum_algorithm", DEFAULT_CHECKSUM) != algorithm:
+        known = {f: dict(e, checksum=None) for f, e in known.items()}
+    frames = {}
+    for frame, filepath in scan_sequence(basedir, name, digits, extension, use_manifest=False).items():
+        if frame in entries:
+            frames[frame] = entries[frame]
+            continue
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            continue
+        entry = known.get(frame)
+        frames[frame] = entry if entry and entry.get("size") == size else {"size": size, "checksum": None}
+
+    manifest = {k: v for k, v in previous.items() if k not in ("frames", "folder_mtime")}
+    manifest.update(info)
+    manifest.update({
+        "version": MANIFEST_VERSION,
+        "name": name,
+        "digits": digits,
+        "extension": extension.lstrip("."),
+        "checksum_algorithm": algorithm,
+        "frames": frames,
+    })
+    _write_manifest(manifest_path(basedir, name, digits, extension), manifest)
+    return manifest
+
+
+def move_manifest(basedir, name, digits, extension, new_name, new_digits, pairs):
+    """Carry the manifest of a sequence over to its renamed or renumbered frames.
+
+    Args:
+        basedir: Folder of the sequence
+        name, digits, extension: Previous sequence
+        new_name, new_digits: Renamed sequence
+        pairs: Iterable of (previous frame number, new frame number), a
+            previous number can appear several times for copies of a frame
+    """
+    manifest = read_manifest(basedir, name, digits, extension, validate=False)
+    remove_manifest(basedir, name, digits, extension)
+    if manifest is None:
+        return
+    entries = {new: manifest["frames"][old] for old, new in pairs if old in manifest["frames"]}
+    info = {k: v for k, v in manifest.items() if k not in ("name", "digits", "extension", "frames")}
+    update_manifest(basedir, new_name, new_digits, extension, entries, **info)
+
+
+def duplicate_frames(entries):
+    """Groups of frames with identical content, often a sign of stuck renders.
+
+    Args:
+        entries: Dictionary {frame number: {"size", "checksum"}}
+
+    Returns:
+        List of sorted frame number lists, one per group of identical frames
+    """
+    groups = {}
+    for frame, entry in sorted(entries.items()):
+        if entry.get("checksum"):
+            groups.setdefault((entry["size"], entry["checksum"]), []).append(frame)
+    return [frames for frames in groups.values() if len(frames) > 1]
+
+
+def compare_entries(reference, entries):
+    """Compare checksums with a previous run or another copy of the sequence.
+
+    Frames without checksum in the reference are not compared.
+
+    Args:
+        reference: Dictionary {frame number: {"size", "checksum"}}
+        entries: Dictionary {frame number: {"size", "checksum"}}
+
+    Returns:
+        Tuple of sorted frame number lists (changed, missing, added)
+    """
+    changed = [f for f, e in reference.items() if f in entries and e.get("checksum") \
+        and (e["checksum"], e["size"]) != (entries[f].get("checksum"), entries[f]["size"])]
+    missing = [f for f in reference if f not in entries]
+    added = [f for f in entries if f not in reference]
+    return sorted(changed), sorted(missing), sorted(added)
+
+
+def record_checksums(basedir, name, digits, extension, entries, algorithm, reference=None):
+    """Store the checksums of a sequence in its manifest and compare them.
+
+    Args:
+        basedir, name, digits, extension: Sequence
+        entries: Dictionary {frame number: {"size", "checksum"}} of all frames
+        algorithm: Algorithm used for the checksums
+        reference: Manifest to compare with (previous manifest if None)
+
+    Returns:
+        Dictionary with the lists "duplicates", "changed", "missing", "added",
+        "compared" is False if the reference uses another algorithm or does
+        not exist
+    """
+    if reference is None:
+        reference = read_manifest(basedir, name, digits, extension, validate=False)
+    compared = bool(reference) and reference.get("checksum_algorithm", DEFAULT_CHECKSUM) == algorithm
+    changed, missing, added = compare_entries(reference["frames"], entries) if compared else ([], [], [])
+    update_manifest(basedir, name, digits, extension, entries, checksum_algorithm=algorithm)
+    return {
+        "duplicates": duplicate_frames(entries),
+        "changed": changed,
+        "missing": missing,
+        "added": added,
+        "compared": compared,
+    }
+
+
+def remove_manifest(basedir, name, digits, extension):
+    """Delete the manifest of a sequence if there is one"""
+    try:
+        os.remove(manifest_path(basedir, name, digits, extension))
+    except OSError:
+        pass
+
+
+def _folder_mtime(basedir):
+    try:
+        return os.stat(basedir).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _write_manifest(filepath, manifest):
+    """Write the manifest and store the folder modification time in it.
+
+    Creating the file changes the folder, overwriting it in place does not,
+    so the final modification time is only known after the first write.
+    """
+    if not os.path.isfile(filepath):
+        with open(filepath, "w") as f:
+            f.write("{}")
+    manifest["folder_mtime"] = _folder_mtime(os.path.dirname(filepath))
+    with open(filepath, "w") as f:
+        json.dump(manifest, f, indent=1)
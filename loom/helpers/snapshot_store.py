@@ -0,0 +1,284 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Snapshot repository with content deduplication.
+
+Files are split into content-defined chunks using a gear rolling hash, so
+an edit only changes the chunks around it. Every unique chunk is stored
+once (zlib compressed) and a snapshot is a json manifest listing its
+chunks. Snapshots are rebuilt on demand. Does not depend on bpy.
+
+Repository layout:
+    <repository>/chunks/<2 hex>/<hash>    compressed chunks
+    <repository>/snapshots/<id>.json      manifests
+    <repository>/checkout/<id>/<name>     rebuilt files
+"""
+
+import hashlib
+import json
+import os
+import time
+import zlib
+
+
+REPOSITORY_FOLDER = "loom_snapshots"
+
+WINDOW = 32                 # Bytes contributing to the rolling hash
+BOUNDARY_BITS = 20          # Average chunk size of 1 MiB above the minimum
+MIN_CHUNK = 256 * 1024
+MAX_CHUNK = 8 * 1024 * 1024
+READ_BLOCK = 16 * 1024 * 1024
+
+_gear = None
+
+
+def _gear_table():
+    """Random but stable 32-bit value for every byte value"""
+    global _gear
+    if _gear is None:
+        import numpy as np
+        _gear = np.array(
+            [int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=4).digest(), "little")
+             for i in range(256)], dtype=np.uint32)
+    return _gear
+
+
+def boundary_candidates(data):
+    """Positions where the gear hash of the preceding window has its top bits cleared.
+
+    The hash of position i is the sum of gear[data[i-k]] << k for k < WINDOW,
+    computed for the whole buffer with one vectorized pass per window byte.
+
+    Args:
+        data: Bytes, the first WINDOW - 1 bytes only serve as context
+
+    Returns:
+        NumPy array of positions (end offsets of possible chunks)
+    """
+    import numpy as np
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if len(buf) < WINDOW:
+        return np.empty(0, dtype=np.int64)
+    g = _gear_table()[buf]
+    h = np.zeros(len(buf), dtype=np.uint32)
+    for k in range(WINDOW):
+        h[k:] += g[:len(buf) - k] << np.uint32(k)
+    hits = np.flatnonzero((h[WINDOW - 1:] >> np.uint32(32 - BOUNDARY_BITS)) == 0)
+    return hits + WINDOW
+
+
+def iter_chunks(filepath):
+    """Split a file into content-defined chunks.
+
+    Args:
+        filepath: Path of the file
+
+    Yields:
+        Bytes of each chunk
+    """
+    with open(filepath, "rb") as f:
+        pending = b""
+        while True:
+            block = f.read(READ_BLOCK)
+            data = pending + block
+            if not data:
+                return
+            if not block:
+                """ End of file, emit the rest respecting the maximum size """
+                for start in range(0, len(data), MAX_CHUNK):
+                    yield data[start:start + MAX_CHUNK]
+                return
+
+            """ Hash positions after the pending data need the window before them """
+            context = max(0, len(pending) - (WINDOW - 1))
+            cuts = boundary_candidates(data[context:]) + context
+            start = 0
+            for cut in cuts.tolist():
+                while cut - start > MAX_CHUNK:
+                    yield data[start:start + MAX_CHUNK]
+                    start += MAX_CHUNK
+                if cut - start >= MIN_CHUNK:
+                    yield data[start:cut]
+                    start = cut
+            while len(data) - start > MAX_CHUNK:
+                yield data[start:start + MAX_CHUNK]
+                start += MAX_CHUNK
+            pending = data[start:]
+
+
+def _chunk_path(repository, digest):
+    return os.path.join(repository, "chunks", digest[:2], digest)
+
+
+def _manifest_path(repository, snapshot_id):
+    return os.path.join(repository, "snapshots", "{}.json".format(snapshot_id))
+
+
+def _write_atomic(filepath, data):
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmp = "{}.{}.tmp".format(filepath, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, filepath)
+
+
+def store_file(repository, filepath, name=None, **metadata):
+    """Add a file to the repository, storing only chunks not yet present.
+
+    Args:
+        repository: Folder of the repository
+        filepath: Path of the file to store
+        name: Filename used when rebuilding (basename of filepath if None)
+        **metadata: Additional values saved in the manifest
+
+    Returns:
+        Manifest dictionary (id, name, size, chunks, stored)
+    """
+    file_hash = hashlib.blake2b(digest_size=20)
+    chunks, size, stored = [], 0, 0
+    for chunk in iter_chunks(filepath):
+        digest = hashlib.blake2b(chunk, digest_size=20).hexdigest()
+        file_hash.update(chunk)
+        chunk_file = _chunk_path(repository, digest)
+        if not os.path.isfile(chunk_file):
+            packed = zlib.compress(chunk, 6)
+            _write_atomic(chunk_file, packed)
+            stored += len(packed)
+        chunks.append(digest)
+        size += len(chunk)
+
+    manifest = dict(metadata)
+    manifest.update({
+        "id": "{}-{}".format(time.strftime("%Y%m%d-%H%M%S"), file_hash.hexdigest()[:8]),
+        "name": name or os.path.basename(filepath),
+        "created": time.time(),
+        "size": size,
+        "hash": file_hash.hexdigest(),
+        "chunks": chunks,
+        "stored": stored,
+    })
+    _write_atomic(_manifest_path(repository, manifest["id"]), json.dumps(manifest).encode())
+    return manifest
+
+
+def load_snapshot(repository, snapshot_id):
+    """Read the manifest of a snapshot, None if it does not exist"""
+    try:
+        with open(_manifest_path(repository, snapshot_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_snapshots(repository):
+    """All manifests of the repository, latest first"""
+    folder = os.path.join(repository, "snapshots")
+    if not os.path.isdir(folder):
+        return []
+    manifests = [load_snapshot(repository, f[:-5]) for f in os.listdir(folder) if f.endswith(".json")]
+    return sorted((m for m in manifests if m), key=lambda m: m["created"], reverse=True)
+
+
+def checkout_path(repository, manifest):
+    """Path of the rebuilt file of a snapshot"""
+    return os.path.join(repository, "checkout", manifest["id"], manifest["name"])
+
+
+def restore_snapshot(repository, snapshot_id, filepath=None):
+    """Rebuild the file of a snapshot from its chunks.
+
+    Args:
+        repository: Folder of the repository
+        snapshot_id: Identifier of the snapshot
+        filepath: Target path (checkout folder of the repository if None)
+
+    Returns:
+        Path of the rebuilt file
+
+    Raises:
+        KeyError: The snapshot does not exist
+        ValueError: A chunk is missing or the rebuilt file is corrupt
+    """
+    manifest = load_snapshot(repository, snapshot_id)
+    if manifest is None:
+        raise KeyError(snapshot_id)
+    filepath = filepath or checkout_path(repository, manifest)
+    if os.path.isfile(filepath) and os.path.getsize(filepath) == manifest["size"]:
+        return filepath
+
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmp = "{}.{}.tmp".format(filepath, os.getpid())
+    file_hash = hashlib.blake2b(digest_size=20)
+    try:
+        with open(tmp, "wb") as f:
+            for digest in manifest["chunks"]:
+                try:
+                    with open(_chunk_path(repository, digest), "rb") as c:
+                        chunk = zlib.decompress(c.read())
+                except (OSError, zlib.error):
+                    raise ValueError("Chunk {} of snapshot {} is missing".format(digest, snapshot_id))
+                file_hash.update(chunk)
+                f.write(chunk)
+        if file_hash.hexdigest() != manifest["hash"]:
+            raise ValueError("Snapshot {} is corrupt".format(snapshot_id))
+        os.replace(tmp, filepath)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return filepath
+
+
+def remove_snapshot(repository, snapshot_id):
+    """Remove the manifest and the rebuilt file of a snapshot (chunks are kept)"""
+    import shutil
+    manifest = load_snapshot(repository, snapshot_id)
+    if manifest:
+        shutil.rmtree(os.path.dirname(checkout_path(repository, manifest)), ignore_errors=True)
+        os.remove(_manifest_path(repository, snapshot_id))
+
+
+def clean_repository(repository, keep_checkouts=()):
+    """Remove rebuilt files and chunks no snapshot refers to.
+
+    Args:
+        repository: Folder of the repository
+        keep_checkouts: Snapshot identifiers whose rebuilt files are kept
+
+    Returns:
+        Number of freed bytes
+    """
+    import shutil
+    freed = 0
+    checkout = os.path.join(repository, "checkout")
+    if os.path.isdir(checkout):
+        for entry in os.scandir(checkout):
+            if entry.name not in keep_checkouts:
+                for root, _, files in os.walk(entry.path):
+                    freed += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    used = {digest for m in list_snapshots(repository) for digest in m["chunks"]}
+    chunks = os.path.join(repository, "chunks")
+    if os.path.isdir(chunks):
+        for folder in os.scandir(chunks):
+            for entry in os.scandir(folder.path):
+                if entry.name not in used:
+                    freed += entry.stat().st_size
+                    os.remove(entry.path)
+    return freed
@@ -23,6 +23,10 @@ This package contains all operator classes organized by functionality.
 """
 
 import bpy
+import atexit
+import sys
+
+from ..helpers import profiling
 
 # Import all operator modules
 from . import (
@@ -33,6 +37,7 @@ from . import (
     playblast_operators,
     terminal_operators,
     utils_operators,
+    history_operators,
 )
 
 # Collect all classes for registration
@@ -44,16 +49,81 @@ classes = (
     *playblast_operators.classes,
     *terminal_operators.classes,
     *utils_operators.classes,
+    *history_operators.classes,
+)
+
+# Helpers timed by the profiler, wrapped in every Loom module that imports them
+profiled_functions = (
+    "replace_globals",
+    "user_globals",
+    "evaluate_globals",
+    "filter_frames",
+    "scan_sequence",
+    "read_manifest",
+    "frame_entries",
+    "ffmpeg_capabilities",
+    "run_proxy_command",
 )
 
+# Operator methods timed besides execute, invoke and modal
+profiled_methods = (
+    (render_operators.LOOM_OT_render_image_sequence, "frame_repath"),
+    (render_operators.LOOM_OT_render_flipbook, "frame_repath"),
+)
+
+
+def set_profiling(enable, stats_dir=""):
+    """Wrap the callbacks of all operators and the hot helpers with timers.
+
+    Args:
+        enable: Instrument if True, restore the original functions if False
+        stats_dir: Folder for cProfile dumps of slow calls, '' to only measure
+    """
+    profiling.restore()
+    profiling.configure(stats_dir=bpy.path.abspath(stats_dir) if stats_dir else "")
+    if not enable:
+        return
+
+    for cls in classes:
+        if cls.__name__.startswith("LOOM_OT_"):
+            for attr in profiling.CALLBACKS:
+                profiling.instrument(cls, attr, "{} {}".format(cls.bl_idname, attr))
+    for cls, attr in profiled_methods:
+        profiling.instrument(cls, attr, "{}.{}".format(cls.__name__, attr))
+
+    """ Helpers are imported by name, wrap each binding of the same function """
+    root = __package__.split('.')[0]
+    modules = [m for n, m in list(sys.modules.items()) if m and (n == root or n.startswith(root + "."))]
+    helpers = {name: vars(m)[name] for m in modules for name in profiled_functions \
+        if m.__name__.startswith(root + ".helpers.") and name in vars(m)}
+    for module in modules:
+        for name, func in helpers.items():
+            if vars(module).get(name) is func:
+                profiling.instrument(module, name, name)
+
+
+def print_profile():
+    """Summary of all measurements on stdout, used at exit of headless renders"""
+    if profiling.active():
+        print("Loom: Profile")
+        for line in profiling.report():
+            print("  " + line)
+
 
 def register():
     """Register all operator classes."""
     for cls in classes:
         bpy.utils.register_class(cls)
 
+    stats_dir = profiling.env_settings()
+    if stats_dir is not None:
+        set_profiling(True, stats_dir)
+        atexit.register(print_profile)
+
 
 def unregister():
     """Unregister all operator classes."""
+    profiling.restore()
+    atexit.unregister(print_profile)
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
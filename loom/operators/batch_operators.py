@@ -23,23 +23,37 @@ Contains operators for managing batch rendering of multiple blend files.
 """
 
 import bpy
-from bpy_extras.io_utils import ImportHelper
+from bpy_extras.io_utils import ImportHelper, ExportHelper
 import os
 import re
-import subprocess
-import errno
+import sys
+import json
+import tempfile
 from sys import platform
 from time import strftime
-
-# Import blend_render_info from Blender's modules
-from blend_render_info import read_blend_rend_chunk
+from itertools import chain
 
 # Import helpers
 from ..helpers.frame_utils import filter_frames
 from ..helpers.globals_utils import user_globals
+from ..helpers.batch_queue import item_key, duplicate_indices, read_queue, write_queue
+from ..helpers.job_spec import frame_intervals, write_spec
+from ..helpers.encode_utils import DELIVERABLE_ITEMS
+from ..helpers import async_fs
+from ..helpers.dependency_cache import DependencyCache, cache_root
+from ..helpers.snapshot_store import (
+    REPOSITORY_FOLDER, checkout_path, clean_repository, list_snapshots, restore_snapshot, store_file)
 
 # Import from other operators for callbacks
 from . import encode_operators
+from .history_operators import history_database
+
+
+def name_list(names, limit=5):
+    """Names for a report, long lists are shortened"""
+    if len(names) <= limit:
+        return ", ".join(names)
+    return "{} and {} more".format(", ".join(names[:limit]), len(names) - limit)
 
 
 class LOOM_OT_batch_dialog(bpy.types.Operator):
@@ -81,6 +95,46 @@ class LOOM_OT_batch_dialog(bpy.types.Operator):
         description="Shutdown when done",
         default=False)
 
+    verify_frames: bpy.props.BoolProperty(
+        name="Verify Frames",
+        description="Check the frames after rendering, render invalid frames again " \
+            "and only encode complete sequences",
+        default=True)
+
+    max_retries: bpy.props.IntProperty(
+        name="Retries",
+        description="Number of times invalid frames are rendered again",
+        default=2, min=0, max=10)
+
+    cache_dependencies: bpy.props.BoolProperty(
+        name="Cache Dependencies",
+        description="Copy libraries and textures of each blend-file to the local dependency " \
+            "cache before rendering (see Preferences)",
+        default=False)
+
+    worker_pool: bpy.props.BoolProperty(
+        name="Persistent Workers",
+        description="Render on headless Blender instances which stay open between items, " \
+            "every blend-file is only loaded once and encoding runs while the next item renders",
+        default=True)
+
+    workers: bpy.props.IntProperty(
+        name="Workers",
+        description="Number of Blender instances rendering different blend-files at the same time",
+        default=1, min=1, max=8)
+
+    split_frames: bpy.props.BoolProperty(
+        name="Split Frames",
+        description="Distribute the frames of each item over all workers, in chunks of similar " \
+            "render time (from the render history or sampled first)",
+        default=False)
+
+    pin_cpus: bpy.props.BoolProperty(
+        name="Pin CPUs",
+        description="Give every worker its own cores (whole NUMA nodes if possible) and a matching " \
+            "number of render threads instead of letting all workers compete for all cores (Linux)",
+        default=True)
+
     def determine_type(self, val): #val = ast.literal_eval(s)
         if (isinstance(val, int)):
             return ("chi")
@@ -101,28 +155,14 @@ class LOOM_OT_batch_dialog(bpy.types.Operator):
     def pack_arguments(self, lst):
         return [{"idc": 0, "name": self.determine_type(i), "value": str(i)} for i in lst]
 
-    def write_permission(self, folder): # Hacky, but ok for now
-        # https://stackoverflow.com/q/2113427/3091066
-        try: # os.access(os.path.realpath(bpy.path.abspath(out_folder)), os.W_OK)
-            pf = os.path.join(folder, "permission.txt")
-            fh = open(pf, 'w')
-            fh.close()
-            os.remove(pf)
-            return True
-        except:
-            return False
+    def file_exists(self, item):
+        """Cached existence of the blend file, checked in place if still pending"""
+        exists = async_fs.is_file(item.path)
+        return os.path.isfile(item.path) if exists is None else exists
 
     def missing_frames(self, frames):
         return sorted(set(range(frames[0], frames[-1] + 1)).difference(frames))
 
-    def verify_app(self, cmd):
-        try:
-            subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except OSError as e:
-            if e.errno == errno.ENOENT:
-                return False
-        return True
-
     @classmethod
     def poll(cls, context):
         return True
@@ -141,33 +181,30 @@ class LOOM_OT_batch_dialog(bpy.types.Operator):
             self.report({'ERROR'}, "No files to render.")
             user_error = True
 
+        """ Verify ffmpeg once (cached) """
+        if any(item.encode_flag for item in lum.batch_render_coll):
+            ffmpeg_error = not encode_operators.verify_ffmpeg(prefs)
+
+        """ Rebuild repository snapshots """
+        for item in lum.batch_render_coll:
+            if item.snapshot_id and not self.file_exists(item):
+                try:
+                    item.path = restore_snapshot(item.snapshot_repository, item.snapshot_id)
+                    async_fs.invalidate(item.path)
+                except (KeyError, ValueError, OSError) as e:
+                    self.report({'ERROR'}, "Can not rebuild snapshot {}: {}".format(item.name, e))
+
         for item in lum.batch_render_coll:
             if not item.frames and not any(char.isdigit() for char in item.frames):
                 self.report({'ERROR'}, "{} [wrong frame input]".format(item.name))
                 user_error = True
 
-            if not os.path.isfile(item.path):
+            if not self.file_exists(item):
                 self.report({'ERROR'}, "{} does not exist anymore".format(item.name))
                 user_error = True
 
             """ encode errors """
             if item.encode_flag:
-
-                """ Verify ffmpeg """
-                if not prefs.ffmpeg_path:
-                    if self.verify_app(["ffmpeg", "-h"]):
-                        prefs.ffmpeg_path = "ffmpeg"
-                    else:
-                        ffmpeg_error = True
-
-                elif prefs.ffmpeg_path and prefs.ffmpeg_path != "ffmpeg":
-                    if not os.path.isabs(prefs.ffmpeg_path) or prefs.ffmpeg_path.startswith('//'):
-                        ffmpeg_bin = os.path.realpath(bpy.path.abspath(prefs.ffmpeg_path))
-                        if os.path.isfile(ffmpeg_bin):
-                            prefs.ffmpeg_path = ffmpeg_bin
-                    if not self.verify_app([prefs.ffmpeg_path, "-h"]):
-                        ffmpeg_error = True
-
                 """ verify frames """
                 frames_user = filter_frames(frame_input=item.frames, filter_individual=item.input_filter)
                 if self.missing_frames(frames_user):
@@ -177,7 +214,7 @@ class LOOM_OT_batch_dialog(bpy.types.Operator):
 
             """
             out_folder, out_filename = os.path.split(bpy.path.abspath(context.scene.render.filepath))
-            if not self.write_permission(os.path.realpath(out_folder)):
+            if async_fs.is_writable(os.path.normpath(out_folder)) is False:
                 self.report({'ERROR'}, "Specified output folder does not exist (permission denied)")
                 user_error = True
             """
@@ -201,50 +238,65 @@ class LOOM_OT_batch_dialog(bpy.types.Operator):
                 bpy.ops.loom.batch_render_dialog('INVOKE_DEFAULT')
                 return {"CANCELLED"}
 
+        if self.worker_pool:
+            return self.start_pool(context, prefs, black_list)
+
         # Wrap blender binary path in quotations
         bl_bin = '"{}"'.format(bpy.app.binary_path) if not platform.startswith('win32') else bpy.app.binary_path
 
-        cli_arg_dict = {}
+        """ The render step reports the sequence path, encoding needs no Blender instance """
+        stamp = strftime("%Y%m%d-%H%M%S")
+        result_files = {c: os.path.join(tempfile.gettempdir(), "loom-result-{}-{}.json".format(
+            stamp, c)).replace("\\", "/") for c in range(len(lum.batch_render_coll))}
+
+        """ All items (scenes, cameras) of a blend-file are rendered in one session """
+        groups = {}
         for c, item in enumerate(lum.batch_render_coll):
-            python_expr = ("import bpy;" +\
-                    "bpy.ops.render.image_sequence(" +\
-                    "frames='{fns}', isolate_numbers={iel}," +\
-                    "render_silent={cli}").format(
-                        fns=item.frames,
-                        iel=item.input_filter,
-                        cli=True)
+            groups.setdefault(item.path, []).append(c)
 
-            if self.override_render_settings and self.render_preset != 'EMPTY':
-                python_expr += ", render_preset='{pst}'".format(pst=self.render_preset)
+        encode_script = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "loom_encode.py")
+        job_script = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "loom_job.py")
+        ffmpeg_bin = prefs.ffmpeg_path or "ffmpeg" # Made absolute by verify_ffmpeg
+        """ Paths containing backslashes are quoted by the bat writer """
+        quote = (lambda x: x) if platform.startswith('win32') else '"{}"'.format
+        py_bin, encode_script, job_script, ffmpeg_bin = map(
+            quote, (sys.executable, encode_script, job_script, ffmpeg_bin))
 
-            python_expr += ");"
-            python_expr += "bpy.ops.wm.save_as_mainfile(filepath=bpy.data.filepath)"
-            #print(type(python_expr), python_expr, self.render_preset)
+        cli_arg_dict = {}
+        for g, (path, indices) in enumerate(groups.items()):
+            variants = [dict(self.frame_variant(lum.batch_render_coll[c]),
+                scene=lum.batch_render_coll[c].scene,
+                camera=lum.batch_render_coll[c].camera,
+                result_file=result_files[c]) for c in indices]
+            spec_file = os.path.join(tempfile.gettempdir(), "loom-job-{}-{}.json".format(stamp, g))
+            try:
+                write_spec(spec_file, variants,
+                    verify=self.verify_frames,
+                    max_retries=self.max_retries,
+                    render_preset=self.render_preset \
+                        if self.override_render_settings and self.render_preset != 'EMPTY' else "",
+                    localize=self.cache_dependencies)
+            except OSError as e:
+                self.report({'ERROR'}, "Can not write the batch file: {}".format(e))
+                return {"CANCELLED"}
 
-            cli_args = [bl_bin, "-b", item.path, "--python-expr", python_expr]
-            cli_arg_dict[c] = cli_args
-
-        coll_len = len(cli_arg_dict)
-        for c, item in enumerate(lum.batch_render_coll):
-            if item.encode_flag and item.name not in black_list:
-                # bpy.context.scene.loom.render_collection[-1]['file_path'];
-                # seq_path=bpy.context.scene.render.frame_path(frame=1);
-                python_expr = ("import bpy;" +\
-                            "ext=bpy.context.scene.render.file_extension;" +\
-                            "seq_path=bpy.context.scene.render.filepath+ext;" +\
-                            "bpy.ops.loom.encode_dialog(" +\
-                            "sequence=seq_path," +\
-                            "fps={fps}," +\
-                            "codec='{cdc}'," +\
-                            "colorspace='{cls}'," +\
-                            "terminal_instance=False," +\
-                            "pause=False)").format(
-                                fps = self.fps,
-                                cdc = self.codec,
-                                cls = self.colorspace)
-
-                cli_args = [bl_bin, "-b", item.path, "--python-expr", python_expr]
-                cli_arg_dict[c+coll_len] = cli_args
+            cli_args = [bl_bin, "-b", path, "--python-exit-code", "1", "--python", job_script,
+                "--", quote(os.path.normpath(spec_file))]
+            cli_arg_dict[len(cli_arg_dict)] = cli_args
+
+            """ Encoders skip sequences without result or with invalid frames """
+            for c in indices:
+                item = lum.batch_render_coll[c]
+                if item.encode_flag and item.name not in black_list:
+                    cli_args = [py_bin, encode_script,
+                        "--result", quote(os.path.normpath(result_files[c])),
+                        "--codec", self.codec,
+                        "--colorspace", self.colorspace,
+                        "--fps", str(self.fps),
+                        "--ffmpeg", ffmpeg_bin]
+                    if item.deliverables:
+                        cli_args += ["--deliverables", ",".join(sorted(item.deliverables))]
+                    cli_arg_dict[len(cli_arg_dict)] = cli_args
 
         """ Start headless batch """
         bpy.ops.loom.run_terminal(
@@ -258,10 +310,76 @@ class LOOM_OT_batch_dialog(bpy.types.Operator):
 
         return {'FINISHED'}
 
+    def frame_variant(self, item):
+        """Parsed frames of an item if they do not depend on the frame step of its file"""
+        frames = filter_frames(item.frames, 1, item.input_filter)
+        if frames and all(isinstance(f, int) for f in frames) and \
+                frames == filter_frames(item.frames, 2, item.input_filter):
+            return {"intervals": frame_intervals(frames)}
+        return {"frames": item.frames, "isolate_numbers": item.input_filter}
+
+    def start_pool(self, context, prefs, black_list):
+        """Write the batch file and run loom_pool.py with Blender's Python"""
+        lum = context.scene.loom
+        jobs = []
+        for item in lum.batch_render_coll:
+            job = {
+                "blend": item.path,
+                "scene": item.scene,
+                "camera": item.camera,
+                "frames": item.frames,
+                "isolate_numbers": item.input_filter,
+                "verify": self.verify_frames,
+                "max_retries": self.max_retries,
+                "localize": self.cache_dependencies,
+                "split": self.split_frames and self.workers > 1}
+            if self.override_render_settings and self.render_preset != 'EMPTY':
+                job["render_preset"] = self.render_preset
+            if item.encode_flag and item.name not in black_list:
+                job["encode"] = {
+                    "codec": self.codec,
+                    "colorspace": self.colorspace,
+                    "fps": self.fps,
+                    "deliverables": sorted(item.deliverables)}
+            jobs.append(job)
+
+        batch = {
+            "blender": bpy.app.binary_path,
+            "ffmpeg": prefs.ffmpeg_path or "ffmpeg", # Made absolute by verify_ffmpeg
+            "workers": self.workers,
+            "affinity": self.pin_cpus and self.workers > 1,
+            "memory_budget": (int(prefs.memory_budget * 1024**3) or None) if prefs.memory_flag else 0,
+            "history": history_database(context),
+            "jobs": jobs}
+        batch_file = os.path.join(
+            tempfile.gettempdir(), "loom-batch-{}.json".format(strftime("%Y%m%d-%H%M%S")))
+        try:
+            with open(batch_file, "w") as f:
+                json.dump(batch, f, indent=1)
+        except OSError as e:
+            self.report({'ERROR'}, "Can not write the batch file: {}".format(e))
+            return {"CANCELLED"}
+
+        pool_script = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "loom_pool.py")
+        args = [pool_script, batch_file]
+        if not platform.startswith('win32'):
+            args = ['"{}"'.format(a) for a in args]
+
+        bpy.ops.loom.run_terminal(
+            binary=sys.executable,
+            terminal_instance=self.terminal,
+            argument_collection=self.pack_arguments(args),
+            bash_name="loom-batch-temp",
+            force_bash=True,
+            shutdown=self.shutdown)
+        return {'FINISHED'}
+
     def invoke(self, context, event):
         addon_name = __package__.split('.')[0]
         prefs = context.preferences.addons[addon_name].preferences
         context.scene.loom.property_unset("custom_render_presets")
+        for item in context.scene.loom.batch_render_coll:
+            async_fs.is_file(item.path) # Start the checks
         return context.window_manager.invoke_props_dialog(self,
             width=(prefs.batch_dialog_width))
 
@@ -291,12 +409,22 @@ class LOOM_OT_batch_dialog(bpy.types.Operator):
         col = row.column(align=True)
         col.operator("loom.batch_select_blends", icon='ADD', text="")
         col.operator("loom.batch_dialog_action", icon='REMOVE', text="").action = 'REMOVE'
+        col.operator("loom.batch_dialog_action", icon='DUPLICATE', text="").action = 'DUPLICATE'
         col.menu("LOOM_MT_display_settings", icon='DOWNARROW_HLT', text="")
+        col.menu("LOOM_MT_batch_queue", icon='COLLAPSEMENU', text="")
         col.separator()
         col.separator()
         col.operator("loom.batch_dialog_action", icon='TRIA_UP', text="").action = 'UP'
         col.operator("loom.batch_dialog_action", icon='TRIA_DOWN', text="").action = 'DOWN'
 
+        """ Blend files checked in the background, snapshots are rebuilt on render """
+        status = [async_fs.is_file(i.path) for i in lum.batch_render_coll if not i.snapshot_id]
+        missing = status.count(False)
+        if None in status:
+            layout.label(text="Checking files...", icon='TIME')
+        elif missing:
+            layout.label(text="{} file(s) do not exist anymore".format(missing), icon='ERROR')
+
         layout.row() # Separator
         row = layout.row(align=True)
         col = row.column(align=True)
@@ -305,6 +433,8 @@ class LOOM_OT_batch_dialog(bpy.types.Operator):
         row.operator("loom.batch_scandir_blends", icon='ZOOM_SELECTED') #VIEWZOOM
         if bpy.data.is_saved: # icon="WORKSPACE"
             row.operator("loom.batch_snapshot", icon="IMAGE_BACKGROUND", text="Add Snapshot")
+            if prefs.snapshot_repository:
+                row.operator("loom.batch_snapshot_clean", icon="TRASH", text="")
 
         layout.row() # Separator
         row = layout.row(align=True)
@@ -328,13 +458,45 @@ class LOOM_OT_batch_dialog(bpy.types.Operator):
             split = row.split(factor=split_perc)
             split.label(text="Codec")
             split.prop(self, "codec", text="")
+            
+            """ Additional deliverables of the active item """
+            if 0 <= lum.batch_render_idx < len(lum.batch_render_coll):
+                active = lum.batch_render_coll[lum.batch_render_idx]
+                if active.encode_flag:
+                    row = layout.row()
+                    split = row.split(factor=split_perc)
+                    split.label(text="Deliverables")
+                    split.label(text="'{}'".format(active.name), icon='DUPLICATE')
+                    row = layout.row()
+                    split = row.split(factor=split_perc)
+                    split.separator()
+                    grid = split.grid_flow(columns=2, even_columns=True, align=True)
+                    missing = encode_operators.unavailable_codecs(prefs)
+                    for codec, *_ in DELIVERABLE_ITEMS:
+                        if codec != self.codec:
+                            sub = grid.row(align=True)
+                            sub.enabled = codec not in missing
+                            sub.prop_enum(active, "deliverables", codec)
             row = layout.row()
             row.separator()
 
         layout.separator(factor=0.5)
+        row = layout.row(align=True)
+        row.prop(self, "verify_frames", toggle=True, icon='CHECKMARK')
+        sub = row.row(align=True)
+        sub.enabled = self.verify_frames
+        sub.prop(self, "max_retries")
+        row = layout.row(align=True)
+        row.prop(self, "cache_dependencies", toggle=True, icon='FILE_CACHE')
+        row.prop(self, "worker_pool", toggle=True, icon='LINKED')
+        sub = row.row(align=True)
+        sub.enabled = self.worker_pool
+        sub.prop(self, "workers")
+        sub.prop(self, "split_frames", toggle=True, icon='SEQ_SPLITVIEW', text="")
+        sub.prop(self, "pin_cpus", toggle=True, icon='MEMORY', text="")
         row = layout.row() #if platform.startswith('win32'):
         row.prop(self, "shutdown", text="Shutdown when done")
-        if len(render_preset_callback(scn, context, addon_name)) > 1:
+        if len(render_preset_callback(scn, context)) > 1:
             settings_icon = 'MODIFIER_ON' if self.override_render_settings else 'MODIFIER_OFF'
             row.prop(self, "override_render_settings", icon=settings_icon, text="", emboss=False)
             if self.override_render_settings:
@@ -391,6 +553,16 @@ class LOOM_OT_batch_snapshot(bpy.types.Operator):
         options={'HIDDEN'},
         default=False)
 
+    use_repository: bpy.props.BoolProperty(
+        name="Deduplicate",
+        description="Store the snapshot in the repository of the snapshot folder, " \
+            "unchanged parts of the file are only stored once",
+        default=False)
+
+    _timer = None
+    _future = None
+    _store = None
+
     def number_suffix(self, filename_no_extension):
         regex = re.compile(r'\d+\b')
         digits = ([x for x in regex.findall(filename_no_extension)])
@@ -442,7 +614,18 @@ class LOOM_OT_batch_snapshot(bpy.types.Operator):
             bound_filename = suff if not self.file_name else "{}_{}".format(fn_noext, suff)
             fcopy = os.path.join(basedir, "{}{}".format(bound_filename, ext))
 
-            if os.path.isfile(fcopy) and not self.overwrite:
+            if self.use_repository:
+                """ Number by the snapshots in the repository """
+                names = [m["name"] for m in list_snapshots(os.path.join(basedir, REPOSITORY_FOLDER))]
+                numbers = [self.number_suffix(os.path.splitext(n)[0]) for n in names \
+                    if n.startswith(fn_noext if self.file_name else "")]
+                numbers = [int(n) for n in numbers if n]
+                if numbers:
+                    suff = "{:0{}d}".format(max(numbers)+1, leading_zeros)
+                    nextf = suff if not self.file_name else "{}_{}".format(fn_noext, suff)
+                    fcopy = os.path.join(basedir, "{}{}".format(nextf, ext))
+
+            elif os.path.isfile(fcopy) and not self.overwrite:
                 fs = self.file_sequence(fcopy, digits=leading_zeros)
                 if fs:
                     suff = "{:0{}d}".format(max(fs.keys())+1, leading_zeros)
@@ -464,7 +647,16 @@ class LOOM_OT_batch_snapshot(bpy.types.Operator):
             if self.apply_globals: bpy.ops.loom.globals_bake(action='APPLY')
             if self.convert_paths: bpy.ops.loom.output_paths(action='ABSOLUTE')
 
-            bpy.ops.wm.save_as_mainfile(filepath=fcopy, copy=True)
+            snapshot_name = os.path.basename(fcopy)
+            if self.use_repository:
+                """ Save uncompressed, compressed files can not be deduplicated """
+                repository = os.path.join(basedir, REPOSITORY_FOLDER)
+                incoming = os.path.join(repository, "incoming")
+                os.makedirs(incoming, exist_ok=True)
+                fcopy = os.path.join(incoming, snapshot_name)
+                bpy.ops.wm.save_as_mainfile(filepath=fcopy, copy=True, compress=False)
+            else:
+                bpy.ops.wm.save_as_mainfile(filepath=fcopy, copy=True)
 
             if self.apply_globals: bpy.ops.loom.globals_bake(action='RESET')
             if not self.apply_globals and self.convert_paths:
@@ -473,31 +665,81 @@ class LOOM_OT_batch_snapshot(bpy.types.Operator):
             if not os.path.isfile(fcopy):
                 self.report({'WARNING'},"Can not save a copy of the current file")
                 return {"CANCELLED"}
-            else:
+
+            """ Read the frame range before the file is moved to the repository """
+            from blend_render_info import read_blend_rend_chunk
+            data = read_blend_rend_chunk(fcopy)
+
+            if not self.use_repository:
                 self.report({'INFO'},"Snapshot created: {}".format(fcopy))
+                return self.add_snapshot(context, fcopy, data)
+
+            self._store = (repository, fcopy, data)
+            source = bpy.data.filepath
+            if self.options.is_invoke and context.window:
+                """ Chunking large files takes a while, store on the filesystem thread """
+                self._future = async_fs.submit(
+                    lambda: store_file(repository, fcopy, name=snapshot_name, source=source))
+                wm = context.window_manager
+                self._timer = wm.event_timer_add(0.2, window=context.window)
+                wm.modal_handler_add(self)
+                self.report({'INFO'}, "Storing snapshot...")
+                return {'RUNNING_MODAL'}
+            try:
+                manifest = store_file(repository, fcopy, name=snapshot_name, source=source)
+            except OSError as e:
+                manifest = e
+            return self.finish_store(context, manifest)
 
-            ''' Add the snapshot to the list '''
-            if self.options.is_invoke:
-                fd, fn = os.path.split(fcopy)
-                scn = context.scene
-                lum = scn.loom
+        return {'FINISHED'}
 
-                data = read_blend_rend_chunk(fcopy)
-                if not data:
-                    self.report({'WARNING'}, "Skipped {}, invalid .blend file".format(fcopy))
-                    return {'CANCELLED'}
-                else:
-                    start, end, sc = data[0]
-                    item = lum.batch_render_coll.add()
-                    item.rid = len(lum.batch_render_coll)
-                    item.name = fn
-                    item.path = fcopy
-                    item.frame_start = start
-                    item.frame_end = end
-                    item.scene = sc
-                    item.frames = "{}-{}".format(item.frame_start, item.frame_end)
-                    lum.batch_render_idx = len(lum.batch_render_coll)-1
+    def modal(self, context, event):
+        if event.type != 'TIMER' or not self._future.done():
+            return {'PASS_THROUGH'}
+        context.window_manager.event_timer_remove(self._timer)
+        try:
+            manifest = self._future.result()
+        except OSError as e:
+            manifest = e
+        return self.finish_store(context, manifest)
 
+    def finish_store(self, context, manifest):
+        """ Remove the temporary copy, report and add the stored snapshot """
+        repository, fcopy, data = self._store
+        try:
+            os.remove(fcopy)
+        except OSError:
+            pass
+        if isinstance(manifest, OSError):
+            self.report({'ERROR'}, "Can not store the snapshot: {}".format(manifest))
+            return {"CANCELLED"}
+        self.report({'INFO'},"Snapshot stored: {} ({:.1f} MB new data)".format(
+            manifest["id"], manifest["stored"] / 1024**2))
+        return self.add_snapshot(context, checkout_path(repository, manifest), data, manifest, repository)
+
+    def add_snapshot(self, context, fcopy, data, manifest=None, repository=""):
+        ''' Add the snapshot to the list '''
+        if not self.options.is_invoke:
+            return {'FINISHED'}
+        fd, fn = os.path.split(fcopy)
+        lum = context.scene.loom
+        if not data:
+            self.report({'WARNING'}, "Skipped {}, invalid .blend file".format(fcopy))
+            return {'CANCELLED'}
+
+        start, end, sc = data[0]
+        item = lum.batch_render_coll.add()
+        item.rid = len(lum.batch_render_coll)
+        item.name = fn
+        item.path = fcopy
+        item.frame_start = start
+        item.frame_end = end
+        item.scene = sc
+        item.frames = "{}-{}".format(item.frame_start, item.frame_end)
+        if manifest:
+            item.snapshot_id = manifest["id"]
+            item.snapshot_repository = repository
+        lum.batch_render_idx = len(lum.batch_render_coll)-1
         return {'FINISHED'}
 
     def invoke(self, context, event):
@@ -506,6 +748,8 @@ class LOOM_OT_batch_snapshot(bpy.types.Operator):
             self.globals_flag = True
         if bpy.data.filepath:
             self.file_name = bpy.path.basename(bpy.data.filepath)[:-6]
+        if not self.properties.is_property_set("use_repository"):
+            self.use_repository = context.preferences.addons[addon_name].preferences.snapshot_repository
         return context.window_manager.invoke_props_dialog(self, width=450)
 
     def draw(self, context):
@@ -520,6 +764,7 @@ class LOOM_OT_batch_snapshot(bpy.types.Operator):
         if self.globals_flag:
             row.prop(self, "apply_globals", toggle=True)
         row.prop(self, "convert_paths", toggle=True)
+        row.prop(self, "use_repository", toggle=True)
         '''
         col = layout.column(align=True)
         row = col.row(align=True)
@@ -531,6 +776,26 @@ class LOOM_OT_batch_snapshot(bpy.types.Operator):
         layout.row()
 
 
+class LOOM_OT_batch_snapshot_clean(bpy.types.Operator):
+    """Remove rebuilt snapshots not in the list and unreferenced data of the snapshot repository"""
+    bl_idname = "loom.batch_snapshot_clean"
+    bl_label = "Clean Snapshot Repository"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        addon_name = __package__.split('.')[0]
+        snap_dir = context.preferences.addons[addon_name].preferences.snapshot_directory
+        repository = os.path.join(os.path.realpath(bpy.path.abspath(snap_dir)), REPOSITORY_FOLDER)
+        if not os.path.isdir(repository):
+            self.report({'INFO'}, "No snapshot repository in {}".format(snap_dir))
+            return {"CANCELLED"}
+
+        in_use = {i.snapshot_id for i in context.scene.loom.batch_render_coll if i.snapshot_id}
+        freed = clean_repository(repository, keep_checkouts=in_use)
+        self.report({'INFO'}, "{:.1f} MB freed".format(freed / 1024**2))
+        return {"FINISHED"}
+
+
 class LOOM_OT_batch_selected_blends(bpy.types.Operator, ImportHelper):
     """Select Blend Files via File Browser"""
     bl_idname = "loom.batch_select_blends"
@@ -564,11 +829,15 @@ class LOOM_OT_batch_selected_blends(bpy.types.Operator, ImportHelper):
         scn = context.scene
         lum = scn.loom
 
-        valid_files, invalid_files = [], []
+        from blend_render_info import read_blend_rend_chunk
+        valid_files, invalid_files, queued_files = [], [], []
+        queued = {item_key(i.path) for i in lum.batch_render_coll}
         start, end, sc = [1, 250, "Scene"]
         for i in self.files:
             path_to_file = os.path.join(os.path.dirname(self.filepath), i.name)
-            if os.path.isfile(path_to_file):
+            if item_key(path_to_file) in queued:
+                queued_files.append(i.name)
+            elif os.path.isfile(path_to_file):
 
                 # /Blender <version>/<version>/scripts/modules/blender_render_info.py
                 # https://blender.stackexchange.com/a/55503/3710
@@ -591,11 +860,13 @@ class LOOM_OT_batch_selected_blends(bpy.types.Operator, ImportHelper):
 
         #self.report({'INFO'}, "Skipped {}, no valid .blend".format(", ".join(valid_files)))
         if invalid_files:
-            self.report({'WARNING'}, "Can not read frame range from {}, invalid .blend file(s)".format(", ".join(invalid_files)))
+            self.report({'WARNING'}, "Can not read frame range from {}, invalid .blend file(s)".format(name_list(invalid_files)))
         elif valid_files:
-            self.report({'INFO'}, "Added {} to the list".format(", ".join(valid_files)))
-        else:
+            self.report({'INFO'}, "Added {} to the list".format(name_list(valid_files)))
+        elif not queued_files:
             self.report({'INFO'}, "Nothing selected")
+        if queued_files:
+            self.report({'INFO'}, "Skipped {}, already in the list".format(name_list(queued_files)))
 
         lum.batch_render_idx = len(lum.batch_render_coll)-1
         if bpy.app.version < (4, 1, 0): self.display_popup(context)
@@ -651,14 +922,21 @@ class LOOM_OT_scan_blends(bpy.types.Operator, ImportHelper):
             return {'CANCELLED'}
 
         blend_files = self.blend_files(self.directory, self.sub_folders)
-        if next(blend_files, None) is None:
+        first_file = next(blend_files, None)
+        if first_file is None:
             if bpy.app.version < (4, 1, 0): self.display_popup(context)
             self.report({'WARNING'},"No blend files found in {}".format(self.directory))
             return {'CANCELLED'}
+        blend_files = chain([first_file], blend_files)
 
-        valid_files, invalid_files = [], []
+        from blend_render_info import read_blend_rend_chunk
+        valid_files, invalid_files, queued_files = [], [], []
+        queued = {item_key(i.path) for i in lum.batch_render_coll}
         for i in blend_files:
             path_to_file = (i.path)
+            if item_key(path_to_file) in queued:
+                queued_files.append(i.name)
+                continue
             data = read_blend_rend_chunk(path_to_file)
             if not data:
                 invalid_files.append(i.name)
@@ -676,9 +954,11 @@ class LOOM_OT_scan_blends(bpy.types.Operator, ImportHelper):
                 item.frames = "{}-{}".format(item.frame_start, item.frame_end)
 
         if valid_files:
-             self.report({'INFO'}, "Added {} to the list".format(", ".join(valid_files)))
+             self.report({'INFO'}, "Added {} to the list".format(name_list(valid_files)))
+        if queued_files:
+            self.report({'INFO'}, "Skipped {}, already in the list".format(name_list(queued_files)))
         if invalid_files:
-            self.report({'WARNING'}, "Skipped {}, invalid .blend file(s)".format(", ".join(invalid_files)))
+            self.report({'WARNING'}, "Skipped {}, invalid .blend file(s)".format(name_list(invalid_files)))
 
         lum.batch_render_idx = len(lum.batch_render_coll)-1
         if bpy.app.version < (4, 1, 0): self.display_popup(context)
@@ -704,7 +984,8 @@ class LOOM_OT_batch_list_actions(bpy.types.Operator):
             ('UP', "Up", ""),
             ('DOWN', "Down", ""),
             ('REMOVE', "Remove", ""),
-            ('ADD', "Add", "")))
+            ('ADD', "Add", ""),
+            ('DUPLICATE', "Duplicate", "Add a variant of the item (other scene or camera)")))
 
     def invoke(self, context, event):
         scn = context.scene
@@ -732,6 +1013,18 @@ class LOOM_OT_batch_list_actions(bpy.types.Operator):
                 self.report({'INFO'}, info)
                 lum.batch_render_coll.remove(idx)
 
+            elif self.action == 'DUPLICATE':
+                names = {i.name for i in lum.batch_render_coll}
+                variant = lum.batch_render_coll.add()
+                for prop in item.bl_rna.properties:
+                    if not prop.is_readonly and prop.identifier != "rna_type":
+                        setattr(variant, prop.identifier, getattr(item, prop.identifier))
+                variant.name = next(n for n in ("{}.{:03d}".format(item.name, i) \
+                    for i in range(1, len(names) + 2)) if n not in names)
+                variant.rid = len(lum.batch_render_coll)
+                lum.batch_render_coll.move(len(lum.batch_render_coll) - 1, idx + 1)
+                lum.batch_render_idx = idx + 1
+
         if self.action == 'ADD':
             bpy.ops.loom.batch_select_blends('INVOKE_DEFAULT')
             lum.batch_render_idx = len(lum.batch_render_coll)
@@ -775,22 +1068,15 @@ class LOOM_OT_batch_dialog_reset(bpy.types.Operator):
 
 
 class LOOM_OT_batch_remove_doubles(bpy.types.Operator):
-    """Remove Duplicates in List based on the filename"""
+    """Remove Duplicates in List based on the filename, scene and camera"""
     bl_idname = "loom.batch_remove_doubles"
     bl_label = "Remove All Duplicates?"
     bl_options = {'INTERNAL'}
 
-    doubles = []
-
     def find_duplicates(self, context):
-        path_lookup = {}
-        for c, i in enumerate(context.scene.loom.batch_render_coll):
-            path_lookup.setdefault(i.path, []).append(i.name)
-
-        for path, names in path_lookup.items():
-            for i in names[1:]:
-                self.doubles.append(i)
-        return len(self.doubles)
+        """Indices of all duplicates, descending"""
+        return duplicate_indices(
+            item_key(i.path, i.scene, i.camera) for i in context.scene.loom.batch_render_coll)
 
     @classmethod
     def poll(cls, context):
@@ -799,20 +1085,18 @@ class LOOM_OT_batch_remove_doubles(bpy.types.Operator):
     def execute(self, context):
         lum = context.scene.loom
         removed_items = []
-        for i in self.doubles:
-            item_id = lum.batch_render_coll.find(i)
-            lum.batch_render_coll.remove(item_id)
-            removed_items.append(i)
+        for idx in self.find_duplicates(context):
+            removed_items.append(lum.batch_render_coll[idx].name)
+            lum.batch_render_coll.remove(idx)
 
         lum.batch_render_idx = (len(lum.batch_render_coll)-1)
         self.report({'INFO'}, "{} {} removed: {}".format(
                     len(removed_items),
                     "items" if len(removed_items) > 1 else "item",
-                    ', '.join(set(removed_items))))
+                    name_list(sorted(set(removed_items)))))
         return {'FINISHED'}
 
     def invoke(self, context, event):
-        self.doubles.clear()
         if self.find_duplicates(context):
             return context.window_manager.invoke_confirm(self, event)
         else:
@@ -820,6 +1104,176 @@ class LOOM_OT_batch_remove_doubles(bpy.types.Operator):
             return {'FINISHED'}
 
 
+class LOOM_OT_batch_bulk_action(bpy.types.Operator):
+    """Apply an action to all selected items of the list"""
+    bl_idname = "loom.batch_bulk_action"
+    bl_label = "Loom Batch Bulk Action"
+    bl_options = {'INTERNAL'}
+
+    action: bpy.props.EnumProperty(
+        items=(
+            ('SELECT', "Select All", ""),
+            ('DESELECT', "Deselect All", ""),
+            ('INVERT', "Invert Selection", ""),
+            ('TOP', "Move to Top", "Move the selected items to the top of the queue"),
+            ('BOTTOM', "Move to Bottom", "Move the selected items to the bottom of the queue"),
+            ('ENCODE', "Encode", "Encode the selected items"),
+            ('NO_ENCODE', "Do not Encode", "Do not encode the selected items"),
+            ('REMOVE', "Remove", "Remove the selected items"),
+            ('REMOVE_MISSING', "Remove Missing", "Remove all items whose blend-file does not exist")))
+
+    @classmethod
+    def poll(cls, context):
+        return bool(context.scene.loom.batch_render_coll)
+
+    def execute(self, context):
+        lum = context.scene.loom
+        coll = lum.batch_render_coll
+        selection = [False] * len(coll)
+        coll.foreach_get("select", selection)
+
+        if self.action in ('SELECT', 'DESELECT', 'INVERT'):
+            """ One call for all items instead of setting them one by one """
+            if self.action == 'INVERT':
+                selection = [not s for s in selection]
+            else:
+                selection = [self.action == 'SELECT'] * len(coll)
+            coll.foreach_set("select", selection)
+            return {'FINISHED'}
+
+        indices = [c for c, s in enumerate(selection) if s]
+        if self.action == 'REMOVE_MISSING':
+            indices = [c for c, i in enumerate(coll) if not i.snapshot_id and not os.path.isfile(i.path)]
+        if not indices:
+            self.report({'INFO'}, "No items affected")
+            return {'CANCELLED'}
+
+        if self.action in ('ENCODE', 'NO_ENCODE'):
+            flags = [False] * len(coll)
+            coll.foreach_get("encode_flag", flags)
+            for c in indices:
+                flags[c] = self.action == 'ENCODE'
+            coll.foreach_set("encode_flag", flags)
+
+        elif self.action == 'TOP':
+            for target, c in enumerate(indices):
+                coll.move(c, target)
+            lum.batch_render_idx = 0
+
+        elif self.action == 'BOTTOM':
+            last = len(coll) - 1
+            for offset, c in enumerate(reversed(indices)):
+                coll.move(c, last - offset)
+            lum.batch_render_idx = last
+
+        else:
+            """ Remove from the back, the indices in front stay valid """
+            for c in reversed(indices):
+                coll.remove(c)
+            lum.batch_render_idx = min(lum.batch_render_idx, len(coll) - 1)
+
+        self.report({'INFO'}, "{}: {} item(s)".format(
+            bpy.types.UILayout.enum_item_name(self, "action", self.action), len(indices)))
+        return {'FINISHED'}
+
+
+class LOOM_OT_batch_export(bpy.types.Operator, ExportHelper):
+    """Export the batch list to a json or csv file"""
+    bl_idname = "loom.batch_export"
+    bl_label = "Export Batch List"
+    bl_options = {'INTERNAL'}
+
+    filename_ext = ".json"
+    check_extension = None # .json or .csv
+    filter_glob: bpy.props.StringProperty(
+        default="*.json;*.csv",
+        options={'HIDDEN'})
+
+    selected_only: bpy.props.BoolProperty(
+        name="Selected Only",
+        description="Only export the selected items",
+        default=False)
+
+    @classmethod
+    def poll(cls, context):
+        return bool(context.scene.loom.batch_render_coll)
+
+    def execute(self, context):
+        filepath = self.filepath
+        if not filepath.lower().endswith((".json", ".csv")):
+            filepath += self.filename_ext
+        entries = [{
+            "name": i.name, "path": i.path, "scene": i.scene, "camera": i.camera,
+            "frames": i.frames, "frame_start": i.frame_start, "frame_end": i.frame_end,
+            "input_filter": i.input_filter, "encode_flag": i.encode_flag,
+            "deliverables": i.deliverables} \
+            for i in context.scene.loom.batch_render_coll if i.select or not self.selected_only]
+        try:
+            count = write_queue(filepath, entries)
+        except OSError as e:
+            self.report({'ERROR'}, "Can not export the batch list: {}".format(e))
+            return {"CANCELLED"}
+        self.report({'INFO'}, "{} items exported to {}".format(count, filepath))
+        return {'FINISHED'}
+
+
+class LOOM_OT_batch_import(bpy.types.Operator, ImportHelper):
+    """Add the items of a json or csv file to the batch list"""
+    bl_idname = "loom.batch_import"
+    bl_label = "Import Batch List"
+    bl_options = {'INTERNAL'}
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(
+        default="*.json;*.csv",
+        options={'HIDDEN'})
+
+    replace: bpy.props.BoolProperty(
+        name="Replace List",
+        description="Remove all items of the list before importing",
+        default=False)
+
+    skip_existing: bpy.props.BoolProperty(
+        name="Skip Existing",
+        description="Skip items with the same file, scene and camera as an item of the list",
+        default=True)
+
+    def execute(self, context):
+        lum = context.scene.loom
+        try:
+            entries, errors = read_queue(self.filepath)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, "Can not import the batch list: {}".format(e))
+            return {"CANCELLED"}
+
+        if self.replace:
+            lum.batch_render_coll.clear()
+        queued = {item_key(i.path, i.scene, i.camera) for i in lum.batch_render_coll}
+        codecs = {c for c, *_ in DELIVERABLE_ITEMS}
+        added = skipped = 0
+        for entry in entries:
+            key = item_key(entry["path"], entry.get("scene", ""), entry.get("camera", ""))
+            if self.skip_existing and key in queued:
+                skipped += 1
+                continue
+            queued.add(key)
+            item = lum.batch_render_coll.add()
+            item.rid = len(lum.batch_render_coll)
+            for field, value in entry.items():
+                if field == "deliverables":
+                    value = value.intersection(codecs)
+                setattr(item, field, value)
+            if not item.frames:
+                item.frames = "{}-{}".format(item.frame_start, item.frame_end)
+            added += 1
+
+        lum.batch_render_idx = len(lum.batch_render_coll) - 1
+        for error in errors[:5]:
+            self.report({'WARNING'}, error)
+        self.report({'INFO'}, "{} items imported, {} skipped, {} invalid".format(added, skipped, len(errors)))
+        return {'FINISHED'}
+
+
 class LOOM_OT_batch_active_item(bpy.types.Operator):
     """Print active Item"""
     bl_idname = "loom.batch_active_item"
@@ -884,16 +1338,111 @@ class LOOM_OT_batch_verify_input(bpy.types.Operator):
         return {'FINISHED'}
 
 
+""" Original paths of localized datablocks, restored before the file is saved """
+_localized = []
+
+
+def external_dependencies():
+    """Local datablocks referencing a single external file.
+
+    Libraries are not localized: the relative paths stored inside a library
+    (its textures and nested libraries) are resolved against its location
+    and would point into the cache.
+
+    Yields:
+        Tuple (datablock, absolute path)
+    """
+    for attr in ("images", "movieclips", "sounds", "fonts", "volumes", "cache_files"):
+        for block in getattr(bpy.data, attr):
+            if block.library or getattr(block, "packed_file", None):
+                continue # Linked data keeps the paths of its library
+            if attr == "images" and block.source != 'FILE':
+                continue # Sequences, UDIMs and generated images
+            if attr == "movieclips" and block.source != 'MOVIE':
+                continue
+            if attr in ("volumes", "cache_files") and block.is_sequence:
+                continue
+            if attr == "fonts" and block.filepath == "<builtin>":
+                continue
+            path = os.path.normpath(bpy.path.abspath(block.filepath))
+            if os.path.isfile(path):
+                yield block, path
+
+
+class LOOM_OT_localize_dependencies(bpy.types.Operator):
+    """Copy textures and other external files into the local dependency cache and use the cached files"""
+    bl_idname = "loom.localize_dependencies"
+    bl_label = "Localize Dependencies"
+    bl_options = {'INTERNAL'}
+
+    action: bpy.props.EnumProperty(
+        name="Action",
+        items=(
+            ('LOCALIZE', "Localize", "Use cached copies of all external files"),
+            ('RESTORE', "Restore", "Use the original paths again")),
+        default='LOCALIZE')
+
+    def remap(self, block, path):
+        block.filepath = path
+        if isinstance(block, bpy.types.Image) and block.has_data:
+            block.reload()
+
+    def execute(self, context):
+        addon_name = __package__.split('.')[0]
+        prefs = context.preferences.addons[addon_name].preferences
+
+        if self.action == 'RESTORE':
+            for block, path in reversed(_localized):
+                self.remap(block, path)
+            count = len(_localized)
+            _localized.clear()
+            print("Loom: {} original dependency path(s) restored".format(count))
+            return {'FINISHED'}
+
+        if _localized:
+            self.report({'INFO'}, "Dependencies already localized")
+            return {'CANCELLED'}
+
+        dependencies = list(external_dependencies())
+        cache = DependencyCache(
+            cache_root(bpy.path.abspath(prefs.cache_directory)),
+            max_size=int(prefs.cache_size * 1024**3))
+        cached, errors = cache.fetch_all(path for _, path in dependencies)
+        for path, error in errors.items():
+            print("WARNING: {} not cached ({})".format(path, error))
+
+        for block, path in dependencies:
+            if path in cached:
+                _localized.append((block, block.filepath))
+                self.remap(block, cached[path])
+
+        """ Pool workers share the cache, files used since the batch started stay """
+        since = float(os.environ.get("LOOM_BATCH_START") or 0) or None
+        try:
+            cache.evict(keep=cached.values(), since=since)
+            cache.save()
+        except OSError as e:
+            print("WARNING: Dependency cache index not written ({})".format(e.strerror or e))
+        print("Loom: {} dependencies localized ({} cached, {} copied)".format(
+            len(_localized), cache.hits, cache.misses))
+        return {'FINISHED'}
+
+
 # Classes for registration
 classes = (
     LOOM_OT_batch_dialog,
+    LOOM_OT_localize_dependencies,
     LOOM_OT_batch_snapshot,
+    LOOM_OT_batch_snapshot_clean,
     LOOM_OT_batch_selected_blends,
     LOOM_OT_scan_blends,
     LOOM_OT_batch_list_actions,
     LOOM_OT_batch_clear_list,
     LOOM_OT_batch_dialog_reset,
     LOOM_OT_batch_remove_doubles,
+    LOOM_OT_batch_bulk_action,
+    LOOM_OT_batch_export,
+    LOOM_OT_batch_import,
     LOOM_OT_batch_active_item,
     LOOM_OT_batch_default_range,
     LOOM_OT_batch_verify_input,
@@ -27,35 +27,55 @@ import bpy
 from bpy_extras.io_utils import ImportHelper
 import os
 import re
-import subprocess
-import errno
+import sqlite3
 from itertools import count, groupby
 from time import strftime
 
 # Import helpers
 from ..helpers.globals_utils import replace_globals
+from ..helpers.frame_utils import rangify_frames
+from ..helpers.render_history import latest_render
+from ..helpers.sequence_utils import (
+    split_sequence_path, scan_sequence, move_manifest, checksum_algorithm, frame_entry,
+    load_manifest, read_manifest, record_checksums)
+from ..helpers.encode_utils import (
+    CODECS, DELIVERABLE_ITEMS, ENCODE_PRESETS, deliverable_path, encode_args, preset_encoder)
+from ..helpers.capabilities import cached_entry, ffmpeg_capabilities, load_cache, missing_encoders
 
+# Import render history
+from .history_operators import history_database
+
+addon_name = __package__.split('.')[0]
+
+
+def verify_ffmpeg(prefs):
+    """Capabilities of the ffmpeg binary of the preferences, None if not available"""
+    if prefs.ffmpeg_path and prefs.ffmpeg_path != "ffmpeg":
+        if not os.path.isabs(prefs.ffmpeg_path) or prefs.ffmpeg_path.startswith('//'):
+            ffmpeg_bin = os.path.realpath(bpy.path.abspath(prefs.ffmpeg_path))
+            if os.path.isfile(ffmpeg_bin):
+                prefs.ffmpeg_path = ffmpeg_bin
+    return ffmpeg_capabilities(prefs)
+
+
+def unavailable_codecs(prefs):
+    """Codecs whose encoder is missing according to the capability cache (no probing)"""
+    cache = load_cache(prefs.capability_cache)
+    return missing_encoders(
+        cached_entry(cache, "ffmpeg", prefs.ffmpeg_path or "ffmpeg"),
+        ENCODE_PRESETS, preset_encoder)
+
+
+_codec_items = []
 
 def codec_callback(self, context):
-    codec = [
-        ('PRORES422', "Apple ProRes 422", ""),
-        ('PRORES422HQ', "Apple ProRes 422 HQ", ""),
-        ('PRORES422LT', "Apple ProRes 422 LT", ""),
-        ('PRORES422PR', "Apple ProRes 422 Proxy", ""),
-        ('PRORES4444', "Apple ProRes 4444", ""),
-        ('PRORES4444XQ', "Apple ProRes 4444 XQ", ""),
-        ('DNXHD422-08-036', "Avid DNxHD 422 8-bit 36Mbit", ""),
-        ('DNXHD422-08-145', "Avid DNxHD 422 8-bit 145Mbit", ""),
-        ('DNXHD422-08-145', "Avid DNxHD 422 8-bit 220Mbit", ""),
-        ('DNXHD422-10-185', "Avid DNxHD 422 10-bit 185Mbit", ""),
-        #('DNXHD422-10-440', "Avid DNxHD 422 10-bit 440Mbit", ""),
-        #('DNXHD444-10-350', "Avid DNxHD 422 10-bit 440Mbit", ""),
-        ('DNXHR-444', "Avid DNxHR 444 10bit", ""),
-        ('DNXHR-HQX', "Avid DNxHR HQX 10bit", ""),
-        ('DNXHR-HQ', "Avid DNxHR HQ 8bit", ""),
-        ('DNXHR-SQ', "Avid DNxHR SQ 8bit", "")
-    ]
-    return codec
+    prefs = context.preferences.addons[addon_name].preferences
+    missing = unavailable_codecs(prefs)
+    _codec_items[:] = [
+        (codec, name, "Encoder '{}' not available".format(preset_encoder(codec)), 'ERROR', i) \
+        if codec in missing else (codec, name, "", 'NONE', i) \
+        for i, (codec, name) in enumerate(CODECS)]
+    return _codec_items
 
 
 def colorspace_callback(self, context):
@@ -116,27 +136,19 @@ class LOOM_OT_encode_dialog(bpy.types.Operator):
         description="Confirm when done",
         default=True)
 
-    # https://avpres.net/FFmpeg/sq_ProRes.html, https://trac.ffmpeg.org/wiki/Encode/VFX
-    encode_presets = {
-        "PRORES422PR" : ["-c:v", "prores_ks", "-profile:v", 0],
-        "PRORES422LT" : ["-c:v", "prores_ks", "-profile:v", 1],
-        #"PRORES422" : ["-c:v", "prores", "-profile:v", 2, "-pix_fmt" "yuv422p10"], #["-c:v", "prores", "-profile:v", 2],
-        "PRORES422" : ["-c:v", "prores_ks", "-profile:v", 2],
-        "PRORES422HQ" : ["-c:v", "prores_ks", "-profile:v", 3],
-        "PRORES4444" : ["-c:v", "prores_ks", "-profile:v", 4, "-quant_mat", "hq", "-pix_fmt", "yuva444p10le"],
-        "PRORES4444XQ" : ["-c:v", "prores_ks", "-profile:v", 5, "-quant_mat", "hq", "-pix_fmt", "yuva444p10le"],
-        "DNXHD422-08-036" : ["-c:v", "dnxhd", "-vf", "scale=1920x1080,fps=25/1,format=yuv422p", "-b:v", "36M"],
-        "DNXHD422-08-145" : ["-c:v", "dnxhd", "-vf", "scale=1920x1080,fps=25/1,format=yuv422p", "-b:v", "145M"],
-        "DNXHD422-08-145" : ["-c:v", "dnxhd", "-vf", "scale=1920x1080,fps=25/1,format=yuv422p", "-b:v", "220M"],
-        "DNXHD422-10-185" : ["-c:v", "dnxhd", "-vf", "scale=1920x1080,fps=25/1,format=yuv422p10", "-b:v", "185M"],
-        #"DNXHD422-10-440" : ["-c:v", "dnxhd", "-vf", "scale=1920x1080,fps=25/1,format=yuv422p10", "-b:v", "440M"],
-        #"DNXHD444-10-350" : ["-c:v", "dnxhd", "-profile:v", "dnxhr_444", "-vf", "format=yuv444p10" "-b:v", "350M"],
-        "DNXHR-444" : ["-c:v", "dnxhd", "-profile:v", "dnxhr_444", "-vf", "format=yuv444p10"],
-        "DNXHR-HQX" : ["-c:v", "dnxhd", "-profile:v", "dnxhr_hqx", "-vf", "format=yuv422p10"],
-        "DNXHR-HQ" : ["-c:v", "dnxhd", "-profile:v", "dnxhr_hq", "-vf", "format=yuv422p"],
-        "DNXHR-SQ" : ["-c:v", "dnxhd", "-profile:v", "dnxhr_sq", "-vf", "format=yuv422p"],
-        }
-    
+    multi_output: bpy.props.BoolProperty(
+        name="Additional Deliverables",
+        description="Encode additional movies in the same pass, the sequence is only read once",
+        default=False)
+
+    deliverables: bpy.props.EnumProperty(
+        name="Deliverables",
+        description="Additional movies to encode along with the selected codec",
+        items=DELIVERABLE_ITEMS,
+        options={'ENUM_FLAG'})
+
+    encode_presets = ENCODE_PRESETS
+
     def missing_frames(self, frames):
         return sorted(set(range(frames[0], frames[-1] + 1)).difference(frames))
 
@@ -145,15 +157,6 @@ class LOOM_OT_encode_dialog(bpy.types.Operator):
         G=(list(x) for _,x in groupby(frames, lambda x,c=count(): next(c)-x))
         return ",".join("-".join(map(str,(g[0],g[-1])[:len(g)])) for g in G)
 
-    def verify_app(self, cmd):
-        try:
-            subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except OSError as e:
-
-            if e.errno == errno.ENOENT:
-                return False
-        return True
-
     def determine_type(self, val): 
         #val = ast.literal_eval(s)
         if (isinstance(val, int)):
@@ -182,23 +185,9 @@ class LOOM_OT_encode_dialog(bpy.types.Operator):
         lum = context.scene.loom
         image_sequence = {}
         
-        """ Verify ffmpeg """
-        ffmpeg_error = False
-        if not prefs.ffmpeg_path:
-            if self.verify_app(["ffmpeg", "-h"]):
-                prefs.ffmpeg_path = "ffmpeg"
-            else:
-                ffmpeg_error = True
-        
-        elif prefs.ffmpeg_path and prefs.ffmpeg_path != "ffmpeg":
-            if not os.path.isabs(prefs.ffmpeg_path) or prefs.ffmpeg_path.startswith('//'):
-                ffmpeg_bin = os.path.realpath(bpy.path.abspath(prefs.ffmpeg_path))
-                if os.path.isfile(ffmpeg_bin): 
-                    prefs.ffmpeg_path = ffmpeg_bin            
-            if not self.verify_app([prefs.ffmpeg_path, "-h"]):
-                ffmpeg_error = True
-        
-        if ffmpeg_error:
+        """ Verify ffmpeg (cached) """
+        ffmpeg_info = verify_ffmpeg(prefs)
+        if not ffmpeg_info:
             error_message = "Path to ffmpeg binary not set in addon preferences"
             if not self.options.is_invoke:
                 print (error_message)
@@ -258,12 +247,8 @@ class LOOM_OT_encode_dialog(bpy.types.Operator):
 
         hashes = filename_noext.count('#')
         name_real = filename_noext.replace("#", "")
-        file_pattern = r"{fn}(\d{{{ds}}})\.?{ex}$".format(fn=name_real, ds=hashes, ex=extension)
 
-        for f in os.scandir(basedir):
-            if f.name.endswith(extension) and f.is_file():
-                match = re.match(file_pattern, f.name, re.IGNORECASE)
-                if match: image_sequence[int(match.group(1))] = os.path.join(basedir, f.name)
+        image_sequence = scan_sequence(basedir, name_real, hashes, extension)
 
         if not len(image_sequence) > 1:
             self.report({'ERROR'},"'{}' cannot be found on disk".format(filename))
@@ -314,9 +299,20 @@ class LOOM_OT_encode_dialog(bpy.types.Operator):
         """ Format image sequence for ffmpeg """
         fn_ffmpeg = filename_noext.replace("#"*hashes, "%0{}d{}".format(hashes, extension))
         fp_ffmpeg = os.path.join(basedir, fn_ffmpeg) # "{}%0{}d{}".format(filename_noext, 4, ext)
-        cli_args = ["-start_number", frame_numbers[0], "-apply_trc", self.colorspace, "-i", fp_ffmpeg] 
-        cli_args += self.encode_presets[self.codec]
-        cli_args += [mov_path] if self.fps == 25 else ["-r", self.fps, mov_path]
+        input_args = ["-start_number", frame_numbers[0], "-apply_trc", self.colorspace, "-i", fp_ffmpeg]
+
+        """ Decode once, split the frames to all deliverables """
+        outputs = [(self.codec, mov_path)]
+        if self.multi_output:
+            outputs += [(c, deliverable_path(mov_path, c)) \
+                for c, *_ in DELIVERABLE_ITEMS if c in self.deliverables and c != self.codec]
+
+        missing = missing_encoders(ffmpeg_info, [c for c, _ in outputs], preset_encoder)
+        if missing:
+            self.report({'ERROR'}, "Encoder not available in ffmpeg {}: {}".format(
+                ffmpeg_info["version"], ", ".join(sorted(missing))))
+            return {"CANCELLED"}
+        cli_args = encode_args(input_args, outputs, fps=self.fps if self.fps != 25 else None)
 
         # TODO - PNG support
         if extension in (".png", ".PNG"):
@@ -333,7 +329,8 @@ class LOOM_OT_encode_dialog(bpy.types.Operator):
             force_bash=prefs.bash_flag,
             pause=self.pause)
 
-        self.report({'INFO'}, "Encoding {}{} to {}".format(filename_noext, extension, mov_path))
+        self.report({'INFO'}, "Encoding {}{} to {}".format(
+            filename_noext, extension, ", ".join(p for _, p in outputs)))
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -364,6 +361,7 @@ class LOOM_OT_encode_dialog(bpy.types.Operator):
         sub.prop(lum, "sequence_encode", text="")
         if lum.sequence_encode:
             sub.operator("loom.image_sequence_verify", icon='GHOST_ENABLED', text="")
+            sub.operator("loom.sequence_checksums", icon='LOCKED', text="")
             sub.operator("loom.open_folder", 
                 icon="DISK_DRIVE", text="").folder_path = os.path.dirname(lum.sequence_encode)
         else:
@@ -387,7 +385,22 @@ class LOOM_OT_encode_dialog(bpy.types.Operator):
         col = split.column(align=True)
         col.label(text="Codec:")
         col = split.column(align=True)
-        col.prop(self, "codec", text="")
+        sub = col.row(align=True)
+        sub.prop(self, "codec", text="")
+        sub.prop(self, "multi_output", text="", icon='DUPLICATE')
+
+        if self.multi_output:
+            split = layout.split(factor=split_width)
+            col = split.column(align=True)
+            col.label(text="Deliverables:")
+            col = split.column(align=True)
+            grid = col.grid_flow(columns=2, even_columns=True, align=True)
+            missing = unavailable_codecs(prefs)
+            for codec, *_ in DELIVERABLE_ITEMS:
+                if codec != self.codec:
+                    sub = grid.row(align=True)
+                    sub.enabled = codec not in missing
+                    sub.prop_enum(self, "deliverables", codec)
 
         split = layout.split(factor=split_width)
         col = split.column(align=True)
@@ -518,12 +531,8 @@ class LOOM_OT_rename_dialog(bpy.types.Operator):
 
         hashes = filename_noext.count('#')
         name_real = filename_noext.replace("#", "")
-        file_pattern = r"{fn}(\d{{{ds}}})\.?{ex}$".format(fn=name_real, ds=hashes, ex=extension)
 
-        for f in os.scandir(basedir):
-            if f.name.endswith(extension) and f.is_file():
-                match = re.match(file_pattern, f.name, re.IGNORECASE)
-                if match: image_sequence[int(match.group(1))] = os.path.join(basedir, f.name)
+        image_sequence = scan_sequence(basedir, name_real, hashes, extension)
 
         if not len(image_sequence) > 1:
             self.report({'WARNING'},"No valid image sequence")
@@ -537,10 +546,11 @@ class LOOM_OT_rename_dialog(bpy.types.Operator):
         user_name = new_name.replace("#", "")
         user_hashes = new_name.count('#')
         if not user_hashes: user_hashes = hashes
-        renamed = []
+        renamed, renumbered = [], []
 
         # Rename the sequence temporary if already in place (windows issue)
         # -> os.rename fails in case the upcoming file has the same name
+        original_frames = list(image_sequence.keys())
         if user_name == name_real and user_hashes == hashes:
             image_sequence_tmp = {}
             for c, (k, v) in enumerate(image_sequence.items(), start=1):
@@ -562,6 +572,11 @@ class LOOM_OT_rename_dialog(bpy.types.Operator):
             fp = os.path.join(basedir, "{}{}{}".format(user_name, num, extension))
             os.rename(v, fp)
             renamed.append(fp)
+            renumbered.append(int(num))
+
+        """ The manifest follows the frames """
+        move_manifest(basedir, name_real, hashes, extension,
+            user_name, user_hashes, zip(original_frames, renumbered))
         
         if len(renamed) > 0:
             sn = "{}{}".format(user_name, '#'*user_hashes)
@@ -719,11 +734,7 @@ class LOOM_OT_load_image_sequence(bpy.types.Operator, ImportHelper):
         """ Verify image sequence on disk (Scan directory) """
         if self.verify_sequence:
             hashes = sequence_name.count('#')
-            file_pattern = r"{fn}(\d{{{ds}}})\.?{ex}$".format(fn=name_real, ds=hashes, ex=ext)
-            for f in os.scandir(basedir):
-                if f.name.endswith(ext) and f.is_file():
-                    match = re.match(file_pattern, f.name, re.IGNORECASE)
-                    if match: image_sequence[int(match.group(1))] = os.path.join(basedir, f.name)
+            image_sequence = scan_sequence(basedir, name_real, hashes, ext)
 
             if not len(image_sequence) > 1:
                 self.report({'WARNING'},"No valid image sequence")
@@ -895,12 +906,8 @@ class LOOM_OT_encode_verify_image_sequence(bpy.types.Operator):
 
         hashes = filename_noext.count('#')
         name_real = filename_noext.replace("#", "")
-        file_pattern = r"{fn}(\d{{{ds}}})\.?{ex}$".format(fn=name_real, ds=hashes, ex=ext)
 
-        for f in os.scandir(basedir):
-            if f.name.endswith(ext) and f.is_file():
-                match = re.match(file_pattern, f.name, re.IGNORECASE)
-                if match: image_sequence[int(match.group(1))] = os.path.join(basedir, f.name)
+        image_sequence = scan_sequence(basedir, name_real, hashes, ext)
 
         if not len(image_sequence) > 1:
             self.report({'ERROR'},"Specified image sequence not found on disk")
@@ -967,12 +974,19 @@ class LOOM_OT_encode_auto_paths(bpy.types.Operator):
         num_suff = self.number_suffix(filename_noext)
         report_msg = "Sequence path set based on default output path"
 
-        if lum.render_collection and not self.default_path:
-            latest_frame = lum.render_collection[-1]
-            basedir = os.path.dirname(bpy.path.abspath(replace_globals(latest_frame.file_path, addon_name))) # Absolute or Relative?
-            num_suff = "0".zfill(latest_frame.padded_zeros)
-            filename_noext = replace_globals(latest_frame.name, addon_name) + num_suff
-            ext = ".{}".format(latest_frame.image_format)
+        latest = None
+        if not self.default_path:
+            try:
+                latest = latest_render(history_database(context), bpy.data.filepath, context.scene.name)
+            except (OSError, sqlite3.Error) as e:
+                self.report({'WARNING'}, "Render history not available: {}".format(e))
+
+        if latest:
+            basedir = latest["folder"] or os.path.dirname(
+                bpy.path.abspath(replace_globals(latest["output_path"], addon_name))) # Absolute or Relative?
+            num_suff = "0".zfill(latest["padded_zeros"])
+            filename_noext = replace_globals(latest["name"], addon_name) + num_suff
+            ext = ".{}".format(latest["image_format"])
             report_msg = "Sequence path set based on latest Loom render"
         
         if not lum.movie_path:
@@ -1026,11 +1040,7 @@ class LOOM_OT_fill_sequence_gaps(bpy.types.Operator):
         """ Scan directory """
         hashes = filename_noext.count('#')
         name_real = filename_noext.replace("#", "")
-        file_pattern = r"{fn}(\d{{{ds}}})\.?{ex}$".format(fn=name_real, ds=hashes, ex=ext)
-        for f in os.scandir(basedir):
-            if f.name.endswith(ext) and f.is_file():
-                match = re.match(file_pattern, f.name, re.IGNORECASE)
-                if match: image_sequence[int(match.group(1))] = os.path.join(basedir, f.name)
+        image_sequence = scan_sequence(basedir, name_real, hashes, ext)
 
         if not len(image_sequence) > 1:
             self.report({'WARNING'},"No valid image sequence")
@@ -1041,6 +1051,7 @@ class LOOM_OT_fill_sequence_gaps(bpy.types.Operator):
         #start_frame, end_frame = fn[0], fn[-1]
         missing_frame_list = self.missing_frames(frame_numbers)
         frames_to_copy = {}
+        copies = [(f, f) for f in frame_numbers]
 
         if missing_frame_list:
             f_prev = frame_numbers[0]
@@ -1048,6 +1059,7 @@ class LOOM_OT_fill_sequence_gaps(bpy.types.Operator):
                 if frame not in image_sequence:
                     path_copy = self.re_path(basedir, name_real, frame, hashes, ext)
                     frames_to_copy.setdefault(image_sequence[f_prev], []).append(path_copy)
+                    copies.append((f_prev, frame))
                 else:
                     f_prev = frame
 
@@ -1056,10 +1068,12 @@ class LOOM_OT_fill_sequence_gaps(bpy.types.Operator):
             for i in range(context.scene.frame_start, frame_numbers[0]):
                 path_copy = self.re_path(basedir, name_real, i, hashes, ext)
                 frames_to_copy.setdefault(image_sequence[frame_numbers[0]], []).append(path_copy)
+                copies.append((frame_numbers[0], i))
             
             for o in range(frame_numbers[-1]+1, context.scene.frame_end+1):
                 path_copy = self.re_path(basedir, name_real, o, hashes, ext)
                 frames_to_copy.setdefault(image_sequence[frame_numbers[-1]], []).append(path_copy)
+                copies.append((frame_numbers[-1], o))
         
         """ Copy the Images """
         if frames_to_copy:
@@ -1068,6 +1082,7 @@ class LOOM_OT_fill_sequence_gaps(bpy.types.Operator):
                 for src, dest in frames_to_copy.items():
                         for ff in dest:
                             copyfile(src, ff)
+                move_manifest(basedir, name_real, hashes, ext, name_real, hashes, copies)
                 self.report({'INFO'},"Successfully copied all missing frames")
                 #if self.options.is_invoke:
                 lum.lost_frames = ""
@@ -1082,6 +1097,126 @@ class LOOM_OT_fill_sequence_gaps(bpy.types.Operator):
 
 
 
+class LOOM_OT_sequence_checksums(bpy.types.Operator):
+    """Compute the checksums of all frames, report duplicate and changed frames"""
+    bl_idname = "loom.sequence_checksums"
+    bl_label = "Sequence Checksums"
+    bl_options = {'REGISTER'}
+
+    sequence_path: bpy.props.StringProperty(
+        name="Sequence",
+        description="Image sequence, the sequence of the encode dialog if not set",
+        options={'SKIP_SAVE'})
+
+    reference: bpy.props.StringProperty(
+        name="Compare with",
+        description="Manifest of another copy of the sequence (e.g. the farm output), " \
+            "compares with the previous run if not set",
+        subtype='FILE_PATH')
+
+    threads: bpy.props.IntProperty(
+        name="Threads",
+        description="Number of threads reading the frames (0 uses all cores)",
+        default=0,
+        min=0)
+
+    _executor = _timer = _reference = _algorithm = _sequence = None
+    _futures = {}
+
+    def finish(self, context):
+        if self._timer:
+            context.window_manager.event_timer_remove(self._timer)
+            context.window_manager.progress_end()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        entries = {}
+        for frame, f in self._futures.items():
+            if f.done() and not f.cancelled() and f.result():
+                entries[frame] = f.result()
+        if len(entries) < len(self._futures):
+            self.report({'WARNING'}, "{} frame(s) could not be read".format(len(self._futures) - len(entries)))
+
+        try:
+            result = record_checksums(*self._sequence, entries, self._algorithm, self._reference)
+        except OSError as e:
+            self.report({'ERROR'}, "Manifest not written: {}".format(e.strerror))
+            return {"CANCELLED"}
+
+        self.report({'INFO'}, "{} frames hashed ({})".format(len(entries), self._algorithm))
+        if result["duplicates"]:
+            self.report({'WARNING'}, "Identical frames: {}".format(
+                " ".join("[{}]".format(rangify_frames(g)) for g in result["duplicates"])))
+        if result["compared"]:
+            for key, label in (("changed", "Changed"), ("missing", "Missing"), ("added", "Additional")):
+                if result[key]:
+                    self.report({'ERROR'}, "{} frames: {}".format(label, rangify_frames(result[key])))
+            if not any(result[k] for k in ("changed", "missing", "added")):
+                self.report({'INFO'}, "All frames match the {}".format(
+                    "reference" if self.reference else "previous run"))
+        elif self.reference:
+            self.report({'WARNING'}, "Reference not compared (different checksum algorithm)")
+        return {"FINISHED"}
+
+    def execute(self, context):
+        from concurrent.futures import ThreadPoolExecutor, wait
+        path = self.sequence_path or context.scene.loom.sequence_encode
+        if not path:
+            self.report({'ERROR'}, "No image sequence specified")
+            return {"CANCELLED"}
+
+        basedir, name, digits, ext = split_sequence_path(os.path.realpath(bpy.path.abspath(path)))
+        frames = scan_sequence(basedir, name, digits, ext) if digits else {}
+        if not frames:
+            self.report({'ERROR'}, "No image sequence found ({})".format(path))
+            return {"CANCELLED"}
+
+        self._reference = None
+        if self.reference:
+            self._reference = load_manifest(bpy.path.abspath(self.reference))
+            if self._reference is None:
+                self.report({'ERROR'}, "Can not read the manifest {}".format(self.reference))
+                return {"CANCELLED"}
+
+        """ Use the algorithm of the manifest to compare with if available """
+        previous = self._reference or read_manifest(basedir, name, digits, ext, validate=False) or {}
+        self._algorithm = checksum_algorithm(previous.get("checksum_algorithm"))
+        self._sequence = (basedir, name, digits, ext)
+
+        """ Frames are memory mapped and hashed by a thread pool """
+        self._executor = ThreadPoolExecutor(max_workers=self.threads or os.cpu_count() or 4)
+        self._futures = {f: self._executor.submit(frame_entry, p, self._algorithm) for f, p in frames.items()}
+
+        if bpy.app.background or not context.window:
+            wait(self._futures.values())
+            return self.finish(context)
+
+        wm = context.window_manager
+        wm.progress_begin(0, len(self._futures))
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.modal_handler_add(self)
+        self.report({'INFO'}, "Hashing {} frames of {}{}.{}".format(len(frames), name, "#" * digits, ext))
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            context.window_manager.event_timer_remove(self._timer)
+            context.window_manager.progress_end()
+            self.report({'WARNING'}, "Checksums cancelled")
+            return {"CANCELLED"}
+
+        if event.type == 'TIMER':
+            done = sum(f.done() for f in self._futures.values())
+            context.window_manager.progress_update(done)
+            if done == len(self._futures):
+                return self.finish(context)
+
+        return {"PASS_THROUGH"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
 
 # Classes for registration
 classes = (
@@ -1092,4 +1227,5 @@ classes = (
     LOOM_OT_encode_verify_image_sequence,
     LOOM_OT_encode_auto_paths,
     LOOM_OT_fill_sequence_gaps,
+    LOOM_OT_sequence_checksums,
 )
@@ -0,0 +1,150 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Render history operators for Loom addon.
+
+Contains operators to import, export and clear the render history database.
+"""
+
+import bpy
+from bpy_extras.io_utils import ImportHelper, ExportHelper
+import os
+import sqlite3
+import time
+
+# Import helpers
+from ..helpers.render_history import (
+    history_path, log_renders, clear_renders, export_history, import_history)
+
+
+def history_database(context):
+    """Path to the render history database based on the addon preferences"""
+    addon_name = __package__.split('.')[0]
+    prefs = context.preferences.addons[addon_name].preferences
+    return history_path(bpy.path.abspath(prefs.history_directory))
+
+
+def migrate_render_collection(scene, db_path):
+    """Move the legacy render log stored in the blend-file to the database.
+
+    The legacy log has no times, entries are dated now in their original
+    order and keep their index as version, so none of them are merged.
+    """
+    lum = scene.loom
+    now = time.time()
+    count = len(lum.render_collection)
+    log_renders(db_path, [dict(
+        blend_file=bpy.data.filepath,
+        scene=scene.name,
+        output_path=render.file_path,
+        version=index,
+        name=render.name,
+        start_frame=render.start_frame,
+        end_frame=render.end_frame,
+        padded_zeros=render.padded_zeros,
+        image_format=render.image_format,
+        start_time=now - (count - index)) for index, render in enumerate(lum.render_collection)])
+    lum.render_collection.clear()
+
+
+class LOOM_OT_history_export(bpy.types.Operator, ExportHelper):
+    """Export the render history to a json file"""
+    bl_idname = "loom.history_export"
+    bl_label = "Export Render History"
+    bl_options = {'INTERNAL'}
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(
+        default="*.json",
+        options={'HIDDEN'})
+
+    all_files: bpy.props.BoolProperty(
+        name="All Blend-Files",
+        description="Export the history of all blend-files, not only the current one",
+        default=True)
+
+    def execute(self, context):
+        db_path = history_database(context)
+        blend_file = None if self.all_files else bpy.data.filepath
+        try:
+            count = export_history(db_path, self.filepath, blend_file=blend_file)
+        except (OSError, sqlite3.Error) as e:
+            self.report({'ERROR'}, "Can not export render history: {}".format(e))
+            return {"CANCELLED"}
+        self.report({'INFO'}, "{} entries exported to {}".format(count, self.filepath))
+        return {'FINISHED'}
+
+
+class LOOM_OT_history_import(bpy.types.Operator, ImportHelper):
+    """Import render history entries from a json file"""
+    bl_idname = "loom.history_import"
+    bl_label = "Import Render History"
+    bl_options = {'INTERNAL'}
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(
+        default="*.json",
+        options={'HIDDEN'})
+
+    def execute(self, context):
+        if not os.path.isfile(self.filepath):
+            self.report({'WARNING'}, "File does not exist")
+            return {"CANCELLED"}
+        try:
+            count = import_history(history_database(context), self.filepath)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            self.report({'ERROR'}, "Can not import render history: {}".format(e))
+            return {"CANCELLED"}
+        self.report({'INFO'}, "{} entries imported".format(count))
+        return {'FINISHED'}
+
+
+class LOOM_OT_history_clear(bpy.types.Operator):
+    """Clear the render history of the current blend-file"""
+    bl_idname = "loom.history_clear"
+    bl_label = "Clear Render History"
+    bl_options = {'INTERNAL'}
+
+    all_files: bpy.props.BoolProperty(
+        name="All Blend-Files",
+        description="Clear the history of all blend-files",
+        default=False,
+        options={'SKIP_SAVE'})
+
+    def execute(self, context):
+        context.scene.loom.render_collection.clear()
+        blend_file = None if self.all_files else bpy.data.filepath
+        try:
+            count = clear_renders(history_database(context), blend_file=blend_file)
+        except sqlite3.Error as e:
+            self.report({'ERROR'}, "Can not clear render history: {}".format(e))
+            return {"CANCELLED"}
+        self.report({'INFO'}, "{} entries removed".format(count))
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+
+
+# Classes for registration
+classes = (
+    LOOM_OT_history_export,
+    LOOM_OT_history_import,
+    LOOM_OT_history_clear,
+)
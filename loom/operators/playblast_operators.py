@@ -24,10 +24,19 @@ Contains experimental playblast functionality for quick preview rendering.
 
 import bpy
 import os
+import re
+import sqlite3
 from itertools import count, groupby
 
 # Import helpers
 from ..helpers.frame_utils import filter_frames
+from ..helpers.globals_utils import replace_globals
+from ..helpers.proxy_utils import PROXY_FORMATS, find_proxies, proxy_commands, run_proxy_command
+from ..helpers.render_history import latest_render
+from ..helpers.sequence_utils import scan_sequence, split_sequence_path
+
+# Import render history
+from .history_operators import history_database
 
 
 class LOOM_OT_playblast(bpy.types.Operator):
@@ -62,15 +71,7 @@ class LOOM_OT_playblast(bpy.types.Operator):
         num_suffix = self.number_suffix(filename_noext)
         filename = filename_noext.replace(num_suffix,'') if num_suffix else filename_noext
         if extension: ext = extension
-        if digits:
-            file_pattern = r"{fn}(\d{{{ds}}})\.?{ex}$".format(fn=filename, ds=digits, ex=ext)
-        else:
-            file_pattern = r"{fn}(\d+)\.?{ex}".format(fn=filename, ex=ext)
-        
-        for f in os.scandir(basedir):
-            if f.name.endswith(ext) and f.is_file():
-                match = re.match(file_pattern, f.name, re.IGNORECASE)
-                if match: self._image_sequence[int(match.group(1))] = os.path.join(basedir, f.name)
+        self._image_sequence.update(scan_sequence(basedir, filename, digits, ext))
 
     def determine_type(self, val): 
         #val = ast.literal_eval(s)
@@ -88,7 +89,6 @@ class LOOM_OT_playblast(bpy.types.Operator):
 
     def execute(self, context):
         scn = context.scene
-        lum = scn.loom
         addon_name = __package__.split('.')[0]
 
         prefs = context.preferences.addons[addon_name].preferences #prefs.user_player = True
@@ -96,23 +96,31 @@ class LOOM_OT_playblast(bpy.types.Operator):
         preview_filetype = "jpg" if scn.render.image_settings.use_preview else None
         default_flag = False
         sequence_name = None
+        proxy_format = None
+        self._image_sequence.clear()
+
+        seq = None
+        if prefs.log_render:
+            try:
+                seq = latest_render(history_database(context), bpy.data.filepath, scn.name)
+            except (OSError, sqlite3.Error) as e:
+                self.report({'WARNING'}, "Render history not available: {}".format(e))
 
-        if len(lum.render_collection) > 0 and prefs.log_render:
-            seq = lum.render_collection[len(lum.render_collection)-1]
-            file_path = seq.file_path
-            seq_name = seq.name
+        if seq:
+            file_path = seq["output_path"]
+            seq_name = seq["name"]
             if any(ext in file_path for ext in glob_vars.keys()):
-                file_path = replace_globals(file_path)
+                file_path = replace_globals(file_path, addon_name)
             if any(ext in seq_name for ext in glob_vars.keys()):
-                seq_name = replace_globals(seq_name)
+                seq_name = replace_globals(seq_name, addon_name)
 
-            seq_dir = os.path.realpath(bpy.path.abspath(os.path.split(file_path)[0]))
-            seq_ext = seq.image_format if not preview_filetype else preview_filetype
+            seq_dir = seq["folder"] or os.path.realpath(bpy.path.abspath(os.path.split(file_path)[0]))
+            seq_ext = seq["image_format"] if not preview_filetype else preview_filetype
             sequence_name = "{}.{}".format(file_path, seq_ext)
 
             self.file_sequence(
-                filepath = os.path.join(seq_dir,"{}.{}".format(seq_name, seq.image_format)), 
-                digits = seq.padded_zeros, 
+                filepath = os.path.join(seq_dir,"{}.{}".format(seq_name, seq["image_format"])), 
+                digits = seq["padded_zeros"], 
                 extension = preview_filetype)
             
         else:
@@ -135,6 +143,13 @@ class LOOM_OT_playblast(bpy.types.Operator):
             self.report({'WARNING'},"No sequence in loom cache")
             return {'CANCELLED'}
         else:
+            """ Prefer proxies if available for all frames """
+            if prefs.playblast_proxies:
+                proxies, proxy_format = find_proxies(self._image_sequence)
+                if proxies:
+                    self._image_sequence.clear()
+                    self._image_sequence.update(proxies)
+                    self.report({'INFO'},"Proxy Playback")
             if preview_filetype: 
                 self.report({'WARNING'},"Preview Playback")
             if not default_flag:
@@ -189,6 +204,7 @@ class LOOM_OT_playblast(bpy.types.Operator):
             scn.frame_start = start_frame
             scn.frame_end = end_frame
             if preview_filetype: scn.render.image_settings.file_format = 'JPEG'
+            if proxy_format: scn.render.image_settings.file_format = proxy_format
 
             self.report({'INFO'}, "[Default-OP Playback] {}".format(sequence_name))
             self.report({'INFO'}, "Playblast {}-{}".format(start_frame, end_frame))
@@ -204,8 +220,143 @@ class LOOM_OT_playblast(bpy.types.Operator):
 
 
 
+class LOOM_OT_build_proxies(bpy.types.Operator):
+    """Build downscaled proxies of an image sequence for faster playback"""
+    bl_idname = "loom.build_proxies"
+    bl_label = "Build Proxies"
+    bl_options = {'REGISTER'}
+
+    sequence_path: bpy.props.StringProperty(
+        name="Image Sequence",
+        description="Path to the image sequence (uses the latest Loom render if not set)",
+        maxlen=1024,
+        subtype='FILE_PATH',
+        options={'SKIP_SAVE'})
+
+    scale: bpy.props.EnumProperty(
+        name="Scale",
+        description="Resolution of the proxies",
+        items=(
+            ('2', "1/2", "Half resolution"),
+            ('4', "1/4", "Quarter resolution")),
+        default='2')
+
+    file_format: bpy.props.EnumProperty(
+        name="Format",
+        description="File format of the proxies",
+        items=[(k, k.title() if k == 'WEBP' else k, "") for k in PROXY_FORMATS],
+        default='JPEG')
+
+    processes: bpy.props.IntProperty(
+        name="Processes",
+        description="Number of ffmpeg processes running in parallel (0 = half of the available cores)",
+        default=0,
+        min=0)
+
+    overwrite: bpy.props.BoolProperty(
+        name="Overwrite",
+        description="Rebuild existing proxies",
+        default=False,
+        options={'SKIP_SAVE'})
+
+    _executor = _timer = None
+    _futures = []
+
+    def latest_sequence(self, context):
+        """ Latest Loom render or default output path """
+        addon_name = __package__.split('.')[0]
+        scn = context.scene
+        try:
+            seq = latest_render(history_database(context), bpy.data.filepath, scn.name)
+        except (OSError, sqlite3.Error):
+            seq = None
+        if seq and seq["folder"]:
+            seq_name = replace_globals(seq["name"], addon_name)
+            return os.path.join(seq["folder"], "{}{}.{}".format(
+                seq_name, "#" * seq["padded_zeros"], seq["image_format"]))
+        return bpy.path.abspath(scn.render.frame_path(frame=scn.frame_start, preview=False))
+
+    def finish(self, context):
+        if self._timer:
+            context.window_manager.event_timer_remove(self._timer)
+            context.window_manager.progress_end()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        errors = []
+        for f in self._futures:
+            if f.done() and not f.cancelled():
+                error = f.exception() or f.result()
+                if error: errors.append(str(error).strip())
+        for error in errors:
+            self.report({'ERROR'}, error)
+        return errors
+
+    def execute(self, context):
+        from concurrent.futures import ThreadPoolExecutor, wait
+        addon_name = __package__.split('.')[0]
+        prefs = context.preferences.addons[addon_name].preferences
+
+        path = self.sequence_path or self.latest_sequence(context)
+        basedir, name, digits, ext = split_sequence_path(os.path.realpath(bpy.path.abspath(path)))
+        frames = scan_sequence(basedir, name, digits, ext) if digits else {}
+        if not frames:
+            self.report({'ERROR'}, "No image sequence found ({})".format(path))
+            return {"CANCELLED"}
+
+        processes = self.processes or max(1, (os.cpu_count() or 2) // 2)
+        proxy_dir, commands = proxy_commands(
+            ffmpeg=bpy.path.abspath(prefs.ffmpeg_path) if prefs.ffmpeg_path else "ffmpeg",
+            frames=frames,
+            scale=int(self.scale),
+            file_format=self.file_format,
+            chunk_count=processes * 2,
+            overwrite=self.overwrite)
+
+        if not commands:
+            self.report({'INFO'}, "Proxies up to date: {}".format(proxy_dir))
+            return {'FINISHED'}
+        os.makedirs(proxy_dir, exist_ok=True)
+
+        """ Each chunk of frames is converted by its own ffmpeg process """
+        self._executor = ThreadPoolExecutor(max_workers=processes)
+        self._futures = [self._executor.submit(run_proxy_command, cmd) for cmd in commands]
+
+        if bpy.app.background or not context.window:
+            wait(self._futures)
+            if self.finish(context):
+                return {"CANCELLED"}
+            self.report({'INFO'}, "Proxies written to {}".format(proxy_dir))
+            return {'FINISHED'}
+
+        wm = context.window_manager
+        wm.progress_begin(0, len(self._futures))
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.modal_handler_add(self)
+        self.report({'INFO'}, "Building {} proxies in {}".format(len(self._futures), proxy_dir))
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.finish(context)
+            self.report({'WARNING'}, "Proxy generation cancelled")
+            return {"CANCELLED"}
+
+        if event.type == 'TIMER':
+            done = sum(f.done() for f in self._futures)
+            context.window_manager.progress_update(done)
+            if done == len(self._futures):
+                if self.finish(context):
+                    return {"CANCELLED"}
+                self.report({'INFO'}, "Proxies built")
+                return {'FINISHED'}
+
+        return {"PASS_THROUGH"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
 
 # Classes for registration
 classes = (
     LOOM_OT_playblast,
+    LOOM_OT_build_proxies,
 )
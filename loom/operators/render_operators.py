@@ -24,20 +24,88 @@ and render configuration.
 """
 
 import bpy
+import json
 import os
 import re
-import subprocess
+import sqlite3
+import tempfile
+import time
 from sys import platform
 from itertools import count, groupby
 
 # Import helpers
 from ..helpers.blender_compat import get_compositor_node_tree
-from ..helpers.frame_utils import filter_frames
+from ..helpers.frame_utils import filter_frames, split_subframes
+from ..helpers.globals_utils import replace_globals, global_keys, evaluate_globals, PathTemplate
+from ..helpers.job_spec import frame_intervals, read_spec, variant_input, write_spec
+from ..helpers.preset_utils import IDReference, preset_table, values_equal
+from ..helpers.frame_validation import verify_frames
+from ..helpers.render_history import log_render, log_frame_times
+from ..helpers.scratch_upload import ScratchUploader, scratch_root, scratch_path
+from ..helpers.sequence_utils import (
+    split_sequence_path, scan_sequence, checksum_algorithm, frame_entries, read_manifest, update_manifest)
 from ..helpers.version_utils import version_number
 
 # Import presets
 from ..presets.render_presets import LOOM_MT_render_presets
 
+# Import render history
+from .history_operators import history_database, migrate_render_collection
+
+addon_name = __package__.split('.')[0]
+
+
+def manifest_info(scene):
+    """Render settings stored in the manifest of a sequence"""
+    rndr = scene.render
+    scale = rndr.resolution_percentage / 100
+    return {
+        "resolution": [int(rndr.resolution_x * scale), int(rndr.resolution_y * scale)],
+        "fps": rndr.fps / rndr.fps_base,
+        "file_format": rndr.image_settings.file_format,
+        "color_depth": rndr.image_settings.color_depth,
+        "colorspace": {
+            "linear": rndr.image_settings.file_format in ('OPEN_EXR', 'OPEN_EXR_MULTILAYER', 'HDR'),
+            "display_device": scene.display_settings.display_device,
+            "view_transform": scene.view_settings.view_transform,
+            "look": scene.view_settings.look},
+        "blend_file": bpy.data.filepath,
+        "scene": scene.name,
+    }
+
+
+def group_sequences(filepaths):
+    """Group frame paths by sequence.
+
+    Returns:
+        Dictionary {(folder, name, digits, extension): {frame number: path}}
+    """
+    sequences = {}
+    for filepath in filepaths:
+        basedir, name, digits, ext = split_sequence_path(filepath)
+        if digits:
+            number = int(os.path.splitext(os.path.basename(filepath))[0][-digits:])
+            sequences.setdefault((basedir, name, digits, ext), {})[number] = filepath
+    return sequences
+
+
+def write_manifests(scene, filepaths):
+    """Add rendered frames to the manifests of their sequences.
+
+    Returns:
+        List of error messages
+    """
+    errors, info = [], manifest_info(scene)
+    for (basedir, name, digits, ext), frames in group_sequences(filepaths).items():
+        previous = read_manifest(basedir, name, digits, ext, validate=False) or {}
+        algorithm = checksum_algorithm(previous.get("checksum_algorithm"))
+        try:
+            update_manifest(basedir, name, digits, ext,
+                frame_entries(frames, algorithm=algorithm), checksum_algorithm=algorithm, **info)
+        except OSError as e:
+            errors.append("Manifest of {}{} not written: {}".format(name, "#" * digits, e.strerror))
+    return errors
+
 
 class LOOM_OT_render_threads(bpy.types.Operator):
     """Set all available threads"""
@@ -46,8 +114,8 @@ class LOOM_OT_render_threads(bpy.types.Operator):
     bl_options = {'INTERNAL'}
 
     def execute(self, context):
-        from multiprocessing import cpu_count
-        context.scene.loom.threads = cpu_count()
+        from ..helpers.cpu_planner import available_cpus
+        context.scene.loom.threads = len(available_cpus())
         self.report({'INFO'}, "Set to core maximum")
         return {'FINISHED'}
 
@@ -86,7 +154,7 @@ class LOOM_OT_guess_frames(bpy.types.Operator):
         return ",".join("-".join(map(str,(g[0],g[-1])[:len(g)])) for g in G)
 
     def execute(self, context):
-        glob_vars = context.preferences.addons[__name__].preferences.global_variable_coll
+        glob_vars = context.preferences.addons[addon_name].preferences.global_variable_coll
         scn = context.scene
         lum = scn.loom
 
@@ -104,9 +172,9 @@ class LOOM_OT_guess_frames(bpy.types.Operator):
             output_folder = os.path.realpath(output_folder)
 
             if any(ext in file_name for ext in glob_vars.keys()):
-                    file_name = replace_globals(file_name)
+                    file_name = replace_globals(file_name, addon_name)
             if any(ext in output_folder for ext in glob_vars.keys()):
-                output_folder = replace_globals(output_folder)
+                output_folder = replace_globals(output_folder, addon_name)
 
             if not file_name:
                 given_filename = False
@@ -127,17 +195,13 @@ class LOOM_OT_guess_frames(bpy.types.Operator):
             filename_noext, extension = os.path.splitext(filename)
             hashes = filename_noext.count('#')
             name_real = filename_noext.replace("#", "")
-            file_pattern = r"{fn}(\d{{{ds}}})\.?{ex}$".format(fn=name_real, ds=hashes, ex=extension)
             seq_name = "{}{}{}".format(name_real, hashes*"#", extension)
 
             if not os.path.exists(basedir):
                 self.report({'INFO'}, 'Set to default range, "{}" does not exist on disk'.format(basedir))
                 return {"CANCELLED"}
 
-            for f in os.scandir(basedir):
-                if f.name.endswith(extension) and f.is_file():
-                    match = re.match(file_pattern, f.name, re.IGNORECASE)
-                    if match: image_sequence[int(match.group(1))] = os.path.join(basedir, f.name)
+            image_sequence = scan_sequence(basedir, name_real, hashes, extension)
 
             if not len(image_sequence) > 1:
                 if not given_filename:
@@ -244,6 +308,11 @@ class LOOM_OT_render_terminal(bpy.types.Operator):
         name="Render Preset",
         description="Pass a custom Preset.py")
 
+    group_subframes: bpy.props.BoolProperty(
+        name="Group Sub-frames",
+        description="Render all sub-frames of a frame in a row (Persistent Data)",
+        default=False)
+
     debug: bpy.props.BoolProperty(
         name="Debug Arguments",
         description="Print full argument list",
@@ -277,20 +346,27 @@ class LOOM_OT_render_terminal(bpy.types.Operator):
                 bpy.ops.wm.save_as_mainfile(
                     filepath=bpy.data.filepath)
 
-        python_expr = ("import bpy;" +\
-                "bpy.ops.render.image_sequence(" +\
-                "frames='{fns}', isolate_numbers={iel}," +\
-                "render_silent={cli}, digits={lzs}, render_preset='{pst}')").format(
-                    fns=self.frames,
-                    iel=self.isolate_numbers, 
-                    cli=True, 
-                    lzs=self.digits,
-                    pst=self.render_preset)
-
-        cli_args = ["-b", bpy.data.filepath, "--python-expr", python_expr]
-        
+        """ Frames are passed parsed, sub-frames as typed """
+        variant = {"digits": self.digits, "group_subframes": self.group_subframes}
+        frames = filter_frames(self.frames, context.scene.frame_step, self.isolate_numbers)
+        if frames and all(isinstance(f, int) for f in frames):
+            variant["intervals"] = frame_intervals(frames)
+        else:
+            variant.update(frames=self.frames, isolate_numbers=self.isolate_numbers)
+
+        spec_file = os.path.join(tempfile.gettempdir(), "loom-job-{}.json".format(
+            time.strftime("%Y%m%d-%H%M%S")))
+        try:
+            write_spec(spec_file, [variant], render_preset=self.render_preset)
+        except OSError as e:
+            self.report({'ERROR'}, "Can not write the job file: {}".format(e))
+            return {"CANCELLED"}
+
+        cli_args = ["-b", bpy.data.filepath]
         if self.properties.is_property_set("threads"):
             cli_args = cli_args + ["-t", "{}".format(self.threads)]
+        job_script = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "loom_job.py")
+        cli_args += ["--python-exit-code", "1", "--python", job_script, "--", spec_file]
 
         bpy.ops.loom.run_terminal( 
             debug_arguments=self.debug,
@@ -337,6 +413,34 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
         description="Sequencer Strips, Active Camera etc.",
         default=True)
 
+    group_subframes: bpy.props.BoolProperty(
+        name="Group Sub-frames",
+        description="Render all sub-frames of a frame in a row and keep the render data " \
+            "in memory between them (Persistent Data)",
+        default=False)
+
+    verify: bpy.props.BoolProperty(
+        name="Verify Frames",
+        description="Check the rendered frames and render missing or corrupt frames again",
+        default=False)
+
+    max_retries: bpy.props.IntProperty(
+        name="Retries",
+        description="Number of times invalid frames are rendered again",
+        default=2, min=0, max=10)
+
+    scratch: bpy.props.BoolProperty(
+        name="Local Scratch",
+        description="Render to a local folder and copy the frames to the output folder " \
+            "in the background (Preferences if not set)",
+        default=False)
+
+    result_file: bpy.props.StringProperty(
+        name="Result File",
+        description="Write the rendered sequences and invalid frames as json to this file " \
+            "(used by the batch workers)",
+        options={'HIDDEN', 'SKIP_SAVE'})
+
     _image_formats = {'BMP': 'bmp', 'IRIS': 'iris', 'PNG': 'png', 'JPEG': 'jpg', 
         'JPEG2000': 'jp2', 'TARGA': 'tga', 'TARGA_RAW': 'tga', 'CINEON': 'cin', 
         'DPX': 'dpx', 'OPEN_EXR_MULTILAYER': 'exr', 'OPEN_EXR': 'exr', 'HDR': 'hdr', 
@@ -344,9 +448,15 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
 
     _rendered_frames, _skipped_frames = [], []
     _timer = _frames = _stop = _rendering = _dec = _log = None
-    _output_path = _folder = _filename = _extension = None
+    _output_path = _folder = _filename = _extension = _final_path = _current_frame = None
+    _folder_prefix = _filename_template = None
     _subframe_flag = _temp_display_type = False
-    _output_nodes = {}
+    _output_nodes, _globals, _assigned = {}, {}, {}
+    _frame_paths, _unverified, _invalid_frames, _retries = {}, {}, {}, 0
+    _persistent_data = _uploader = _scratch_root = _render_start = None
+    _frame_times = {}
+    _preset_restore = []
+    _preset_scripted = False
     
     @classmethod
     def poll(cls, context):
@@ -357,6 +467,7 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
 
     def pre_render(self, scene, depsgraph):
         self._rendering = True
+        self._render_start = time.perf_counter()
         scene.loom.is_rendering = True
 
     def cancel_render(self, scene, depsgraph):
@@ -364,7 +475,75 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
         self.reset_output_paths(scene)
         self._rendered_frames.pop()
 
+    def upload_frame(self, scene, depsgraph):
+        """ The frame is written to the scratch folder, copy it to the output folder """
+        frame = self._current_frame
+        if frame in self._frame_paths:
+            self._uploader.submit(frame, scene.render.filepath, self._frame_paths[frame])
+
+    def uploads_pending(self):
+        return self._uploader is not None and self._uploader.pending() > 0
+
+    def finish_uploads(self):
+        """ Wait for the copies, failed uploads count as invalid frames """
+        if self._uploader is None:
+            return
+        self._uploader.wait()
+        self._invalid_frames.update(self._uploader.failed())
+        if bpy.app.handlers.render_write.count(self.upload_frame):
+            bpy.app.handlers.render_write.remove(self.upload_frame)
+        self._uploader.shutdown(self._scratch_root)
+        self._uploader = None
+
+    def apply_preset(self, context, scene, filepath):
+        """ Set the values of a preset which differ from the scene, the previous values are kept """
+        self._preset_restore = []
+        self._preset_scripted = False
+        try:
+            table = preset_table(filepath)
+        except OSError as e:
+            self.report({'WARNING'}, "Render preset not found: {}".format(e))
+            return
+        if table is None:
+            """ Preset contains more than assignments, run it as script (not restored) """
+            bpy.ops.script.execute_preset(filepath=filepath, menu_idname=LOOM_MT_render_presets.__name__)
+            self._preset_scripted = True
+            return
+
+        roots = {"bpy": bpy, "context": context, "scene": scene, "render": scene.render}
+        for root, attrs, value in table:
+            try:
+                owner = roots[root]
+                for attr in attrs[:-1]:
+                    owner = getattr(owner, attr)
+                if isinstance(value, IDReference):
+                    value = getattr(bpy.data, value.collection).get(value.name)
+                current = getattr(owner, attrs[-1])
+                if values_equal(current, value):
+                    continue
+                setattr(owner, attrs[-1], value)
+            except (AttributeError, TypeError, ValueError) as e:
+                print("Loom: Preset value {}.{} not applied: {}".format(root, ".".join(attrs), e))
+                continue
+            self._preset_restore.append((owner, attrs[-1], current))
+
+    def restore_preset(self):
+        """ Set all values changed by the preset back, the scene is left as it was """
+        for owner, attr, value in reversed(self._preset_restore):
+            try:
+                setattr(owner, attr, value)
+            except (AttributeError, TypeError, ValueError, ReferenceError):
+                pass
+        self._preset_restore = []
+
+    def record_time(self, frame):
+        """ Render time of whole frames, used to schedule parallel renders """
+        if self._render_start is not None and isinstance(frame, int):
+            self._frame_times[frame] = time.perf_counter() - self._render_start
+        self._render_start = None
+
     def post_render(self, scene, depsgraph):
+        self.record_time(self._frames[0])
         self._frames.pop(0)
         self._rendering = False
         scene.loom.is_rendering = False
@@ -372,32 +551,36 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
     def file_extension(self, file_format):
         return self._image_formats[file_format]
     
-    def subframes(self, sub_frames):
-        subs = []
-        for frame in sub_frames:
-            main_frame, sub_frame = repr(frame).split('.')
-            subs.append((int(main_frame), float('.' + sub_frame)))
-        return subs
-
-    def format_frame(self, file_name, frame, extension=None):
-        file_name = replace_globals(file_name)
-        if extension:
-            return "{f}{fn:0{lz}d}.{ext}".format(
-                f=file_name, fn=frame, lz=self.digits, ext=extension)
-        else:
-            return "{f}{fn:0{lz}d}_".format(
-                f=file_name, fn=frame, lz=self.digits)
-
-    def format_subframe(self, file_name, frame, extension=None):
-        file_name = replace_globals(file_name)
-        sub_frame = "{sf:.{dec}f}".format(sf = frame[1], dec=self._dec).split('.')[1]
-        if extension:
-            return "{f}{mf:0{lz}d}{sf}.{ext}".format(
-                f=file_name, mf=frame[0], lz=self.digits, 
-                sf=sub_frame, ext=extension)
-        else:
-            return "{f}{mf:0{lz}d}{sf}_".format(
-                f=file_name, mf=frame[0], lz=self.digits, sf=sub_frame)
+    def frame_suffix(self, frame):
+        if self._subframe_flag:
+            return "{mf:0{lz}d}{sf:0{dec}d}".format(mf=frame[0], lz=self.digits, sf=frame[1], dec=self._dec)
+        return "{fn:0{lz}d}".format(fn=frame, lz=self.digits)
+
+    def compile_paths(self):
+        """ Compile main and output node paths into templates """
+        keys = self._globals.keys()
+        self._folder_prefix = os.path.join(self._folder, "")
+        self._filename_template = PathTemplate(self._filename, keys)
+        templates = [self._filename_template]
+        for k, v in self._output_nodes.items():
+            if "File Slots" in v:
+                v["Base Path Template"] = PathTemplate(v["Base Path"], keys)
+                v["Slot Templates"] = [PathTemplate(p, keys) for p in v["File Slots"]]
+                templates += [v["Base Path Template"]] + v["Slot Templates"]
+            else:
+                v["Folder Template"] = PathTemplate(os.path.join(v["Folder"], ""), keys)
+                v["Filename Template"] = PathTemplate(v["Filename"], keys)
+                templates += [v["Folder Template"], v["Filename Template"]]
+        used = set().union(*(t.keys for t in templates))
+        self._globals = {key: expr for key, expr in self._globals.items() if key in used}
+        self._assigned = {}
+
+    def set_path(self, owner, attr, path):
+        """ Only assign changed paths, setting rna strings triggers updates """
+        key = (owner.as_pointer(), attr)
+        if self._assigned.get(key) != path:
+            setattr(owner, attr, path)
+            self._assigned[key] = path
 
     def safe_filename(self, file_name):
         if file_name:
@@ -420,6 +603,9 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
         return [n for n in tree.nodes if n.type=='OUTPUT_FILE'] if tree else []
 
     def reset_output_paths(self, scene):
+        if self._persistent_data is not None:
+            scene.render.use_persistent_data = self._persistent_data
+            self._persistent_data = None
         scene.render.filepath = self._output_path
         for k, v in self._output_nodes.items():
             k.base_path = v["Base Path"]
@@ -430,48 +616,86 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
     def frame_repath(self, scene, frame_number):
         ''' Set the frame, assamble main file and output node paths '''
         if self._subframe_flag:
-            scene.frame_set(frame_number[0], subframe=frame_number[1])
-            ff = self.format_subframe(self._filename, frame_number, self._extension)
+            scene.frame_set(frame_number[0], subframe=frame_number[1] / 10**self._dec)
         else:
             scene.frame_set(frame_number)
-            ff = self.format_frame(self._filename, frame_number, self._extension)
+        frame = self.frame_suffix(frame_number)
+        values = evaluate_globals(self._globals)
         
         """ Final main path assembly """
-        scene.render.filepath = os.path.join(self._folder, ff)
+        self._final_path = "{}{}{}.{}".format(
+            self._folder_prefix, self._filename_template.format(values), frame, self._extension)
+        if self._uploader is not None:
+            self.set_path(scene.render, "filepath", scratch_path(self._scratch_root, self._final_path))
+        else:
+            self.set_path(scene.render, "filepath", self._final_path)
                 
         for k, v in self._output_nodes.items():
             if "File Slots" in v:
-                k.base_path = replace_globals(k.base_path)
-                for c, f in enumerate(k.file_slots):
+                self.set_path(k, "base_path", v["Base Path Template"].format(values))
+                for f, t in zip(k.file_slots, v["Slot Templates"]):
                     if self._subframe_flag:
-                        f.path = self.format_subframe(v["File Slots"][c], frame_number)
+                        self.set_path(f, "path", "{}{}_".format(t.format(values), frame))
                     else:
-                        #f.path = self.format_frame(v["File Slots"][c], frame_number)
-                        f.path = replace_globals(v["File Slots"][c])
+                        self.set_path(f, "path", t.format(values))
             else:
+                of = v["Filename Template"].format(values)
                 if self._subframe_flag:
-                    of = self.format_subframe(v["Filename"], frame_number)
-                else:
-                    #of = self.format_frame(v["Filename"], frame_number)
-                    of = replace_globals(v["Filename"])
+                    of = "{}{}_".format(of, frame)
                 """ Final output node path assembly """
-                k.base_path = os.path.join(replace_globals(v["Folder"]), of)
+                self.set_path(k, "base_path", v["Folder Template"].format(values) + of)
+
+    def requeue_invalid(self):
+        """ Validate the frames rendered since the last check, queue invalid frames again """
+        if self._uploader is not None:
+            self._uploader.wait()
+            failed = self._uploader.failed()
+            self._uploader.forget(failed)
+        else:
+            failed = {}
+        self._invalid_frames = verify_frames({f: p for f, p in self._unverified.items() if f not in failed})
+        self._invalid_frames.update(failed)
+        self._unverified = {}
+        if not self._invalid_frames or self._retries >= self.max_retries:
+            return False
+
+        self._retries += 1
+        for frame in self._invalid_frames:
+            self._skipped_frames = [f for f in self._skipped_frames if f != frame]
+            try:
+                os.remove(self._frame_paths[frame])
+            except OSError:
+                pass
+        self._frames = sorted(self._invalid_frames)
+        message = "Rendering {} invalid frame(s) again (attempt {}/{})".format(
+            len(self._frames), self._retries, self.max_retries)
+        if self.render_silent: print (message)
+        else: self.report({'INFO'}, message)
+        return True
 
     def start_render(self, scene, frame, silent=False):
         rndr = scene.render
-        if not rndr.use_overwrite and os.path.isfile(rndr.filepath):
+        filepath = self._final_path
+        self._frame_paths[frame] = filepath
+        self._current_frame = frame
+        if not rndr.use_overwrite and os.path.isfile(filepath):
+            """ Not verified, the file may be the placeholder of another machine """
             self._skipped_frames.append(frame)
             if not silent:
                 self.post_render(scene, None)
             else:
                 print("Skipped frame: {} (already exists)".format(frame))
         else:
-            if rndr.use_placeholder and not os.path.isfile(rndr.filepath):
-                os.makedirs(os.path.dirname(rndr.filepath), exist_ok=True)
-                open(rndr.filepath, 'a').close()
+            self._unverified[frame] = filepath
+            """ The placeholder is always written to the output folder (other machines) """
+            if rndr.use_placeholder and not os.path.isfile(filepath):
+                os.makedirs(os.path.dirname(filepath), exist_ok=True)
+                open(filepath, 'a').close()
             
             if silent:
+                self._render_start = time.perf_counter()
                 bpy.ops.render.render(write_still=True)
+                self.record_time(frame)
             else:
                 bpy.ops.render.render("INVOKE_DEFAULT", write_still=True)
             if frame not in self._rendered_frames:
@@ -494,27 +718,71 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
                     return True
         return False
 
-    def log_sequence(self, scene, limit):
-        from time import ctime #lum.render_collection.clear()
-        lum = scene.loom
-        if len(lum.render_collection) == limit:
-            lum.render_collection.remove(0)
-        render = lum.render_collection.add()
-        render.render_id = len(lum.render_collection)
-        render.start_time = ctime()
-        render.start_frame = str(self._frames[0])
-        render.end_frame = str(self._frames[-1])
-        render.name = self._filename
-        render.file_path = self._output_path
-        render.padded_zeros = self.digits if not self._dec else self.digits + self._dec
-        render.image_format = self._extension
+    def log_sequence(self, context):
+        scene = context.scene
+        try:
+            db_path = history_database(context)
+            if scene.loom.render_collection:
+                migrate_render_collection(scene, db_path)
+            log_render(db_path,
+                blend_file=bpy.data.filepath,
+                scene=scene.name,
+                output_path=self._output_path,
+                version=scene.loom.output_render_version,
+                name=self._filename,
+                folder=self._folder,
+                start_frame=str(self._frames[0]),
+                end_frame=str(self._frames[-1]),
+                padded_zeros=self.digits if not self._dec else self.digits + self._dec,
+                image_format=self._extension)
+        except (OSError, sqlite3.Error) as e:
+            self.report({'WARNING'}, "Render history not available: {}".format(e))
+
+    def log_times(self, context):
+        if not self._frame_times:
+            return
+        try:
+            log_frame_times(history_database(context),
+                blend_file=bpy.data.filepath,
+                scene=context.scene.name,
+                output_path=self._output_path,
+                times=self._frame_times)
+        except (OSError, sqlite3.Error) as e:
+            print ("WARNING: Render times not logged: {}".format(e))
+
+    def write_manifest(self, scene):
+        """ Describe the rendered frames in the manifest of the sequence """
+        filepaths = [self._frame_paths[f] for f in self._rendered_frames \
+            if f in self._frame_paths and f not in self._invalid_frames]
+        for error in write_manifests(scene, filepaths):
+            if self.render_silent: print ("WARNING:", error)
+            else: self.report({'WARNING'}, error)
+
+    def write_result(self):
+        """ Main sequences (all frames of the input, also skipped ones) and invalid frames """
+        if not self.result_file:
+            return
+        sequences = group_sequences(self._frame_paths.values())
+        result = {
+            "sequences": [os.path.join(d, "{}{}.{}".format(n, "#" * ds, e)) for d, n, ds, e in sequences],
+            "rendered": len(self._rendered_frames),
+            "skipped": len(self._skipped_frames),
+            "invalid": {str(f): r for f, r in self._invalid_frames.items()},
+            "frame_times": {str(f): round(s, 3) for f, s in self._frame_times.items()},
+            "scene_modified": self._preset_scripted,
+        }
+        try:
+            with open(self.result_file, "w") as f:
+                json.dump(result, f)
+        except OSError as e:
+            print ("ERROR: Can not write {}: {}".format(self.result_file, e.strerror))
 
     def final_report(self):
         if self._rendered_frames:
             frame_count = len(self._rendered_frames)
             if isinstance(self._rendered_frames[0], tuple):
-                rendered = ', '.join("{mf}.{sf}".format(
-                    mf=i[0], sf=str(i[1]).split(".")[1]) for i in self._rendered_frames)
+                rendered = ', '.join("{mf}.{sf:0{dec}d}".format(
+                    mf=i[0], sf=i[1], dec=self._dec) for i in self._rendered_frames)
             else:
                 rendered = ','.join(map(str, self._rendered_frames))
             self.report({'INFO'}, "{} {} rendered.".format(
@@ -524,8 +792,8 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
                 
         if self._skipped_frames:
             if isinstance(self._skipped_frames[0], tuple):
-                skipped = ', '.join("{mf}.{sf}".format(
-                    mf=i[0], sf=str(i[1]).split(".")[1]) for i in self._skipped_frames)
+                skipped = ', '.join("{mf}.{sf:0{dec}d}".format(
+                    mf=i[0], sf=i[1], dec=self._dec) for i in self._skipped_frames)
             else:
                 skipped = ','.join(map(str, self._skipped_frames))
             
@@ -533,10 +801,18 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
                 {'WARNING'}, 
                 "Frame(s): {} skipped (would overwrite existing file(s))".format(skipped))
 
+        if self._invalid_frames:
+            invalid = ', '.join("{} ({})".format(
+                "{}.{:0{}d}".format(f[0], f[1], self._dec) if isinstance(f, tuple) else f, r) \
+                for f, r in sorted(self._invalid_frames.items()))
+            message = "Invalid frame(s) after {} retries: {}".format(self._retries, invalid)
+            if self.render_silent: print ("ERROR:", message)
+            self.report({'ERROR'}, message)
+
     def execute(self, context):
         scn = context.scene
         prefs = context.preferences
-        loom_prefs = prefs.addons[__name__].preferences
+        loom_prefs = prefs.addons[addon_name].preferences
         glob_vars = loom_prefs.global_variable_coll
 
         """ Filter user input """
@@ -582,13 +858,14 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
 
         """ Replace globals in main output path """
         if any(ext in self._folder for ext in glob_vars.keys()):
-            self._folder = replace_globals(self._folder)
+            self._folder = replace_globals(self._folder, addon_name)
             bpy.ops.loom.create_directory(directory=self._folder)
             if not os.path.isdir(self._folder):
                 self.report({'INFO'}, "Specified folder can not be created")
                 return {"CANCELLED"}
 
         """ Output node paths """
+        self._output_nodes = {}
         for out_node in self.out_nodes(scn):
             fd, fn = os.path.split(bpy.path.abspath(out_node.base_path))
             self._output_nodes[out_node] = {
@@ -605,32 +882,61 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
         
         """ Clear assigned frame numbers """
         self._skipped_frames.clear(), self._rendered_frames.clear()
+        self._frame_paths, self._unverified, self._invalid_frames, self._retries = {}, {}, {}, 0
+        self._frame_times, self._render_start = {}, None
 
         """ Determine whether given frames are subframes """
         if isinstance(self._frames[0], float):
-            self._frames = self.subframes(self._frames)
-            self._dec = max(map(lambda x: len(str(x[1]).split('.')[1]), self._frames))
+            self._frames, self._dec = split_subframes(self._frames)
             self._subframe_flag = True
 
+            """ Render the sub-frames of each frame in a row, the scene data is only synced once """
+            if self.group_subframes:
+                self._frames.sort()
+                self._persistent_data = scn.render.use_persistent_data
+                scn.render.use_persistent_data = True
+
+        """ Compile all paths once, per frame only the globals are evaluated """
+        self._globals = global_keys(addon_name)
+        self.compile_paths()
+
+        """ Local scratch: frames are copied to the output folder once written """
+        if not self.properties.is_property_set("scratch"):
+            self.scratch = loom_prefs.scratch_flag
+        self._uploader = None
+        if self.scratch:
+            self._scratch_root = scratch_root(bpy.path.abspath(loom_prefs.scratch_directory))
+            self._uploader = ScratchUploader(workers=loom_prefs.scratch_workers)
+            bpy.app.handlers.render_write.append(self.upload_frame)
+
         """ Logging """
-        if loom_prefs.log_render: self.log_sequence(scn, loom_prefs.log_render_limit)
+        if loom_prefs.log_render: self.log_sequence(context)
         
         """ Render silent """
         if self.render_silent:
-            """ Apply custom Render Preset """
+            """ Apply custom Render Preset, restored once all frames are rendered """
             if self.render_preset and self.render_preset != "EMPTY":
-                bpy.ops.script.execute_preset(
-                    filepath=os.path.join(loom_prefs.render_presets_path,self.render_preset),
-                    menu_idname=LOOM_MT_render_presets.__name__)
-            
-            for frame_number in self._frames:
-                self.frame_repath(scn, frame_number)
-                self.start_render(scn, frame_number, silent=True)
+                self.apply_preset(
+                    context, scn, os.path.join(loom_prefs.render_presets_path, self.render_preset))
+
+            try:
+                while True:
+                    for frame_number in self._frames:
+                        self.frame_repath(scn, frame_number)
+                        self.start_render(scn, frame_number, silent=True)
+                    if not (self.verify and self.requeue_invalid()):
+                        break
+            finally:
+                self.restore_preset()
 
             """ Reset output path & display results """
+            self.finish_uploads()
+            if loom_prefs.log_render: self.log_times(context)
+            self.write_manifest(scn)
+            self.write_result()
             self.final_report()
             self.reset_output_paths(scn)
-            return {"FINISHED"}
+            return {"CANCELLED"} if self._invalid_frames else {"FINISHED"}
 
         """ Add timer & handlers for modal """
         if not self.render_silent:
@@ -654,6 +960,14 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
         if event.type == 'TIMER':
             scn = context.scene
 
+            """ Keep the interface responsive until the last frames are copied """
+            if (not self._frames or self._stop) and self.uploads_pending():
+                return {"PASS_THROUGH"}
+
+            """ Verify the frames once the list is empty, invalid frames are added again """
+            if not self._frames and not self._stop and self.verify and self.requeue_invalid():
+                return {"PASS_THROUGH"}
+
             """ Determine whether frame list is empty or process is interrupted by the user """
             if not self._frames or self._stop: #if True in (not self._frames, self._stop is True):
                 context.window_manager.event_timer_remove(self._timer)
@@ -666,6 +980,11 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
                 context.preferences.view.render_display_type = self._temp_display_type
                 
                 """ Display results """
+                self.finish_uploads()
+                if context.preferences.addons[addon_name].preferences.log_render:
+                    self.log_times(context)
+                self.write_manifest(scn)
+                self.write_result()
                 self.final_report()
 
                 return {"FINISHED"}
@@ -681,6 +1000,105 @@ class LOOM_OT_render_image_sequence(bpy.types.Operator):
 
 
 
+class LOOM_OT_render_variants(bpy.types.Operator):
+    """Render several scenes or cameras of the blend-file within one session"""
+    bl_idname = "loom.render_variants"
+    bl_label = "Render Variants"
+    bl_options = {'INTERNAL'}
+
+    variants_file: bpy.props.StringProperty(
+        name="Variants",
+        description="Job spec or json list of variants: scene, camera, intervals or frames, " \
+            "isolate_numbers, output, result_file",
+        subtype='FILE_PATH')
+
+    verify: bpy.props.BoolProperty(
+        name="Verify Frames",
+        description="Check the rendered frames and render missing or corrupt frames again",
+        default=False)
+
+    max_retries: bpy.props.IntProperty(
+        name="Retries",
+        description="Number of times invalid frames are rendered again",
+        default=2, min=0, max=10)
+
+    render_preset: bpy.props.StringProperty(
+        name="Render Preset",
+        description="Pass a custom Preset.py")
+
+    camera_folders: bpy.props.BoolProperty(
+        name="Camera Folders",
+        description="Render camera variants into a sub-folder named after the camera",
+        default=True)
+
+    def render_variant(self, context, variant):
+        scene = bpy.data.scenes.get(variant.get("scene") or "", context.scene)
+        if variant.get("scene") and scene.name != variant["scene"]:
+            print("ERROR: Scene '{}' not found".format(variant["scene"]))
+            return False
+        camera = bpy.data.objects.get(variant.get("camera") or "")
+        if variant.get("camera") and (camera is None or camera.type != 'CAMERA'):
+            print("ERROR: Camera '{}' not found".format(variant["camera"]))
+            return False
+
+        """ Switch camera and output path, marker bindings would switch it back """
+        restore = [(scene, "camera", scene.camera), (scene.render, "filepath", scene.render.filepath)]
+        if variant.get("output"):
+            scene.render.filepath = variant["output"]
+        if camera is not None:
+            restore += [(m, "camera", m.camera) for m in scene.timeline_markers if m.camera]
+            for marker in scene.timeline_markers:
+                marker.camera = None
+            scene.camera = camera
+            if self.camera_folders:
+                folder, filename = os.path.split(scene.render.filepath)
+                scene.render.filepath = os.path.join(folder, bpy.path.clean_name(camera.name), filename)
+
+        kwargs = {
+            "frames": variant_input(variant),
+            "isolate_numbers": variant.get("isolate_numbers", False),
+            "render_silent": True,
+            "verify": self.verify,
+            "max_retries": self.max_retries,
+            "result_file": variant.get("result_file", "")}
+        for key in ("digits", "group_subframes"):
+            if key in variant:
+                kwargs[key] = variant[key]
+        if self.render_preset:
+            kwargs["render_preset"] = self.render_preset
+
+        try:
+            with context.temp_override(scene=scene):
+                status = bpy.ops.render.image_sequence(**kwargs)
+        except RuntimeError as e:
+            print("ERROR:", e)
+            status = set()
+        finally:
+            for owner, attr, value in reversed(restore):
+                setattr(owner, attr, value)
+        return 'FINISHED' in status
+
+    def execute(self, context):
+        try:
+            variants = read_spec(bpy.path.abspath(self.variants_file))["variants"]
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, "Can not read the variants {}: {}".format(self.variants_file, e))
+            return {"CANCELLED"}
+
+        failed = []
+        for c, variant in enumerate(variants):
+            label = " / ".join(filter(None, (variant.get("scene"), variant.get("camera")))) or "Variant {}".format(c + 1)
+            print("Loom: Rendering {} [{}]".format(label, variant_input(variant)))
+            if not self.render_variant(context, variant):
+                failed.append(label)
+
+        if failed:
+            self.report({'ERROR'}, "Variant(s) not rendered completely: {}".format(", ".join(failed)))
+            return {"CANCELLED"}
+        self.report({'INFO'}, "{} variant(s) rendered".format(len(variants)))
+        return {"FINISHED"}
+
+
 class LOOM_OT_render_flipbook(bpy.types.Operator):
     """Render the Contents of the Viewport"""
     bl_idname = "loom.render_flipbook"
@@ -764,15 +1182,8 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
     def file_extension(self, file_format):
         return self._image_formats[file_format]
 
-    def subframes(self, sub_frames):
-        subs = []
-        for frame in sub_frames:
-            main_frame, sub_frame = repr(frame).split('.')
-            subs.append((int(main_frame), float('.' + sub_frame)))
-        return subs
-
     def format_frame(self, file_name, frame, extension=None):
-        file_name = replace_globals(file_name)
+        file_name = replace_globals(file_name, addon_name)
         if extension:
             return "{f}{fn:0{lz}d}.{ext}".format(
                 f=file_name, fn=frame, lz=self.digits, ext=extension)
@@ -781,8 +1192,8 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
                 f=file_name, fn=frame, lz=self.digits)
     
     def format_subframe(self, file_name, frame, extension=None):
-        file_name = replace_globals(file_name)
-        sub_frame = "{sf:.{dec}f}".format(sf = frame[1], dec=self._dec).split('.')[1]
+        file_name = replace_globals(file_name, addon_name)
+        sub_frame = "{sf:0{dec}d}".format(sf=frame[1], dec=self._dec)
         if extension:
             return "{f}{mf:0{lz}d}{sf}.{ext}".format(
                 f=file_name, mf=frame[0], lz=self.digits, 
@@ -810,7 +1221,7 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
     def frame_repath(self, scene, frame_number):
         ''' Set the frame, assamble main file and output node paths '''
         if self._subframe_flag:
-            scene.frame_set(frame_number[0], subframe=frame_number[1])
+            scene.frame_set(frame_number[0], subframe=frame_number[1] / 10**self._dec)
             ff = self.format_subframe(self._filename, frame_number, self._extension)
         else:
             scene.frame_set(frame_number)
@@ -818,20 +1229,25 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
         
         scene.render.filepath = os.path.join(self._folder, ff)
 
-    def log_sequence(self, scene, limit):
-        from time import ctime #lum.render_collection.clear()
-        lum = scene.loom
-        if len(lum.render_collection) == limit:
-            lum.render_collection.remove(0)
-        render = lum.render_collection.add()
-        render.render_id = len(lum.render_collection)
-        render.start_time = ctime()
-        render.start_frame = str(self._frames[0])
-        render.end_frame = str(self._frames[-1])
-        render.name = self._filename
-        render.file_path = self._output_path
-        render.padded_zeros = self.digits if not self._dec else self.digits + self._dec
-        render.image_format = self._extension
+    def log_sequence(self, context):
+        scene = context.scene
+        try:
+            db_path = history_database(context)
+            if scene.loom.render_collection:
+                migrate_render_collection(scene, db_path)
+            log_render(db_path,
+                blend_file=bpy.data.filepath,
+                scene=scene.name,
+                output_path=self._output_path,
+                version=scene.loom.output_render_version,
+                name=self._filename,
+                folder=self._folder,
+                start_frame=str(self._frames[0]),
+                end_frame=str(self._frames[-1]),
+                padded_zeros=self.digits if not self._dec else self.digits + self._dec,
+                image_format=self._extension)
+        except (OSError, sqlite3.Error) as e:
+            self.report({'WARNING'}, "Render history not available: {}".format(e))
 
     def reset_output_path(self, scene):
         scene.render.filepath = self._output_path
@@ -840,8 +1256,8 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
         if self._rendered_frames:
             frame_count = len(self._rendered_frames)
             if isinstance(self._rendered_frames[0], tuple):
-                rendered = ', '.join("{mf}.{sf}".format(
-                    mf=i[0], sf=str(i[1]).split(".")[1]) for i in self._rendered_frames)
+                rendered = ', '.join("{mf}.{sf:0{dec}d}".format(
+                    mf=i[0], sf=i[1], dec=self._dec) for i in self._rendered_frames)
             else:
                 rendered = ','.join(map(str, self._rendered_frames))
             
@@ -852,8 +1268,8 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
                 
         if self._skipped_frames:
             if isinstance(self._skipped_frames[0], tuple):
-                skipped = ', '.join("{mf}.{sf}".format(
-                    mf=i[0], sf=str(i[1]).split(".")[1]) for i in self._skipped_frames)
+                skipped = ', '.join("{mf}.{sf:0{dec}d}".format(
+                    mf=i[0], sf=i[1], dec=self._dec) for i in self._skipped_frames)
             else:
                 skipped = ','.join(map(str, self._skipped_frames))
             self.report({'ERROR'}, "Frame(s) {} skipped (would overwrite existing file(s))".format(skipped))
@@ -895,7 +1311,7 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
         self._filename = self.safe_filename(self._filename)
 
         if any(ext in self._folder for ext in glob_vars.keys()):
-            self._folder = replace_globals(self._folder)
+            self._folder = replace_globals(self._folder, addon_name)
             bpy.ops.loom.create_directory(directory=self._folder)
             if not os.path.isdir(self._folder):
                 self.report({'INFO'}, "Specified folder can not be created")
@@ -903,19 +1319,19 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
         
         """ Determine whether given frames are subframes """
         if isinstance(self._frames[0], float):
-            self._frames = self.subframes(self._frames)
-            self._dec = max(map(lambda x: len(str(x[1]).split('.')[1]), self._frames))
+            self._frames, self._dec = split_subframes(self._frames)
             self._subframe_flag = True
 
         """ Logging """
         self._skipped_frames.clear(), self._rendered_frames.clear()
-        if prefs.log_render: self.log_sequence(scn, prefs.log_render_limit)
+        if prefs.log_render: self.log_sequence(context)
 
         """ Display the rendering progress """
         wm = context.window_manager
         wm.progress_begin(0, len(self._frames))
 
         """ Start the rendering """
+        rendered_paths = []
         for c, f in enumerate(self._frames):
             self.frame_repath(scn, f)
             wm.progress_update(c)
@@ -928,10 +1344,13 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
 
             if f not in self._rendered_frames:
                 self._rendered_frames.append(f)
+                rendered_paths.append(scn.render.filepath)
 
         """ Reset output path and overlay states """
         wm.progress_end()
         self.overlays(area, self._overlays_state)
+        for error in write_manifests(scn, rendered_paths):
+            self.report({'WARNING'}, error)
         self.final_report()
         self.reset_output_path(scn)
 
@@ -945,7 +1364,7 @@ class LOOM_OT_render_flipbook(bpy.types.Operator):
             output_folder, filename = os.path.split(bpy.path.abspath(scn.render.filepath))
             rndr_folder = os.path.realpath(output_folder)
             if any(ext in rndr_folder for ext in glob_vars.keys()):
-                rndr_folder = replace_globals(rndr_folder)
+                rndr_folder = replace_globals(rndr_folder, addon_name)
 
             bpy.ops.loom.open_folder(
                 folder_path=rndr_folder)
@@ -1009,5 +1428,6 @@ classes = (
     LOOM_OT_verify_frames,
     LOOM_OT_render_terminal,
     LOOM_OT_render_image_sequence,
+    LOOM_OT_render_variants,
     LOOM_OT_render_flipbook,
 )
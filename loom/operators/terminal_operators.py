@@ -24,10 +24,12 @@ Contains operators for running external commands and terminal instances.
 
 import bpy
 import os
-import subprocess
 import tempfile
 from sys import platform
 
+# Import helpers
+from ..helpers.capabilities import terminal_capabilities
+
 # Import property groups
 from ..properties.ui_props import LOOM_PG_generic_arguments
 
@@ -39,8 +41,7 @@ class LOOM_OT_clear_dialog(bpy.types.Operator):
     bl_options = {'INTERNAL'}
 
     def execute(self, context):
-        context.scene.loom.render_collection.clear()
-        return {'FINISHED'}
+        return bpy.ops.loom.history_clear()
 
 
 
@@ -50,46 +51,20 @@ class LOOM_OT_verify_terminal(bpy.types.Operator):
     bl_label = "Verify Terminal"
     bl_options = {'INTERNAL'}
 
-    def verify_app(self, cmd):
-        try:
-            subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except OSError as e:
-            if e.errno == errno.ENOENT:
-                return False
-        return True
-
     def execute(self, context):
         addon_name = __package__.split('.')[0]
 
         prefs = context.preferences.addons[addon_name].preferences
 
-        if platform.startswith('win32'):
-            prefs.terminal = 'win-default'
+        """ Search the terminal on the system path, cached by binary and mtime """
+        terminal_info = terminal_capabilities(prefs, platform)
+        if terminal_info:
+            prefs.terminal = terminal_info["name"]
+        else:
+            self.report({'INFO'}, "Terminal not supported.")
 
-        elif platform.startswith('darwin'):
-            prefs.terminal = 'osx-default'
+        if platform.startswith('darwin'):
             prefs.bash_flag = True
-
-        elif platform.startswith('linux'):
-
-            if self.verify_app(["x-terminal-emulator", "--help"]):
-                prefs.terminal = 'x-terminal-emulator'
-            elif self.verify_app(["xfce4-terminal", "--help"]):
-                prefs.terminal = 'xfce4-terminal'
-            elif self.verify_app(["xterm", "--help"]):
-                prefs.terminal = 'xterm'
-            else:
-                self.report({'INFO'}, "Terminal not supported.")
-
-        elif platform.startswith('freebsd'):
-            if self.verify_app(["xterm", "--help"]):
-                prefs.terminal = 'xterm'
-
-        else:
-            if self.verify_app(["xterm", "--help"]):
-                prefs.terminal = 'xterm'
-            else:
-                self.report({'INFO'}, "Terminal not supported.")
         
         if prefs.terminal:
             bpy.ops.wm.save_userpref()
@@ -159,7 +134,7 @@ class LOOM_OT_run_terminal(bpy.types.Operator):
     def single_bash_cmd(self, arg_list):
         #l = [i for s in arg_list for i in s]
         return ["{b}{e}{b}".format(b='\"', e=x) \
-            if x.startswith("import") else x for x in arg_list]
+            if x.startswith("import") or (x.startswith("[") and ";" in x) else x for x in arg_list]
 
     def write_bat(self, bat_path, bat_args):
         try:
@@ -169,7 +144,7 @@ class LOOM_OT_run_terminal(bpy.types.Operator):
                 bat_args = [[self.binary] + i if self.binary else i for i in bat_args]
                 # Double quotes and double percentage %%
                 bat_args = [["{b}{e}{b}".format(b='\"', e=x) \
-                    if x.startswith("import") or '\\' in x else x for x in args] \
+                    if x.startswith("import") or '\\' in x or ";" in x else x for x in args] \
                     for args in bat_args] #  or os.path.isfile(x)
                 bat_args = [[x.replace("%", "%%") for x in args] for args in bat_args]
                 for i in bat_args:
@@ -177,7 +152,7 @@ class LOOM_OT_run_terminal(bpy.types.Operator):
             else:
                 bat_args = [self.binary] + bat_args if self.binary else bat_args
                 bat_args = ["{b}{e}{b}".format(b='\"', e=x) \
-                    if '\\' in x or x.startswith("import") else x for x in bat_args] # or os.path.isfile(x)
+                    if '\\' in x or ";" in x or x.startswith("import") else x for x in bat_args] # or os.path.isfile(x)
                 bat_args = [x.replace("%", "%%") for x in bat_args]
                 fp.write(" ".join(bat_args) + "\n")
 
@@ -203,9 +178,12 @@ class LOOM_OT_run_terminal(bpy.types.Operator):
                 """ Add quotes to python command """
                 bash_args = [["{b}{e}{b}".format(b='\"', e=x) \
                     if x.startswith("import") else x for x in args] for args in bash_args]
-                """ Add quotes to blend file path """
+                """ Add quotes to blend file, script and job file paths """
+                bash_args = [["{b}{e}{b}".format(b='\"', e=x) \
+                    if x.endswith((".blend", ".py", ".json")) else x for x in args] for args in bash_args]
+                """ Add quotes to filter graphs """
                 bash_args = [["{b}{e}{b}".format(b='\"', e=x) \
-                    if x.endswith(".blend") else x for x in args] for args in bash_args]
+                    if x.startswith("[") and ";" in x else x for x in args] for args in bash_args]
                 """ Write the the file """
                 for i in bash_args:
                     fp.write(" ".join(i) + "\n")
@@ -214,9 +192,12 @@ class LOOM_OT_run_terminal(bpy.types.Operator):
                 """ Add quotes to python command """
                 bash_args = ["{b}{e}{b}".format(b='\"', e=x) \
                     if x.startswith("import") else x for x in bash_args]
-                """ Add quotes to blend file path """
+                """ Add quotes to blend file, script and job file paths """
+                bash_args = ["{b}{e}{b}".format(b='\"', e=x) \
+                    if x.endswith((".blend", ".py", ".json")) else x for x in bash_args]
+                """ Add quotes to filter graphs """
                 bash_args = ["{b}{e}{b}".format(b='\"', e=x) \
-                    if x.endswith(".blend") else x for x in bash_args]
+                    if x.startswith("[") and ";" in x else x for x in bash_args]
                 """ Write the the file """
                 fp.write(" ".join(bash_args) + "\n")
             
@@ -349,6 +330,7 @@ class LOOM_OT_run_terminal(bpy.types.Operator):
                 self.write_bat(prefs.bash_file, args_user)
         
         """ Open Terminal & pass all arguments """
+        import subprocess
         try:
             if not self.terminal_instance:
                 env_copy = os.environ.copy()
@@ -26,7 +26,10 @@ import bpy
 from itertools import count, groupby
 
 # Import helpers
-from ..helpers.blender_compat import get_compositor_node_tree, get_action_fcurves, get_active_action
+from ..helpers.blender_compat import get_compositor_node_tree, get_active_action
+from ..helpers.frame_utils import rangify_frames
+from ..helpers.keyframe_utils import action_frames
+from ..helpers import async_fs
 
 
 # Default global variables and project directories
@@ -175,6 +178,12 @@ class LOOM_OT_render_dialog(bpy.types.Operator):
         default=False,
         options={'SKIP_SAVE'})
 
+    group_subframes: bpy.props.BoolProperty(
+        name="Group Sub-frames",
+        description="Render all sub-frames of a frame in a row and keep the render data " \
+            "in memory between them (Persistent Data)",
+        default=True)
+
     @classmethod
     def poll(cls, context):
         return not context.scene.render.is_movie_format
@@ -199,17 +208,19 @@ class LOOM_OT_render_dialog(bpy.types.Operator):
                     return True
         return False
 
-    def write_permission(self, folder): # Hacky, but ok for now
-        # https://stackoverflow.com/q/2113427/3091066
-        try: # os.access(os.path.realpath(bpy.path.abspath(out_folder)), os.W_OK)
-            import os
-            pf = os.path.join(folder, "permission.txt")
-            fh = open(pf, 'w')
-            fh.close()
-            os.remove(pf)
-            return True
-        except:
-            return False
+    def output_folder(self, context):
+        """Output folder of the scene, None if it contains global variables"""
+        import os
+        folder = os.path.dirname(bpy.path.abspath(context.scene.render.filepath))
+        return None if "$" in folder else os.path.normpath(folder)
+
+    def output_status(self, context):
+        """Tuple (exists, writable) of the output folder, None values while pending"""
+        folder = self.output_folder(context)
+        if folder is None:
+            return True, True
+        exists = async_fs.is_dir(folder)
+        return exists, async_fs.is_writable(folder) if exists else None
 
     def execute(self, context):
         addon_name = __package__.split('.')[0]
@@ -256,6 +267,12 @@ class LOOM_OT_render_dialog(bpy.types.Operator):
                     self.report({'WARNING'}, "No active camera.")
                     user_error = True
 
+        """ Results of the checks started in invoke, pending checks do not block """
+        exists, writable = self.output_status(context)
+        if exists and writable is False:
+            self.report({'ERROR'}, "No write permission for the output folder")
+            user_error = True
+
         if user_error: #bpy.ops.loom.render_dialog('INVOKE_DEFAULT')
             return {"CANCELLED"}
 
@@ -270,11 +287,13 @@ class LOOM_OT_render_dialog(bpy.types.Operator):
                 frames = user_input,
                 threads = lum.threads,
                 isolate_numbers = filter_individual_numbers,
+                group_subframes = self.group_subframes,
                 render_preset = lum.custom_render_presets)
         else:
             bpy.ops.render.image_sequence(
                 frames = user_input,
                 isolate_numbers = filter_individual_numbers,
+                group_subframes = self.group_subframes,
                 render_silent = False,
                 validate_scene = False)
         return {"FINISHED"}
@@ -294,6 +313,7 @@ class LOOM_OT_render_dialog(bpy.types.Operator):
         if not lum.is_property_set("threads") or not lum.threads:
             lum.threads = scn.render.threads  # *.5
 
+        self.output_status(context) # Start the checks
         return context.window_manager.invoke_props_dialog(self,
             width=(prefs.render_dialog_width))
 
@@ -316,6 +336,8 @@ class LOOM_OT_render_dialog(bpy.types.Operator):
         sub.prop(lum, "filter_input", icon='FILTER', icon_only=True)
         #sub.prop(lum, "filter_keyframes", icon='SPACE2', icon_only=True)
         sub.operator("loom.verify_frames", icon='GHOST_ENABLED', text="")
+        if "." in lum.frame_input:
+            sub.prop(self, "group_subframes", icon='MOD_TIME', icon_only=True)
 
         split = layout.split(factor=split_factor)
         col = split.column(align=True)
@@ -327,6 +349,14 @@ class LOOM_OT_render_dialog(bpy.types.Operator):
         sub.prop(prefs, "render_display_type", text="") #context.preferences.view
         sub.prop(scn.render, "use_lock_interface", icon_only=True)
 
+        exists, writable = self.output_status(context)
+        if exists is None or (exists and writable is None):
+            layout.label(text="Checking output folder...", icon='TIME')
+        elif not exists:
+            layout.label(text="Output folder will be created", icon='INFO')
+        elif not writable:
+            layout.label(text="No write permission for the output folder", icon='ERROR')
+
         row = layout.row(align=True)
         row.prop(lum, "command_line", text="Render using Command Line")
         if scn.render.resolution_percentage < 100:
@@ -340,7 +370,7 @@ class LOOM_OT_render_dialog(bpy.types.Operator):
             from ..properties.render_props import render_preset_callback
             row = layout.row(align=True)
             row.prop(lum, "override_render_settings",  icon='PARTICLE_DATA', icon_only=True)
-            if len(render_preset_callback(scn, context, addon_name)) > 1:
+            if len(render_preset_callback(scn, context)) > 1:
                 #split = row.split(factor=split_factor)
                 #split.label(text="Preset:")
                 #row = layout.row(align=True)
@@ -400,17 +430,6 @@ class LOOM_OT_selected_keys_dialog(bpy.types.Operator):
     all_keyframes: bpy.props.BoolProperty(default=False, options={'SKIP_SAVE'})
     flipbook_dialog: bpy.props.BoolProperty(default=False, options={'SKIP_SAVE'})
 
-    def int_filter(self, flt):
-        try:
-            return int(flt)
-        except ValueError:
-            return None
-
-    def rangify_frames(self, frames):
-        """ Converts a list of integers to range string [1,2,3] -> '1-3' """
-        G=(list(x) for _,x in groupby(frames, lambda x,c=count(): next(c)-x))
-        return ",".join("-".join(map(str,(g[0],g[-1])[:len(g)])) for g in G)
-
     def keyframes_from_actions(self, context, object_selection=False, keyframe_selection=True):
         """ Returns either selected keys by object selection or all keys """
         actions = bpy.data.actions
@@ -420,25 +439,11 @@ class LOOM_OT_selected_keys_dialog(bpy.types.Operator):
                 actions = obj_actions
         # There is a select flag for the handles:
         # key.select_left_handle & key.select_right_handle
-        ctrl_points = set()
-        for action in actions:
-            for channel in get_action_fcurves(action): #if channel.select:
-                for key in channel.keyframe_points:
-                    if keyframe_selection:
-                        if key.select_control_point:
-                            ctrl_points.add(key.co.x)
-                    else:
-                        ctrl_points.add(key.co.x)
-        return sorted(ctrl_points)
+        return action_frames(actions, selected_only=keyframe_selection)
 
     def keyframes_from_channel(self, action):
         """ Returns selected keys based on the action in the action editor """
-        ctrl_points = set()
-        for channel in get_action_fcurves(action):
-            for key in channel.keyframe_points:
-                if key.select_control_point:
-                    ctrl_points.add(key.co.x)
-        return sorted(ctrl_points)
+        return action_frames((action,), selected_only=True)
 
     def selected_ctrl_points(self, context):
         """ Returns selected keys in the dopesheet if a channel is selected """
@@ -450,13 +455,7 @@ class LOOM_OT_selected_keys_dialog(bpy.types.Operator):
 
     def channel_ctrl_points(self):
         """ Returns all keys of selected channels in dopesheet """
-        ctrl_points = set()
-        for action in bpy.data.actions:
-            for channel in get_action_fcurves(action):
-                if channel.select: #print(action, channel.group)
-                    for key in channel.keyframe_points:
-                        ctrl_points.add(key.co.x)
-        return sorted(ctrl_points)
+        return action_frames(bpy.data.actions, selected_channels=True)
 
     def selected_gpencil_frames(self, context):
         """ Returns all selected grease pencil frames """
@@ -527,23 +526,23 @@ class LOOM_OT_selected_keys_dialog(bpy.types.Operator):
                     object_selection = self.limit_to_object_selection,
                     keyframe_selection = not self.all_keyframes)
 
-        if not selected_keys:
+        if selected_keys is None or not len(selected_keys):
             self.report({'ERROR'}, "No Keyframes selected")
             return {"CANCELLED"}
 
-        """ Return integers whenever possible """
-        int_frames = [self.int_filter(frame) for frame in selected_keys]
-        frames = selected_keys if None in int_frames else int_frames
+        """ Truncate to integer frames """
+        import numpy as np
+        frames = np.unique(np.asarray(selected_keys, dtype=np.float64).astype(np.int64))
 
         if self.limit_to_scene_frames:
             scn = context.scene
-            frames = set(frames).intersection(range(scn.frame_start, scn.frame_end+1))
-            if not frames:
+            frames = frames[(frames >= scn.frame_start) & (frames <= scn.frame_end)]
+            if not frames.size:
                 self.report({'ERROR'}, "No frames keyframes in scene range")
                 return {"CANCELLED"}
 
         bpy.ops.loom.render_input_dialog(
-            frame_input=self.rangify_frames(frames),
+            frame_input=rangify_frames(frames),
             flipbook_dialog=self.flipbook_dialog
             )
         return {'FINISHED'}
@@ -26,14 +26,14 @@ and project setup.
 import bpy
 from bpy_extras.io_utils import ImportHelper, ExportHelper
 import os
-import subprocess
-import webbrowser
 from sys import platform
 
 # Import helpers
 from ..helpers.blender_compat import get_compositor_node_tree
 from ..helpers.globals_utils import replace_globals, user_globals, isevaluable
 from ..helpers.version_utils import render_version
+from ..helpers import async_fs
+from ..helpers import profiling
 
 
 class LOOM_OT_open_folder(bpy.types.Operator):
@@ -56,6 +56,8 @@ class LOOM_OT_open_folder(bpy.types.Operator):
         if not os.path.isdir(fp):
             self.report({'INFO'}, "'{}' no folder".format(fp))
             return {"CANCELLED"}
+        import subprocess
+        import webbrowser
         try:
             if platform.startswith('darwin'):
                 webbrowser.open("file://{}".format(fp))
@@ -173,6 +175,7 @@ class LOOM_OT_openURL(bpy.types.Operator):
         return properties.description
 
     def execute(self, context):
+        import webbrowser
         webbrowser.open_new(self.url)
         return {'FINISHED'}
 
@@ -207,6 +210,25 @@ class LOOM_OT_delete_bash_files(bpy.types.Operator):
 
 
 
+class LOOM_OT_profile_reset(bpy.types.Operator):
+    """Print the measured times to the console and clear them"""
+    bl_idname = "loom.profile_reset"
+    bl_label = "Reset Profile"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        if not profiling.top(1):
+            self.report({'INFO'}, "Nothing measured")
+            return {'CANCELLED'}
+        for line in profiling.report(count=50):
+            print(line)
+        profiling.reset()
+        for area in context.screen.areas if context.screen else ():
+            area.tag_redraw()
+        self.report({'INFO'}, "Profile printed to the console and cleared")
+        return {'FINISHED'}
+
+
 class LOOM_OT_delete_file(bpy.types.Operator):
     """Deletes a file by given path"""
     bl_idname = "loom.delete_file"
@@ -236,28 +258,47 @@ class LOOM_OT_utils_create_directory(bpy.types.Operator):
     
     directory: bpy.props.StringProperty(subtype='DIR_PATH')
 
+    use_thread: bpy.props.BoolProperty(
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'})
+
+    _timer = None
+    _future = None
+
+    def finish(self, error):
+        async_fs.invalidate(os.path.normpath(self._abs_path))
+        if error:
+            self.report({'WARNING'},"Can not create '{}': {}".format(self._abs_path, error))
+            return {'CANCELLED'}
+        self.report({'INFO'},"'{}' in place".format(self._abs_path))
+        return {'FINISHED'}
+
     def execute(self, context):
         if not self.directory:
             self.report({'WARNING'},"No directory specified")
             return {'CANCELLED'}
         
-        abs_path = bpy.path.abspath(self.directory)
+        self._abs_path = bpy.path.abspath(self.directory)
+        if not (self.use_thread and context.window):
+            """ Callers check for the folder right after the call """
+            return self.finish(async_fs.make_dirs(self._abs_path))
+
+        """ Invoked from the interface: create the folder on the filesystem thread """
+        self._future = async_fs.submit(async_fs.make_dirs, self._abs_path)
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
 
-        '''
-        head, tail = os.path.split(abs_path)
-        if not os.path.isdir(head):
-            self.report({'WARNING'},"Access denied: '{}' does not exists".format(head))
-            return {'CANCELLED'}
-        else:
-        '''
-        if not os.path.exists(abs_path):
-            os.makedirs(abs_path)
-            self.report({'INFO'},"'{}' created".format(abs_path))
-        else:
-            self.report({'INFO'},"'{}' already in place".format(abs_path))
-        return {'FINISHED'}
+    def modal(self, context, event):
+        if event.type != 'TIMER' or not self._future.done():
+            return {'PASS_THROUGH'}
+
+        context.window_manager.event_timer_remove(self._timer)
+        return self.finish(self._future.result())
     
     def invoke(self, context, event):
+        self.use_thread = True
         return context.window_manager.invoke_confirm(self, event)
 
 
@@ -474,26 +515,60 @@ class LOOM_OT_project_dialog(bpy.types.Operator):
         if not self.options.is_invoke:
             project_dir = self.directory
         
-        if not project_dir or not os.path.isdir(project_dir):
+        if not project_dir or async_fs.is_dir(os.path.normpath(bpy.path.abspath(project_dir))) is False:
             self.report({'ERROR'}, "Please specify a valid Project Directory")
             bpy.ops.loom.set_project_dialog('INVOKE_DEFAULT')
             return {'CANCELLED'}
 
-        errors = []
         addon_name = __package__.split('.')[0]
-
         prefs = context.preferences.addons[addon_name].preferences
-        for d in prefs.project_directory_coll:
-            if d.creation_flag and d.name:
-                pdir = os.path.join(project_dir, d.name)
-                bpy.ops.loom.create_directory(directory=pdir)
-                if not os.path.isdir(bpy.path.abspath(pdir)):
-                    errors.append(d.name)
-                if any(x in d.name.lower() for x in ["rndr", "render"]):
-                    if os.path.isdir(bpy.path.abspath(pdir)) and \
-                        scn.render.filepath.startswith(("/tmp", "/temp")) or \
-                        scn.render.filepath == "//":
-                        scn.render.filepath = bpy.path.relpath(pdir) + "/"
+        folders = [d.name for d in prefs.project_directory_coll if d.creation_flag and d.name]
+
+        self._project_dir = project_dir
+        if not (self.options.is_invoke and context.window):
+            """ Scripted calls expect the folders to exist afterwards """
+            return self.finish(context, self.create_folders(bpy.path.abspath(project_dir), folders))
+
+        """ Create all folders on the filesystem thread and wait for them in modal """
+        self._future = async_fs.submit(self.create_folders, bpy.path.abspath(project_dir), folders)
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    @staticmethod
+    def create_folders(project_dir, folders):
+        """Create the folders in the project directory (filesystem thread)
+
+        Returns None if the project directory does not exist, otherwise a
+        dictionary {folder: error or None}
+        """
+        if not os.path.isdir(project_dir):
+            return None
+        return {d: async_fs.make_dirs(os.path.join(project_dir, d)) for d in folders}
+
+    def modal(self, context, event):
+        if event.type != 'TIMER' or not self._future.done():
+            return {'PASS_THROUGH'}
+
+        context.window_manager.event_timer_remove(self._timer)
+        return self.finish(context, self._future.result())
+
+    def finish(self, context, results):
+        async_fs.invalidate()
+        if results is None:
+            self.report({'ERROR'}, "Please specify a valid Project Directory")
+            return {'CANCELLED'}
+
+        scn = context.scene
+        errors = [d for d, error in results.items() if error]
+        for d in results:
+            if any(x in d.lower() for x in ["rndr", "render"]):
+                pdir = os.path.join(self._project_dir, d)
+                if d not in errors and \
+                    scn.render.filepath.startswith(("/tmp", "/temp")) or \
+                    scn.render.filepath == "//":
+                    scn.render.filepath = bpy.path.relpath(pdir) + "/"
 
         if not errors:
             self.report({'INFO'}, "All directories successfully created")
@@ -541,6 +616,12 @@ class LOOM_OT_project_dialog(bpy.types.Operator):
         row = layout.row(align=True)
         row.prop(lum, "project_directory")
         row.operator(LOOM_OT_select_project_directory.bl_idname, icon='FILE_FOLDER', text="")
+        if lum.project_directory:
+            exists = async_fs.is_dir(os.path.normpath(bpy.path.abspath(lum.project_directory)))
+            if exists is None:
+                layout.label(text="Checking Project Directory...", icon='TIME')
+            elif not exists:
+                layout.label(text="Project Directory does not exist", icon='ERROR')
         layout.separator()
 
 
@@ -780,6 +861,7 @@ classes = (
     LOOM_OT_open_preferences,
     LOOM_OT_openURL,
     LOOM_OT_delete_bash_files,
+    LOOM_OT_profile_reset,
     LOOM_OT_delete_file,
     LOOM_OT_utils_create_directory,
     LOOM_OT_utils_marker_unbind,
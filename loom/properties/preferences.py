@@ -24,11 +24,13 @@ Contains the main preferences panel with all addon-level settings.
 
 import bpy
 import os
-import rna_keymap_ui
+import tempfile
 from sys import platform
 
 # Import helpers
 from ..helpers.globals_utils import isevaluable
+from ..helpers.capabilities import cached_entry, load_cache
+from ..helpers import profiling
 
 # Import property groups that preferences references
 from .ui_props import LOOM_PG_globals, LOOM_PG_project_directories
@@ -47,6 +49,14 @@ user_keymap_ids = []
 addon_keymaps = []
 
 
+def update_profiling(self, context):
+    from ..operators import set_profiling
+    stats_dir = ""
+    if self.profile_stats:
+        stats_dir = self.profile_directory or os.path.join(tempfile.gettempdir(), "loom_profiles")
+    set_profiling(self.profile_flag, stats_dir)
+
+
 class LOOM_AP_preferences(bpy.types.AddonPreferences):
     """Addon preferences for Loom."""
 
@@ -108,15 +118,23 @@ class LOOM_AP_preferences(bpy.types.AddonPreferences):
         description="If enabled render output properties will be saved",
         default=True)
 
-    log_render_limit: bpy.props.IntProperty(
-        name="Log Limit",
-        default=3)
+    history_directory: bpy.props.StringProperty(
+        name="Render History",
+        description="Folder of the render history database (Blender's config folder if not set)",
+        maxlen=1024,
+        default="",
+        subtype='DIR_PATH')
 
     playblast_flag: bpy.props.BoolProperty(
         name="Playblast (Experimental)",
         description="Playback rendered sequences",
         default=False)
 
+    playblast_proxies: bpy.props.BoolProperty(
+        name="Prefer Proxies",
+        description="Play back proxies of the sequence if available (see Build Proxies)",
+        default=True)
+
     user_player: bpy.props.BoolProperty(
         name="Default Animation Player",
         description="Use default player (User Preferences > File Paths)",
@@ -128,6 +146,11 @@ class LOOM_AP_preferences(bpy.types.AddonPreferences):
         maxlen=1024,
         subtype='FILE_PATH')
 
+    capability_cache: bpy.props.StringProperty(
+        name="Capability Cache",
+        description="Probed ffmpeg and terminal capabilities (json)",
+        options={'HIDDEN'})
+
     snapshot_directory: bpy.props.StringProperty(
         name="Snapshot Directory",
         description="Path of the Snapshot directory",
@@ -135,6 +158,11 @@ class LOOM_AP_preferences(bpy.types.AddonPreferences):
         default="//temp",
         subtype='DIR_PATH')
 
+    snapshot_repository: bpy.props.BoolProperty(
+        name="Deduplicate Snapshots",
+        description="Store snapshots in a repository, unchanged parts of the file are only stored once",
+        default=False)
+
     default_codec: bpy.props.StringProperty(
         name="User Codec",
         description = "Default user codec")
@@ -165,6 +193,69 @@ class LOOM_AP_preferences(bpy.types.AddonPreferences):
         description="Width of name column in list",
         default=0.45, min=0.3, max=0.8)
 
+    scratch_flag: bpy.props.BoolProperty(
+        name="Render to Local Scratch",
+        description="Render the frames to a local folder and copy them to the output folder " \
+            "in the background (recommended for network storage)",
+        default=False)
+
+    scratch_directory: bpy.props.StringProperty(
+        name="Scratch Directory",
+        description="Local folder for frames before they are copied (system temp folder if not set)",
+        maxlen=1024,
+        default="",
+        subtype='DIR_PATH')
+
+    scratch_workers: bpy.props.IntProperty(
+        name="Uploads",
+        description="Number of frames copied to the output folder at the same time",
+        default=2, min=1, max=16)
+
+    cache_directory: bpy.props.StringProperty(
+        name="Dependency Cache",
+        description="Local folder for cached textures and media of batch renders " \
+            "(system temp folder if not set)",
+        maxlen=1024,
+        default="",
+        subtype='DIR_PATH')
+
+    cache_size: bpy.props.FloatProperty(
+        name="Size (GB)",
+        description="Least recently used files are deleted once the cache exceeds this size",
+        default=20.0, min=0.5, soft_max=500.0)
+
+    memory_flag: bpy.props.BoolProperty(
+        name="Memory Admission",
+        description="Only start further batch jobs while their expected memory (peak of their " \
+            "last render) fits the budget, unknown files are rendered alone first",
+        default=True)
+
+    memory_budget: bpy.props.FloatProperty(
+        name="Memory Budget (GB)",
+        description="Memory all concurrent batch workers may use (0: 85% of the physical memory)",
+        default=0.0, min=0.0, soft_max=1024.0)
+
+    profile_flag: bpy.props.BoolProperty(
+        name="Profiling",
+        description="Measure the time of all Loom operators and of hot helpers " \
+            "(globals, frame input, sequence scans), results are listed below",
+        default=False,
+        update=update_profiling)
+
+    profile_stats: bpy.props.BoolProperty(
+        name="Write Profiles",
+        description="Run each operator call through cProfile and write slow calls as .pstats files",
+        default=False,
+        update=update_profiling)
+
+    profile_directory: bpy.props.StringProperty(
+        name="Profile Folder",
+        description="Folder for .pstats files (system temp folder if not set)",
+        maxlen=1024,
+        default="",
+        subtype='DIR_PATH',
+        update=update_profiling)
+
     render_background: bpy.props.BoolProperty(
         name="Render in Background",
         description="Do not activate the Console",
@@ -225,6 +316,9 @@ class LOOM_AP_preferences(bpy.types.AddonPreferences):
     display_hotkeys: bpy.props.BoolProperty(
         default=True)
 
+    display_profiling: bpy.props.BoolProperty(
+        default=False)
+
     def draw_state(self, prop):
         return 'RADIOBUT_OFF' if not prop else 'RADIOBUT_ON'
 
@@ -257,9 +351,14 @@ class LOOM_AP_preferences(bpy.types.AddonPreferences):
             col.prop(self, "playblast_flag", toggle=True, icon=self.draw_state(self.playblast_flag))
             upl = col.column()
             upl.prop(self, "user_player", toggle=True, icon=self.draw_state(self.user_player))
+            upl.prop(self, "playblast_proxies", toggle=True, icon=self.draw_state(self.playblast_proxies))
             upl.enabled = self.playblast_flag
 
-            box_general.row().prop(self, "ffmpeg_path")
+            row = box_general.row()
+            row.prop(self, "ffmpeg_path")
+            ffmpeg_info = cached_entry(load_cache(self.capability_cache), "ffmpeg", self.ffmpeg_path)
+            if ffmpeg_info:
+                row.label(text=ffmpeg_info["version"], icon='CHECKMARK')
             box_general.row()
 
         """ Globals """
@@ -365,9 +464,68 @@ class LOOM_AP_preferences(bpy.types.AddonPreferences):
                 rbg.enabled = True
 
             box_advanced.row()
-            box_advanced.row().prop(self, "snapshot_directory")
+            row = box_advanced.row(align=True)
+            row.prop(self, "snapshot_directory")
+            row.prop(self, "snapshot_repository", text="", icon='PACKAGE')
+            row = box_advanced.row(align=True)
+            row.prop(self, "scratch_flag", text="", icon='EXPORT')
+            sub = row.row(align=True)
+            sub.enabled = self.scratch_flag
+            sub.prop(self, "scratch_directory")
+            sub.prop(self, "scratch_workers")
+            row = box_advanced.row(align=True)
+            row.prop(self, "cache_directory")
+            row.prop(self, "cache_size")
+            row = box_advanced.row(align=True)
+            row.prop(self, "memory_flag", text="", icon='MEMORY')
+            sub = row.row(align=True)
+            sub.enabled = self.memory_flag
+            sub.prop(self, "memory_budget")
+            row = box_advanced.row(align=True)
+            row.prop(self, "history_directory")
+            row.operator("loom.history_import", icon="IMPORT", text="")
+            row.operator("loom.history_export", icon="EXPORT", text="")
+            row.operator("loom.history_clear", icon="TRASH", text="")
             box_advanced.row()
 
+        """ Profiling """
+        box_profiling = layout.box()
+        row = box_profiling.row()
+        row.prop(self, "display_profiling",
+            icon="TRIA_DOWN" if self.display_profiling else "TRIA_RIGHT",
+            icon_only=True, emboss=False)
+        row.label(text="Profiling")
+
+        if self.display_profiling:
+            row = box_profiling.row(align=True)
+            row.prop(self, "profile_flag", toggle=True, icon=self.draw_state(self.profile_flag))
+            row.prop(self, "profile_stats", text="", icon='FILE_TEXT')
+            sub = row.row(align=True)
+            sub.enabled = self.profile_stats
+            sub.prop(self, "profile_directory", text="")
+            row.operator("loom.profile_reset", icon="TRASH", text="")
+
+            offenders = profiling.top(12)
+            if offenders:
+                col = box_profiling.column(align=True)
+                split = col.split(factor=0.4)
+                split.label(text="Operator / Function")
+                row = split.row()
+                for text in ("Calls", "Total", "Mean", "p95", "Max"):
+                    row.label(text=text)
+                for label, h in offenders:
+                    split = col.split(factor=0.4)
+                    split.label(text=label)
+                    row = split.row()
+                    row.label(text=str(h.count))
+                    row.label(text="{:.2f}s".format(h.total))
+                    row.label(text="{:.1f}ms".format(h.mean * 1000))
+                    row.label(text="{:.1f}ms".format(h.percentile(0.95) * 1000))
+                    row.label(text="{:.1f}ms".format(h.max * 1000))
+            elif self.profile_flag or profiling.active():
+                box_profiling.label(text="No calls measured yet", icon='INFO')
+            box_profiling.row()
+
         """ Hotkeys """
         box_hotkeys = layout.box()
         row = box_hotkeys.row()
@@ -377,6 +535,7 @@ class LOOM_AP_preferences(bpy.types.AddonPreferences):
         row.label(text="Hotkeys")
 
         if self.display_hotkeys:
+            import rna_keymap_ui
             split = box_hotkeys.split()
             col = split.column()
             kc_usr = bpy.context.window_manager.keyconfigs.user
@@ -26,6 +26,8 @@ preset flags, and file output paths.
 import bpy
 import os
 
+from ..helpers.encode_utils import DELIVERABLE_ITEMS
+
 
 def render_preset_callback(self, context):
     """Callback to populate render preset enum items.
@@ -69,10 +71,19 @@ class LOOM_PG_batch_render(bpy.types.PropertyGroup):
     path: bpy.props.StringProperty()
     frame_start: bpy.props.IntProperty()
     frame_end: bpy.props.IntProperty()
-    scene: bpy.props.StringProperty()
+    scene: bpy.props.StringProperty(name="Scene", description="Scene to render (active scene if empty)")
+    camera: bpy.props.StringProperty(name="Camera", description="Camera to render (scene camera if empty)")
     frames: bpy.props.StringProperty(name="Frames")
     encode_flag: bpy.props.BoolProperty(default=False)
+    deliverables: bpy.props.EnumProperty(
+        name="Deliverables",
+        description="Additional movies to encode in the same pass",
+        items=DELIVERABLE_ITEMS,
+        options={'ENUM_FLAG'})
     input_filter: bpy.props.BoolProperty(default=False)
+    snapshot_id: bpy.props.StringProperty() # Repository entry, rebuilt to path
+    snapshot_repository: bpy.props.StringProperty()
+    select: bpy.props.BoolProperty(name="Select", description="Include the item in bulk actions", default=False)
 
 
 class LOOM_PG_preset_flags(bpy.types.PropertyGroup):
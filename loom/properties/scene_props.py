@@ -91,6 +91,8 @@ class LOOM_PG_scene_settings(bpy.types.PropertyGroup):
         default="",
         options={'SKIP_SAVE'})
 
+    # Legacy render log, renders are logged to the render history
+    # database (helpers.render_history) and migrated on the next render
     render_collection: bpy.props.CollectionProperty(
         name="Render Collection",
         type=LOOM_PG_render)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Checksum an image sequence and store the result in its Loom manifest.
+
+Reports duplicate frames and frames which differ from the previous run or
+from the manifest of another copy of the sequence. Runs with any Python 3
+(Blender's bundled Python works too), Blender is not required.
+
+Usage:
+    python loom_checksum.py /render/shot_####.exr [--against /farm/shot_####.exr.loom.json]
+                            [--threads 16] [--algorithm blake2b] [--json]
+
+Exit codes: 0 all frames match, 1 changed or missing frames, 2 no sequence.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count, groupby
+
+# The helpers do not depend on bpy, import them without the addon package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "helpers"))
+import sequence_utils
+
+
+def rangify(frames):
+    """ Convert list of integers to Range string [1,2,3] -> '1-3' """
+    G=(list(x) for _,x in groupby(frames, lambda x,c=count(): next(c)-x))
+    return ",".join("-".join(map(str,(g[0],g[-1])[:len(g)])) for g in G)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("sequence", help="Hash path (shot_####.exr) or any frame of the sequence")
+    parser.add_argument("--against", help="Manifest to compare with instead of the previous run")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--algorithm", choices=("blake2b", "xxh3_128"),
+        help="Checksum algorithm (default: algorithm of the manifest, xxh3_128 if available)")
+    parser.add_argument("--json", action="store_true", help="Print the result as json")
+    args = parser.parse_args(argv)
+    if args.algorithm and sequence_utils.checksum_algorithm(args.algorithm) != args.algorithm:
+        print("Checksum algorithm {} is not available (pip install xxhash)".format(args.algorithm),
+            file=sys.stderr)
+        return 2
+
+    basedir, name, digits, ext = sequence_utils.split_sequence_path(os.path.abspath(args.sequence))
+    frames = sequence_utils.scan_sequence(basedir, name, digits, ext) if digits else {}
+    if not frames:
+        print("No image sequence found: {}".format(args.sequence), file=sys.stderr)
+        return 2
+
+    reference = None
+    if args.against:
+        reference = sequence_utils.load_manifest(args.against)
+        if reference is None:
+            print("Can not read the manifest {}".format(args.against), file=sys.stderr)
+            return 2
+
+    previous = reference or sequence_utils.read_manifest(basedir, name, digits, ext, validate=False) or {}
+    algorithm = args.algorithm or sequence_utils.checksum_algorithm(previous.get("checksum_algorithm"))
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = pool.map(lambda p: sequence_utils.frame_entry(p, algorithm), frames.values())
+        entries = {f: e for f, e in zip(frames, results) if e}
+    unreadable = sorted(set(frames) - set(entries))
+
+    result = sequence_utils.record_checksums(basedir, name, digits, ext, entries, algorithm, reference)
+    result.update({"frames": len(entries), "unreadable": unreadable, "algorithm": algorithm})
+    mismatch = bool(result["changed"] or result["missing"] or unreadable)
+
+    if args.json:
+        print(json.dumps(result, indent=1))
+        return 1 if mismatch else 0
+
+    print("{}{}.{}: {} frames hashed ({})".format(name, "#" * digits, ext, len(entries), algorithm))
+    if unreadable:
+        print("  Unreadable frames: {}".format(rangify(unreadable)))
+    for group in result["duplicates"]:
+        print("  Identical frames: {}".format(rangify(group)))
+    if result["compared"]:
+        for key, label in (("changed", "Changed"), ("missing", "Missing"), ("added", "Additional")):
+            if result[key]:
+                print("  {} frames: {}".format(label, rangify(result[key])))
+        if not mismatch and not result["added"]:
+            print("  All frames match the {}".format("reference" if reference else "previous run"))
+    elif reference:
+        print("  Reference not compared (different checksum algorithm)")
+    return 1 if mismatch else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Encode a rendered image sequence with ffmpeg, without starting Blender.
+
+The sequence is either given as hash path or read from the result file the
+render operator writes (render.image_sequence(result_file=...)). Runs with
+any Python 3, usually Blender's bundled Python.
+
+Usage:
+    python loom_encode.py /render/shot_####.exr --codec PRORES422
+    python loom_encode.py --result /tmp/loom-result.json --codec PRORES422
+                          [--colorspace iec61966_2_1] [--fps 25] [--deliverables H264,DNXHD]
+                          [--ffmpeg /usr/bin/ffmpeg] [--threads 8]
+
+Exit codes: 0 encoded, 1 ffmpeg failed, 2 no complete sequence.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# The helpers do not depend on bpy, import them without the addon package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "helpers"))
+import encode_utils
+import sequence_utils
+
+DEFAULT_FPS = 25
+
+
+def result_sequence(result_file):
+    """Main sequence of a render result file, None if not available or incomplete"""
+    try:
+        with open(result_file) as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if result.get("invalid"):
+        return None
+    return result["sequences"][0] if result.get("sequences") else None
+
+
+def encode_sequence(ffmpeg, sequence_path, codec, colorspace, fps=None, deliverables=(), log=print, threads=None):
+    """Encode a complete image sequence, existing movies are overwritten.
+
+    Limit the threads if ffmpeg shares the machine with rendering workers,
+    by default it starts threads for every core for each output.
+
+    Returns:
+        Tuple (exit code, error message or None)
+    """
+    basedir, name, digits, ext = sequence_utils.split_sequence_path(sequence_path)
+    frames = sequence_utils.scan_sequence(basedir, name, digits, ext) if digits else {}
+    try:
+        args, outputs = encode_utils.sequence_encode_args(
+            frames, sequence_path, codec, colorspace,
+            fps=fps if fps and fps != DEFAULT_FPS else None,
+            deliverables=deliverables, threads=threads)
+    except ValueError as e:
+        return 2, str(e)
+
+    log("Encoding {}".format(", ".join(p for _, p in outputs)))
+    process = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-y"] + [str(a) for a in args],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        universal_newlines=True)
+    if process.returncode:
+        return 1, process.stdout.strip() or "ffmpeg exited with {}".format(process.returncode)
+    return 0, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("sequence", nargs="?", help="Hash path of the sequence (shot_####.exr)")
+    parser.add_argument("--result", help="Result file of the render operator")
+    parser.add_argument("--codec", required=True)
+    parser.add_argument("--colorspace", default="iec61966_2_1")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS)
+    parser.add_argument("--deliverables", default="", help="Comma separated additional codecs")
+    parser.add_argument("--ffmpeg", default="ffmpeg")
+    parser.add_argument("--threads", type=int, default=0, help="Encoder threads per output (0: all cores)")
+    args = parser.parse_args(argv)
+
+    sequence_path = args.sequence or (result_sequence(args.result) if args.result else None)
+    if not sequence_path:
+        print("No complete sequence to encode", file=sys.stderr)
+        return 2
+
+    deliverables = [d for d in args.deliverables.split(",") if d]
+    code, error = encode_sequence(
+        args.ffmpeg, os.path.abspath(sequence_path), args.codec, args.colorspace, args.fps, deliverables,
+        threads=args.threads or None)
+    if error:
+        print("ERROR: {}".format(error), file=sys.stderr)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
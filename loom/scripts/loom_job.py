@@ -0,0 +1,77 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+"""
+Execute a Loom job spec in a headless Blender.
+
+The spec holds the variants (scene, camera, parsed frame intervals, output
+override, result file) and the options of a render, see helpers/job_spec.py.
+The Loom addon has to be enabled.
+
+Run with: blender -b shot.blend --python-exit-code 1 --python loom_job.py -- job.json
+
+Exit codes: 0 all variants rendered, 1 a variant failed or the spec is invalid.
+"""
+
+import bpy
+import os
+import sys
+
+# The helpers do not depend on bpy, import them without the addon package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "helpers"))
+import job_spec
+
+
+def run(spec_file):
+    try:
+        spec = job_spec.read_spec(spec_file)
+    except (OSError, ValueError) as e:
+        print("ERROR: Can not read the job {}: {}".format(spec_file, e))
+        return False
+
+    kwargs = {
+        "variants_file": spec_file,
+        "verify": spec.get("verify", False),
+        "max_retries": spec.get("max_retries", 2),
+    }
+    if spec.get("render_preset"):
+        kwargs["render_preset"] = spec["render_preset"]
+
+    if spec.get("localize"):
+        bpy.ops.loom.localize_dependencies()
+    try:
+        status = bpy.ops.loom.render_variants(**kwargs)
+    finally:
+        if spec.get("localize"):
+            bpy.ops.loom.localize_dependencies(action='RESTORE')
+    if spec.get("save"):
+        bpy.ops.wm.save_as_mainfile(filepath=bpy.data.filepath)
+    return 'FINISHED' in status
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if len(argv) != 1:
+        print(__doc__)
+        sys.exit(1)
+    sys.exit(0 if run(argv[0]) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Run a Loom batch on a pool of persistent headless Blender workers.
+
+Every worker is a long-lived `blender -b` running loom_worker.py. All jobs
+of the same blend-file are sent to the same worker one after another, so
+the file is only loaded once. Movies are encoded by calling ffmpeg
+directly once a render succeeded, without starting Blender. Jobs marked
+"split" are distributed over all workers in chunks of similar render time
+(see helpers/scheduler.py). With "affinity", every worker is pinned to its
+own set of cores (whole NUMA nodes or cores of one node, see
+helpers/cpu_planner.py) and renders with that many threads, ffmpeg gets a
+share of the threads as well. A job only starts while the expected memory
+of all running jobs fits "memory_budget" (bytes, null: 85% of the physical
+memory, 0: no limit), see helpers/admission.py. Runs with Blender's bundled
+Python (numpy).
+
+Usage:
+    python loom_pool.py batch.json
+
+Batch file:
+    {"blender": "/path/to/blender", "ffmpeg": "ffmpeg", "workers": 2, "affinity": true,
+     "history": "/path/to/loom_history.db", "memory_budget": null,
+     "jobs": [{"blend": "/shots/a.blend", "frames": "1-100", "verify": true, "split": true,
+               "encode": {"codec": "PRORES422", "colorspace": "iec61966_2_1",
+                          "fps": 25, "deliverables": ["H264"]}}]}
+
+Exit codes: 0 all jobs succeeded, 1 a render or encode failed.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Next to this script, adds the helpers to the path
+import loom_encode
+import admission
+import cpu_planner
+import frame_utils
+import job_spec
+import render_history
+import scheduler
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loom_worker.py")
+RESULT_PREFIX = "LOOM_RESULT "
+SAMPLE_STEP = 10            # Every nth frame is rendered first if no render times are known
+MEMORY_POLL = 0.5           # Seconds between two memory samples of the workers
+
+_print_lock = threading.Lock()
+
+
+def log(*args):
+    with _print_lock:
+        print(*args, flush=True)
+
+
+class Worker:
+    """Headless Blender process receiving jobs on stdin.
+
+    Args:
+        index: Number of the worker in the log
+        blender: Path of the Blender binary
+        cpus: CPUs the worker is pinned to and renders with, all if None
+    """
+
+    def __init__(self, index, blender, cpus=None):
+        self.index = index
+        self.blender = blender
+        self.cpus = cpus or None
+        self.process = None
+        self.peak_valid = False
+
+    def start(self):
+        cmd, env = [self.blender, "--background"], None
+        if self.cpus:
+            cmd += ["--threads", str(len(self.cpus))]
+            env = dict(os.environ, LOOM_CPUS=cpu_planner.format_cpulist(self.cpus))
+        self.process = subprocess.Popen(
+            cmd + ["--python-exit-code", "1", "--python", WORKER_SCRIPT],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            universal_newlines=True, bufsize=1, env=env)
+        self.peak_valid = True # VmHWM of a new process only covers its jobs
+        if self.cpus:
+            """ Pin before Blender starts its threads, they inherit the mask """
+            cpu_planner.pin_process(self.cpus, self.process.pid)
+
+    def run(self, job):
+        """Send a job and wait for its result, the output of Blender is passed through"""
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            return {"id": job["id"], "ok": False, "error": "Worker not reachable: {}".format(e)}
+
+        for line in self.process.stdout:
+            if line.startswith(RESULT_PREFIX):
+                return json.loads(line[len(RESULT_PREFIX):])
+            log("[worker {}] {}".format(self.index, line.rstrip()))
+        self.process = None
+        return {"id": job["id"], "ok": False, "error": "Worker exited unexpectedly"}
+
+    def reset_peak(self):
+        """Start measuring the peak memory of the next job"""
+        if self.process is None or self.process.poll() is not None:
+            self.peak_valid = False # Started by the next job
+        else:
+            self.peak_valid = admission.reset_peak(self.process.pid)
+
+    def memory(self):
+        """Tuple (resident memory, peak since reset_peak or 0) in bytes, None if not running"""
+        process = self.process
+        if process is None or process.poll() is not None:
+            return None
+        memory = admission.process_memory(process.pid)
+        if memory is None:
+            return None
+        return memory[0], memory[1] if self.peak_valid else 0
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            try:
+                self.process.stdin.write(json.dumps({"quit": True}) + "\n")
+                self.process.stdin.close()
+            except OSError:
+                pass
+            self.process.wait()
+
+
+def encode(ffmpeg, job, result, threads=None):
+    """Encode the main sequence of a rendered job, returns an error message or None"""
+    spec = job["encode"]
+    if not result.get("sequences"):
+        return "No sequence rendered"
+    code, error = loom_encode.encode_sequence(
+        ffmpeg, result["sequences"][0], spec["codec"], spec["colorspace"],
+        fps=spec.get("fps"), deliverables=spec.get("deliverables", ()),
+        log=lambda msg: log("[encode {}] {}".format(job["id"], msg)), threads=threads)
+    return error
+
+
+def render_split(job, workers, history=None, run=None):
+    """Render the frames of a job on all workers, chunked by their render time.
+
+    Known times come from the render history, otherwise every nth frame is
+    rendered first and the times of these samples are interpolated. Chunks
+    are sent by run(worker, job), e.g. to pass the admission control.
+
+    Returns:
+        Merged result of all chunks, None if the frames can not be split
+    """
+    """ Only split input which does not depend on the frame step of the file """
+    isolate = job.get("isolate_numbers", False)
+    frames = frame_utils.filter_frames(job["frames"], 1, isolate)
+    if not frames or not all(isinstance(f, int) for f in frames) or \
+            frames != frame_utils.filter_frames(job["frames"], 2, isolate):
+        return None
+    known = {}
+    if history:
+        try:
+            known = render_history.frame_times(history, job["blend"], job.get("scene") or None)
+        except sqlite3.Error as e:
+            log("[split {}] Render history not available: {}".format(job["id"], e))
+
+    run = run or (lambda worker, part: worker.run(part))
+    merged = {"id": job["id"], "ok": True, "sequences": [], "invalid": {}, "frame_times": {}}
+    lock = threading.Lock()
+
+    def run_chunks(chunks):
+        chunk_queue = scheduler.ChunkQueue(chunks, len(workers))
+
+        def serve(index, worker):
+            while True:
+                chunk = chunk_queue.take(index)
+                if chunk is None:
+                    break
+                """ Explicit step, the worker parses the chunk with the frame step of the scene """
+                part = dict(job, frames=job_spec.interval_input(job_spec.frame_intervals(chunk[1])),
+                    isolate_numbers=False, save=False) # Workers must not write the same blend-file at once
+                log("[worker {}] Rendering {} [{}] (~{:.0f}s)".format(
+                    worker.index, job["blend"], part["frames"], chunk[0]))
+                result = run(worker, part)
+                with lock:
+                    merged["ok"] = merged["ok"] and bool(result.get("ok"))
+                    merged["invalid"].update(result.get("invalid") or {})
+                    merged["frame_times"].update(result.get("frame_times") or {})
+                    for sequence in result.get("sequences") or []:
+                        if sequence not in merged["sequences"]:
+                            merged["sequences"].append(sequence)
+                    if result.get("error"):
+                        merged["error"] = result["error"]
+
+        threads = [threading.Thread(target=serve, args=(i, w)) for i, w in enumerate(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    if not known:
+        samples = scheduler.sample_frames(frames, job.get("sample_step") or SAMPLE_STEP)
+        log("[split {}] No render times known, sampling {} frames".format(job["id"], len(samples)))
+        run_chunks([(scheduler.DEFAULT_COST, [f]) for f in samples])
+        known = {int(f): t for f, t in merged["frame_times"].items()}
+        frames = sorted(set(frames).difference(samples))
+
+    costs = scheduler.estimate_costs(frames, known)
+    chunks = scheduler.build_chunks(frames, costs, len(workers))
+    log("[split {}] {} chunks, estimated {:.0f}s on {} workers".format(
+        job["id"], len(chunks), scheduler.makespan(chunks, len(workers)), len(workers)))
+    run_chunks(chunks)
+    return merged
+
+
+def run_batch(batch):
+    """ Workers sharing the dependency cache keep files used since the batch started """
+    os.environ.setdefault("LOOM_BATCH_START", str(time.time()))
+    jobs = batch["jobs"]
+    for i, job in enumerate(jobs):
+        job.setdefault("id", i)
+
+    """ All jobs of a file form one group and are handled by the same worker """
+    groups = {}
+    split_jobs = [job for job in jobs if job.get("split")]
+    for job in jobs:
+        if not job.get("split"):
+            groups.setdefault(os.path.realpath(job["blend"]), []).append(job)
+    pending = queue.Queue()
+    for group in groups.values():
+        pending.put(group)
+
+    worker_count = max(1, batch.get("workers", 1) if split_jobs else min(batch.get("workers", 1), len(groups)))
+    encoder = ThreadPoolExecutor(max_workers=worker_count)
+
+    """ One set of cores per worker, ffmpeg runs beside them with a share of the threads """
+    plans, encode_threads = [None] * worker_count, None
+    if batch.get("affinity"):
+        plans = cpu_planner.plan_workers(worker_count)
+        encode_threads = max(1, len(cpu_planner.available_cpus()) // worker_count)
+        for line in cpu_planner.describe(plans):
+            log("[affinity] {}".format(line))
+    failures, encodes = [], []
+    lock = threading.Lock()
+
+    """ Memory admission, estimates are the peaks of earlier renders of the same file """
+    budget = batch.get("memory_budget")
+    budget = admission.default_budget() if budget is None else budget
+    controller = admission.AdmissionController(budget) if budget and worker_count > 1 else None
+    peaks, done = {}, threading.Event()
+
+    def memory_key(job):
+        return os.path.realpath(job["blend"]), job.get("scene") or ""
+
+    def estimate(job):
+        key = memory_key(job)
+        if key not in peaks and batch.get("history"):
+            try:
+                peaks[key] = render_history.memory_peak(batch["history"], job["blend"], job.get("scene") or "")
+            except sqlite3.Error:
+                peaks[key] = None
+        return admission.estimate_memory(peaks.get(key))
+
+    def run_job(worker, job):
+        if controller is None:
+            return worker.run(job)
+        expected = estimate(job)
+        if not controller.admit(worker.index, expected, timeout=0):
+            log("[worker {}] Waiting for memory ({})".format(worker.index,
+                "{:.1f} GB expected".format(expected / 1024**3) if expected else "probing alone"))
+            controller.admit(worker.index, expected)
+        worker.reset_peak()
+        try:
+            return worker.run(job)
+        finally:
+            memory = worker.memory() # VmHWM covers spikes between two samples
+            if memory:
+                controller.observe(worker.index, *memory)
+            peak = controller.release(worker.index)
+            if peak:
+                key = memory_key(job)
+                with lock:
+                    peaks[key] = peak
+                if batch.get("history"):
+                    try:
+                        render_history.log_memory_peak(batch["history"], job["blend"], key[1], peak)
+                    except sqlite3.Error as e:
+                        log("[worker {}] Memory peak not stored: {}".format(worker.index, e))
+
+    def watch_memory():
+        """Sample the memory of all workers until the batch is done"""
+        paused = False
+        while not done.wait(MEMORY_POLL):
+            for worker in workers:
+                memory = worker.memory()
+                controller.observe(worker.index, *(memory or (0, 0)))
+            if controller.paused() != paused:
+                paused = not paused
+                log("[memory] Admission {} ({:.1f} of {:.1f} GB)".format(
+                    "paused" if paused else "resumed",
+                    controller.predicted() / 1024**3, controller.budget / 1024**3))
+
+    def encode_job(job, result):
+        error = encode(batch.get("ffmpeg") or "ffmpeg", job, result, encode_threads)
+        if error:
+            with lock:
+                failures.append("Encoding {} failed: {}".format(job["blend"], error))
+
+    def finish_job(job, result):
+        if not result.get("ok"):
+            with lock:
+                failures.append("Rendering {} failed: {}".format(
+                    job["blend"], result.get("error") or result.get("invalid") or "see log"))
+        elif job.get("encode"):
+            """ The workers continue rendering while ffmpeg encodes """
+            with lock:
+                encodes.append(encoder.submit(encode_job, job, result))
+
+    def serve(worker):
+        while True:
+            try:
+                group = pending.get_nowait()
+            except queue.Empty:
+                break
+            for job in group:
+                log("[worker {}] Rendering {} [{}]".format(worker.index, job["blend"], job["frames"]))
+                finish_job(job, run_job(worker, job))
+        worker.stop()
+
+    workers = [Worker(i + 1, batch.get("blender") or "blender", plans[i]) for i in range(worker_count)]
+    watcher = threading.Thread(target=watch_memory, daemon=True) if controller else None
+    if watcher:
+        watcher.start()
+
+    """ Split jobs use all workers, one after another """
+    for job in split_jobs:
+        result = render_split(job, workers, batch.get("history"), run_job)
+        if result is None:
+            log("[split {}] Frames can not be split, rendering on one worker".format(job["id"]))
+            result = run_job(workers[0], job)
+        finish_job(job, result)
+
+    threads = [threading.Thread(target=serve, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    done.set()
+    encoder.shutdown(wait=True)
+    return failures
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print(__doc__)
+        return 1
+    with open(argv[0]) as f:
+        batch = json.load(f)
+
+    failures = run_batch(batch)
+    log("=" * 70)
+    for failure in failures:
+        log("ERROR:", failure)
+    log("{} job(s), {} failed".format(len(batch["jobs"]), len(failures)))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
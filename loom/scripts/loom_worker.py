@@ -0,0 +1,139 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+Long-lived headless Blender worker for Loom batch renders.
+
+Started by loom_pool.py, reads one json job per line from stdin and answers
+each job with a single line "LOOM_RESULT {json}" on stdout. The blend-file
+stays loaded between jobs for the same file. Render presets are restored
+after each job, the file is only opened again if a preset could not be
+restored. The Loom addon has to be enabled.
+
+Run with: blender --background --python-exit-code 1 --python loom_worker.py
+
+LOOM_CPUS (kernel cpu list, e.g. "0-7,32-39") pins all threads of the
+worker, set by the pool together with a matching --threads.
+
+Job keys: id, blend, scene, camera, frames, isolate_numbers, verify,
+max_retries, render_preset, localize, save
+"""
+
+import bpy
+import json
+import os
+import sys
+import tempfile
+
+
+RESULT_PREFIX = "LOOM_RESULT "
+
+
+def respond(result):
+    sys.stdout.write(RESULT_PREFIX + json.dumps(result) + "\n")
+    sys.stdout.flush()
+
+
+def load(blend, reload=False):
+    """Open the blend-file unless it is already loaded"""
+    current = bpy.data.filepath
+    if reload or not current or os.path.realpath(current) != os.path.realpath(blend):
+        bpy.ops.wm.open_mainfile(filepath=blend)
+        return True
+    return False
+
+
+def run(job, reload):
+    loaded = load(job["blend"], reload)
+    fd, result_file = tempfile.mkstemp(prefix="loom_result_", suffix=".json")
+    os.close(fd)
+    fd, variants_file = tempfile.mkstemp(prefix="loom_variants_", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump([{
+            "scene": job.get("scene", ""),
+            "camera": job.get("camera", ""),
+            "frames": job["frames"],
+            "isolate_numbers": job.get("isolate_numbers", False),
+            "result_file": result_file}], f)
+    kwargs = {
+        "variants_file": variants_file,
+        "verify": job.get("verify", False),
+        "max_retries": job.get("max_retries", 2),
+    }
+    if job.get("render_preset"):
+        kwargs["render_preset"] = job["render_preset"]
+
+    status = set()
+    try:
+        if job.get("localize"):
+            bpy.ops.loom.localize_dependencies()
+        try:
+            status = bpy.ops.loom.render_variants(**kwargs)
+        finally:
+            if job.get("localize"):
+                bpy.ops.loom.localize_dependencies(action='RESTORE')
+        if job.get("save"):
+            bpy.ops.wm.save_as_mainfile(filepath=bpy.data.filepath)
+        with open(result_file) as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        result = {}
+    finally:
+        os.remove(result_file)
+        os.remove(variants_file)
+
+    result.update({"id": job.get("id"), "ok": 'FINISHED' in status, "reloaded": loaded})
+    return result
+
+
+def pin_threads():
+    """Apply LOOM_CPUS to all threads Blender started before this script"""
+    cpus = os.environ.get("LOOM_CPUS")
+    if not cpus:
+        return
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "helpers"))
+    import cpu_planner
+    cpu_planner.pin_process(cpu_planner.parse_cpulist(cpus))
+
+
+def main():
+    pin_threads()
+    reload = False
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError:
+            respond({"id": None, "ok": False, "error": "Invalid job: {}".format(line)})
+            continue
+        if job.get("quit"):
+            break
+        try:
+            result = run(job, reload)
+        except Exception as e:
+            result = {"id": job.get("id"), "ok": False, "error": str(e)}
+        respond(result)
+        """ Presets are restored after rendering, start from the file again
+            if a preset could only be executed as script """
+        reload = bool(job.get("render_preset")) and result.get("scene_modified", True)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,7 @@ import re
 # Import helpers
 from ..helpers.globals_utils import replace_globals
 from ..helpers.blender_compat import get_compositor_node_tree
+from ..helpers import async_fs
 
 
 def draw_loom_preset_flags(self, context):
@@ -106,7 +107,7 @@ def draw_loom_outputpath(self, context):
         return
 
     output_folder, file_name = os.path.split(bpy.path.abspath(scn.render.filepath))
-    output_folder = os.path.realpath(output_folder)
+    output_folder = os.path.normpath(output_folder)
 
     if not file_name and bpy.data.is_saved:
         blend_name, ext = os.path.splitext(os.path.basename(bpy.data.filepath))
@@ -135,8 +136,11 @@ def draw_loom_outputpath(self, context):
     box = layout.box()
     row = box.row()
 
-    if not os.path.isdir(output_folder):
-        row.operator("loom.utils_create_directory",
+    folder_exists = async_fs.is_dir(output_folder)
+    if folder_exists is None:
+        row.label(text="", icon='TIME')
+    elif not folder_exists:
+        row.operator("loom.create_directory",
             icon='ERROR', text="", emboss=False).directory = os.path.dirname(file_path)
     else:
         row.operator("loom.open_output_folder", icon='DISK_DRIVE', text="", emboss=False)
@@ -25,6 +25,7 @@ and batch render queue.
 
 import bpy
 import os
+from fnmatch import fnmatchcase
 
 # Import helpers
 from ..helpers.globals_utils import isevaluable
@@ -59,7 +60,65 @@ class LOOM_UL_directories(bpy.types.UIList):
 
 
 class LOOM_UL_batch_list(bpy.types.UIList):
-    """UIList for displaying batch render queue items."""
+    """UIList for displaying batch render queue items.
+
+    Items are filtered by name or path and sorted in filter_items, so only
+    the visible rows of long queues are drawn.
+    """
+
+    sort_key: bpy.props.EnumProperty(
+        name="Sort by",
+        description="Order of the displayed items, the render order stays the queue order",
+        items=(
+            ('ORDER', "Queue", "Render order"),
+            ('NAME', "Name", "Filename"),
+            ('PATH', "Path", "Folder and filename"),
+            ('SCENE', "Scene", "Scene and camera")))
+
+    filter_encode: bpy.props.BoolProperty(
+        name="Encode",
+        description="Only show items which are encoded",
+        default=False)
+
+    filter_selected: bpy.props.BoolProperty(
+        name="Selected",
+        description="Only show selected items",
+        default=False)
+
+    def filter_items(self, context, data, propname):
+        items = getattr(data, propname)
+        visible = self.bitflag_filter_item
+        flags = [visible] * len(items)
+
+        if self.filter_name:
+            pattern = "*{}*".format(self.filter_name.lower())
+            flags = [visible if fnmatchcase(i.name.lower(), pattern) or fnmatchcase(i.path.lower(), pattern) \
+                else 0 for i in items]
+        if self.filter_encode or self.filter_selected:
+            flags = [f if (i.encode_flag or not self.filter_encode) and (i.select or not self.filter_selected) \
+                else 0 for f, i in zip(flags, items)]
+
+        order = []
+        if self.sort_key != 'ORDER':
+            keys = {
+                'NAME': lambda i: i.name.lower(),
+                'PATH': lambda i: i.path.lower(),
+                'SCENE': lambda i: (i.scene.lower(), i.camera.lower())}[self.sort_key]
+            order = bpy.types.UI_UL_list.sort_items_helper(
+                [(c, keys(i)) for c, i in enumerate(items)], key=lambda x: x[1])
+        return flags, order
+
+    def draw_filter(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "use_filter_invert", text="", icon='ARROW_LEFTRIGHT')
+        row.separator()
+        row.prop(self, "filter_selected", text="", icon='CHECKBOX_HLT')
+        row.prop(self, "filter_encode", text="", icon='FILE_MOVIE')
+        row = layout.row(align=True)
+        row.prop(self, "sort_key", expand=True)
+        row.prop(self, "use_filter_sort_reverse", text="",
+            icon='SORT_DESC' if self.use_filter_sort_reverse else 'SORT_ASC')
 
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         addon_name = __package__.split('.')[0]
@@ -68,24 +127,23 @@ class LOOM_UL_batch_list(bpy.types.UIList):
         if prefs.batch_paths_flag:
             split = layout.split(factor=prefs.batch_path_col_width, align=True)
             split_left = split.split(factor=0.08)
-            split_left.label(text="{:02d}".format(index+1))
+            split_left.prop(item, "select", text="{:02d}".format(index+1))
             split_left.label(text=item.path, icon='FILE_BLEND')
         else:
             split = layout.split(factor=prefs.batch_name_col_width, align=True)
             split_left = split.split(factor=0.1)
-            split_left.operator(
-                "loom.batch_default_range",
-                text="{:02d}".format(index+1),
-                emboss=False).item_id = index
+            split_left.prop(item, "select", text="{:02d}".format(index+1))
             split_left.label(text=item.name, icon='FILE_BLEND')
 
         split_right = split.split(factor=.99)
         row = split_right.row(align=True)
         row.operator(
-            "loom.batch_default_range",
+            "loom.batch_default_frames",
             icon="PREVIEW_RANGE",
             text="").item_id = index
         row.prop(item, "frames", text="")
+        row.prop(item, "scene", text="", icon='SCENE_DATA')
+        row.prop(item, "camera", text="", icon='CAMERA_DATA')
         row.prop(item, "input_filter", text="", icon='FILTER')
         row.prop(item, "encode_flag", text="", icon='FILE_MOVIE')
         row.operator(
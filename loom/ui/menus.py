@@ -47,6 +47,29 @@ class LOOM_MT_display_settings(bpy.types.Menu):
         layout.operator("loom.batch_dialog_reset", icon="ANIM")
 
 
+class LOOM_MT_batch_queue(bpy.types.Menu):
+    """Menu for bulk actions, import and export of the batch list."""
+
+    bl_label = "Loom Batch List"
+    bl_idname = "LOOM_MT_batch_queue"
+
+    def draw(self, context):
+        layout = self.layout
+        layout.operator("loom.batch_bulk_action", icon='CHECKBOX_HLT', text="Select All").action = 'SELECT'
+        layout.operator("loom.batch_bulk_action", icon='CHECKBOX_DEHLT', text="Deselect All").action = 'DESELECT'
+        layout.operator("loom.batch_bulk_action", icon='ARROW_LEFTRIGHT', text="Invert Selection").action = 'INVERT'
+        layout.separator()
+        layout.operator("loom.batch_bulk_action", icon='TRIA_UP_BAR', text="Move to Top").action = 'TOP'
+        layout.operator("loom.batch_bulk_action", icon='TRIA_DOWN_BAR', text="Move to Bottom").action = 'BOTTOM'
+        layout.operator("loom.batch_bulk_action", icon='FILE_MOVIE', text="Encode").action = 'ENCODE'
+        layout.operator("loom.batch_bulk_action", icon='X', text="Do not Encode").action = 'NO_ENCODE'
+        layout.operator("loom.batch_bulk_action", icon='REMOVE', text="Remove Selected").action = 'REMOVE'
+        layout.operator("loom.batch_bulk_action", icon='ERROR', text="Remove Missing Files").action = 'REMOVE_MISSING'
+        layout.separator()
+        layout.operator("loom.batch_import", icon='IMPORT', text="Import List...")
+        layout.operator("loom.batch_export", icon='EXPORT', text="Export List...")
+
+
 class LOOM_MT_render_presets(bpy.types.Menu):
     """Menu for render preset selection."""
 
@@ -72,6 +95,7 @@ class LOOM_MT_render_menu(bpy.types.Menu):
         layout.operator("loom.render_flipbook", icon='RENDER_RESULT')
         if prefs.playblast_flag:
             layout.operator("loom.playblast", icon='PLAY', text="Loom Playblast")
+            layout.operator("loom.build_proxies", icon='IMAGE_REFERENCE', text="Build Proxies")
         layout.separator()
         layout.operator("loom.encode_dialog", icon='RENDER_ANIMATION', text="Encode Image Sequence")
         layout.operator("loom.rename_dialog", icon="SORTALPHA")
@@ -96,6 +120,7 @@ class LOOM_MT_marker_menu(bpy.types.Menu):
 # Classes for registration
 classes = (
     LOOM_MT_display_settings,
+    LOOM_MT_batch_queue,
     LOOM_MT_render_presets,
     LOOM_MT_render_menu,
     LOOM_MT_marker_menu,